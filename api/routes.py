@@ -1,14 +1,43 @@
 # API路由定义
 
+import math
+import os
 from flask import Blueprint, jsonify, request
+from config import Config
 from data.data_manager import DataManager
-from core.synergy_analyzer import SynergyAnalyzer
+from core.synergy_analyzer import SCORE_WEIGHT_NAMES, SynergyAnalyzer, parse_score_weights
 from core.recommender import Recommender
+from core.score_store import ScoreStore
+from core.score_columns import ScoreColumnsProvider
+from core.leaderboards import Leaderboards
+from core.roster import Roster
+from core.skill_loadout import SkillLoadoutOptimizer
+from core.diversity import DEFAULT_MAX_HERO_REUSE, DEFAULT_MAX_SHARED_HEROES
+from core.job_manager import JobManager, JOB_CANCELLED, JOB_DONE, JOB_FAILED
 
 # 初始化数据管理器和分析器
 data_manager = DataManager("data/consolidated_ocr_data.json")
-synergy_analyzer = SynergyAnalyzer(data_manager)
-recommender = Recommender(data_manager, synergy_analyzer)
+score_store = None
+if Config.PERSISTENT_SCORE_CACHE:
+    score_store = ScoreStore(os.path.join(os.path.dirname(data_manager.data_file_path),
+                                          Config.SCORE_STORE_FILENAME))
+synergy_analyzer = SynergyAnalyzer(data_manager, score_store=score_store)
+score_columns = None
+if Config.USE_SCORE_COLUMNS:
+    score_columns = ScoreColumnsProvider(synergy_analyzer, Config.SCORE_COLUMNS_DIR)
+leaderboards = None
+if Config.USE_LEADERBOARDS:
+    leaderboards = Leaderboards(data_manager, synergy_analyzer, size=Config.LEADERBOARD_SIZE)
+    leaderboards.build()
+recommender = Recommender(data_manager, synergy_analyzer,
+                          parallel_workers=Config.PARALLEL_SCORING_WORKERS,
+                          score_columns=score_columns,
+                          leaderboards=leaderboards)
+skill_loadout_optimizer = SkillLoadoutOptimizer(synergy_analyzer)
+job_manager = JobManager(max_workers=Config.JOB_WORKERS, history_size=Config.JOB_HISTORY_SIZE)
+
+# 异步推荐任务支持的策略：只有精确搜索会报告进度并响应取消，未指定策略时使用exact
+JOB_STRATEGIES = ("exact", "branch_and_bound")
 
 api_bp = Blueprint('api', __name__)
 
@@ -20,25 +49,23 @@ def get_heroes():
     size = request.args.get('size', 20, type=int)
     search = request.args.get('search', '', type=str)
     camp = request.args.get('camp', '', type=str)  # 按阵营筛选
+    tags = request.args.getlist('tag')  # 按标签筛选（可重复，须全部包含）
     
     # 获取所有武将数据
     all_heroes = data_manager.get_heroes()
     
-    # 如果有搜索关键字，进行过滤
+    # 如果有搜索关键字，通过搜索索引过滤（按相关度排序）
     if search:
-        filtered_heroes = {}
-        for name, info in all_heroes.items():
-            if search.lower() in name.lower() or search.lower() in str(info).lower():
-                filtered_heroes[name] = info
-        all_heroes = filtered_heroes
-    
-    # 如果有阵营筛选条件，进行过滤
-    if camp:
-        filtered_heroes = {}
-        for name, info in all_heroes.items():
-            if info.get("阵营", "") == camp:
-                filtered_heroes[name] = info
-        all_heroes = filtered_heroes
+        all_heroes = data_manager.search_heroes(search)
+    
+    # 如果有阵营、标签筛选条件，通过二级索引过滤
+    if camp or tags:
+        matched = data_manager.filter_hero_names(camp=camp, tags=tags)
+        if search:
+            matched = set(matched)
+            all_heroes = {name: info for name, info in all_heroes.items() if name in matched}
+        else:
+            all_heroes = {name: all_heroes[name] for name in matched}
     
     # 计算分页信息
     total = len(all_heroes)
@@ -71,6 +98,50 @@ def get_hero(hero_name):
             "error": f"未找到武将 {hero_name}"
         }), 404
 
+@api_bp.route('/heroes/<hero_name>/skills', methods=['GET'])
+def get_hero_skills(hero_name):
+    """获取武将的自带战法、传承战法详情和关联该武将的战法"""
+    skill_names = data_manager.get_hero_skill_names(hero_name)
+    if skill_names is None:
+        return jsonify({
+            "error": f"未找到武将 {hero_name}"
+        }), 404
+    
+    skills = {skill_key: {"name": skill_name, "info": None} for skill_key, skill_name in skill_names.items()}
+    for skill_key, skill_name, skill_info in data_manager.get_hero_skills(hero_name):
+        skills[skill_key]["info"] = skill_info
+    return jsonify({
+        "hero": hero_name,
+        "skills": skills,
+        "linked_skills": data_manager.get_linked_skills(hero_name)
+    })
+
+@api_bp.route('/heroes/<hero_name>/compatible-skills', methods=['GET'])
+def get_compatible_skills(hero_name):
+    """获取适用兵种包含武将高适性兵种的战法（min_grade为最低适性等级，默认A）"""
+    if data_manager.get_hero_by_name(hero_name) is None:
+        return jsonify({
+            "error": f"未找到武将 {hero_name}"
+        }), 404
+    min_grade = request.args.get('min_grade', 'A', type=str)
+    skills = data_manager.get_compatible_skill_names(hero_name, min_grade=min_grade)
+    return jsonify({
+        "hero": hero_name,
+        "min_grade": min_grade,
+        "count": len(skills),
+        "skills": skills
+    })
+
+@api_bp.route('/troops/<troop>/skills', methods=['GET'])
+def get_troop_skills(troop):
+    """获取适用于指定兵种的战法"""
+    skills = data_manager.filter_skill_names(troop=troop)
+    return jsonify({
+        "troop": troop,
+        "count": len(skills),
+        "skills": skills
+    })
+
 @api_bp.route('/skills', methods=['GET'])
 def get_skills():
     """获取所有战法（支持分页、搜索和筛选）"""
@@ -79,25 +150,24 @@ def get_skills():
     size = request.args.get('size', 20, type=int)
     search = request.args.get('search', '', type=str)
     skill_type = request.args.get('type', '', type=str)  # 按类型筛选
+    quality = request.args.get('quality', '', type=str)  # 按品质筛选
+    troop = request.args.get('troop', '', type=str)  # 按适用兵种筛选
     
     # 获取所有战法数据
     all_skills = data_manager.get_skills()
     
-    # 如果有搜索关键字，进行过滤
+    # 如果有搜索关键字，通过搜索索引过滤（按相关度排序）
     if search:
-        filtered_skills = {}
-        for name, info in all_skills.items():
-            if search.lower() in name.lower() or search.lower() in str(info).lower():
-                filtered_skills[name] = info
-        all_skills = filtered_skills
-    
-    # 如果有类型筛选条件，进行过滤
-    if skill_type:
-        filtered_skills = {}
-        for name, info in all_skills.items():
-            if info.get("类型", "") == skill_type:
-                filtered_skills[name] = info
-        all_skills = filtered_skills
+        all_skills = data_manager.search_skills(search)
+    
+    # 如果有类型、品质、兵种筛选条件，通过二级索引过滤
+    if skill_type or quality or troop:
+        matched = data_manager.filter_skill_names(skill_type=skill_type, quality=quality, troop=troop)
+        if search:
+            matched = set(matched)
+            all_skills = {name: info for name, info in all_skills.items() if name in matched}
+        else:
+            all_skills = {name: all_skills[name] for name in matched}
     
     # 计算分页信息
     total = len(all_skills)
@@ -130,17 +200,60 @@ def get_skill(skill_name):
             "error": f"未找到战法 {skill_name}"
         }), 404
 
+@api_bp.route('/skills/<skill_name>/heroes', methods=['GET'])
+def get_skill_heroes(skill_name):
+    """获取以战法为自带战法、传承战法的武将，以及战法的关联武将"""
+    skill_heroes = data_manager.get_skill_heroes(skill_name)
+    # 武将引用的战法可能没有详情数据，只要有武将引用就返回
+    if data_manager.get_skill_by_name(skill_name) is None and not any(skill_heroes.values()):
+        return jsonify({
+            "error": f"未找到战法 {skill_name}"
+        }), 404
+    return jsonify({
+        "skill": skill_name,
+        "heroes": skill_heroes
+    })
+
+@api_bp.route('/skills/loadout', methods=['POST'])
+def optimize_skill_loadout():
+    """为队伍搜索战法协同评分最高的战法配置"""
+    data = request.get_json()
+    team_heroes = data.get('heroes', [])
+    count = data.get('count', 5)
+    available_skills = data.get('available_skills')
+    
+    if not team_heroes:
+        return jsonify({
+            "error": "必须提供武将名单"
+        }), 400
+    if not isinstance(count, int) or count < 1:
+        return jsonify({
+            "error": "count必须为正整数"
+        }), 400
+    
+    result = skill_loadout_optimizer.optimize(team_heroes, count=count, available_skills=available_skills)
+    if "error" in result:
+        return jsonify(result), 400
+    return jsonify(result)
+
 @api_bp.route('/skills/<skill_name>', methods=['PUT'])
 def update_skill(skill_name):
     """更新指定战法的信息"""
     try:
         # 获取请求数据
-        data = request.get_json()
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({"error": "战法信息应为JSON对象"}), 400
         
         # 更新战法信息
         success = data_manager.update_skill(skill_name, data)
         
         if success:
+            # 数据变化后增量更新排行榜，并在后台重新生成全量队伍评分文件
+            if leaderboards is not None:
+                leaderboards.apply_skill_update(skill_name)
+            if score_columns is not None:
+                score_columns.rebuild_async()
             return jsonify({
                 "message": f"战法 {skill_name} 更新成功"
             })
@@ -158,28 +271,283 @@ def recommend_teams():
     """推荐队伍组合（支持更多自定义参数）"""
     # 获取请求参数
     data = request.get_json()
-    count = data.get('count', 10)
-    required_hero = data.get('required_hero')
-    excluded_heroes = data.get('excluded_heroes', [])
-    required_camp = data.get('required_camp')
-    required_tags = data.get('required_tags', [])
-    strategy = data.get('strategy', 'balanced')  # balanced, high_synergy, diverse
+    params, error_response = _parse_recommend_request(data)
+    if error_response:
+        return error_response
     
     # 调用推荐引擎
-    recommendations = recommender.recommend_teams(
-        count=count,
-        required_hero=required_hero,
-        excluded_heroes=excluded_heroes,
-        required_camp=required_camp,
-        required_tags=required_tags,
-        strategy=strategy
-    )
+    recommendations = recommender.recommend_teams(**params)
+    return jsonify(_recommend_response(recommendations, params))
+
+@api_bp.route('/recommend/batch', methods=['POST'])
+def recommend_teams_batch():
+    """批量推荐队伍组合：{"queries": [与/recommend相同的参数, ...]}，所有查询共用一份全量队伍评分"""
+    data = request.get_json()
+    queries = data.get('queries')
+    if not isinstance(queries, list) or not queries:
+        return jsonify({
+            "error": "必须提供查询列表"
+        }), 400
+    if len(queries) > Config.BATCH_MAX_QUERIES:
+        return jsonify({
+            "error": f"查询数量不能超过 {Config.BATCH_MAX_QUERIES}"
+        }), 400
+    
+    # 参数有误的查询单独返回错误，不影响其他查询
+    results = [None] * len(queries)
+    valid_positions, valid_params = [], []
+    for position, query in enumerate(queries):
+        if not isinstance(query, dict):
+            results[position] = {"error": "查询必须为对象"}
+            continue
+        params, error_response = _parse_recommend_request(query)
+        if error_response:
+            results[position] = error_response[0].get_json()
+            continue
+        valid_positions.append(position)
+        valid_params.append(params)
+    
+    recommendations = recommender.recommend_teams_batch(valid_params, workers=Config.BATCH_WORKERS or None)
+    for position, params, result in zip(valid_positions, valid_params, recommendations):
+        if isinstance(result, dict) and "error" in result:
+            results[position] = result
+        else:
+            results[position] = _recommend_response(result, params)
+    
+    return jsonify({
+        "count": len(results),
+        "results": results
+    })
+
+@api_bp.route('/recommend/pareto', methods=['POST'])
+def recommend_pareto_teams():
+    """推荐多目标帕累托前沿上的队伍（四项子评分、平均兵种适性、估算输出），参数与/recommend相同"""
+    data = request.get_json()
+    # count的含义与/recommend不同，单独校验
+    params, error_response = _parse_recommend_request({key: value for key, value in data.items() if key != 'count'})
+    if error_response:
+        return error_response
+    
+    # 默认返回整个前沿
+    count = data.get('count')
+    if count is not None and (not isinstance(count, int) or count < 1):
+        return jsonify({
+            "error": "count必须为正整数"
+        }), 400
     
+    teams = recommender.recommend_pareto_teams(
+        required_hero=params["required_hero"],
+        excluded_heroes=params["excluded_heroes"],
+        required_camp=params["required_camp"],
+        required_tags=params["required_tags"],
+        roster=params["roster"],
+        weights=params["weights"],
+        count=count
+    )
+    if isinstance(teams, dict):
+        return jsonify(teams), 400
     return jsonify({
+        "count": len(teams),
+        "teams": teams
+    })
+
+def _parse_recommend_request(data):
+    """解析推荐请求参数
+    
+    Returns:
+        (recommend_teams的参数或None, 错误响应或None)
+    """
+    count = data.get('count', 10)
+    if not isinstance(count, int) or count < 1:
+        return None, (jsonify({
+            "error": "count必须为正整数"
+        }), 400)
+    
+    # 搜索时间上限（毫秒，有限的非负数），到时返回已找到的最好队伍
+    time_budget_ms = data.get('time_budget_ms')
+    if time_budget_ms is not None and (isinstance(time_budget_ms, bool) or
+                                       not isinstance(time_budget_ms, (int, float)) or
+                                       not math.isfinite(time_budget_ms) or time_budget_ms < 0):
+        return None, (jsonify({
+            "error": "time_budget_ms必须为有限的非负数"
+        }), 400)
+    
+    # 自定义评分权重：[标签, 兵种, 阵营, 战法]或{"tag": ..., "troop": ..., "camp": ..., "skill": ...}
+    weights = None
+    if data.get('weights') is not None:
+        try:
+            weights = parse_score_weights(data.get('weights'))
+        except ValueError as e:
+            return None, (jsonify({
+                "error": str(e)
+            }), 400)
+    
+    # diverse策略：每名武将最多出现的队伍数量、两支队伍最多共有的武将数量
+    max_hero_reuse = data.get('max_hero_reuse', DEFAULT_MAX_HERO_REUSE)
+    max_shared_heroes = data.get('max_shared_heroes', DEFAULT_MAX_SHARED_HEROES)
+    if not isinstance(max_hero_reuse, int) or max_hero_reuse < 1:
+        return None, (jsonify({
+            "error": "max_hero_reuse必须为正整数"
+        }), 400)
+    if not isinstance(max_shared_heroes, int) or not 0 <= max_shared_heroes <= 2:
+        return None, (jsonify({
+            "error": "max_shared_heroes必须为0、1或2"
+        }), 400)
+    
+    roster, error_response = _parse_roster(data.get('roster'))
+    if error_response:
+        return None, error_response
+    
+    return {
+        "count": count,
+        "required_hero": data.get('required_hero'),
+        "excluded_heroes": data.get('excluded_heroes', []),
+        "required_camp": data.get('required_camp'),
+        "required_tags": data.get('required_tags', []),
+        "strategy": data.get('strategy', 'balanced'),  # balanced, high_synergy, exact, branch_and_bound, diverse
+        "roster": roster,
+        "time_budget_ms": time_budget_ms,
+        "weights": weights,
+        "max_hero_reuse": max_hero_reuse,
+        "max_shared_heroes": max_shared_heroes
+    }, None
+
+def _recommend_response(recommendations, params):
+    """构造推荐结果的响应内容"""
+    if params["time_budget_ms"] is not None and "队伍" in recommendations:
+        return {
+            "count": len(recommendations["队伍"]),
+            "teams": recommendations["队伍"],
+            "exact": recommendations["精确"],
+            "gap_bound": recommendations["评分差距上界"]
+        }
+    
+    return {
         "count": len(recommendations),
         "teams": recommendations
+    }
+
+@api_bp.route('/jobs/recommend', methods=['POST'])
+def submit_recommend_job():
+    """提交异步推荐任务（参数与/recommend相同，策略只能为exact或branch_and_bound），返回任务编号"""
+    data = request.get_json()
+    params, error_response = _parse_recommend_request(data)
+    if error_response:
+        return error_response
+    params["strategy"] = data.get('strategy', JOB_STRATEGIES[0])
+    if params["strategy"] not in JOB_STRATEGIES:
+        return jsonify({
+            "error": f"异步任务的策略必须为{'或'.join(JOB_STRATEGIES)}（其他策略不报告进度、不能取消）"
+        }), 400
+    
+    def run(job):
+        recommendations = recommender.recommend_teams(progress=job.report_progress, **params)
+        return _recommend_response(recommendations, params)
+    
+    job = job_manager.submit("recommend", run)
+    return jsonify(job.to_dict()), 202
+
+@api_bp.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """查询任务状态和进度（已评分队伍数/队伍总数）"""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({
+            "error": f"未找到任务 {job_id}"
+        }), 404
+    return jsonify(job.to_dict())
+
+@api_bp.route('/jobs/<job_id>/result', methods=['GET'])
+def get_job_result(job_id):
+    """读取已完成任务的结果"""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({
+            "error": f"未找到任务 {job_id}"
+        }), 404
+    if job.state == JOB_DONE:
+        return jsonify(job.result)
+    if job.state == JOB_FAILED:
+        return jsonify({
+            "error": f"任务执行失败: {job.error}"
+        }), 500
+    response = job.to_dict()
+    response["error"] = "任务已取消" if job.state == JOB_CANCELLED else "任务尚未完成"
+    return jsonify(response), 409
+
+@api_bp.route('/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    """取消任务"""
+    job = job_manager.cancel(job_id)
+    if job is None:
+        return jsonify({
+            "error": f"未找到任务 {job_id}"
+        }), 404
+    return jsonify(job.to_dict())
+
+@api_bp.route('/recommend/lineup', methods=['POST'])
+def recommend_lineup():
+    """从阵容中推荐互不重复的多支队伍（总协同评分最高）"""
+    data = request.get_json()
+    team_count = data.get('team_count', 5)
+    excluded_heroes = data.get('excluded_heroes', [])
+    if not isinstance(team_count, int) or team_count < 1:
+        return jsonify({
+            "error": "team_count必须为正整数"
+        }), 400
+    
+    roster, error_response = _parse_roster(data.get('roster'))
+    if error_response:
+        return error_response
+    
+    lineup = recommender.recommend_disjoint_teams(
+        team_count=team_count,
+        roster=roster,
+        excluded_heroes=excluded_heroes
+    )
+    
+    return jsonify({
+        "count": len(lineup["队伍"]),
+        "teams": lineup["队伍"],
+        "total_score": lineup["总评分"],
+        "optimal": lineup["最优"]
     })
 
+def _parse_roster(roster_data):
+    """解析请求中的玩家阵容
+    
+    阵容格式：{"heroes": [...], "skills": [...], "drop_missing_skills": false}，省略的字段表示全部拥有
+    
+    Returns:
+        (阵容或None, 错误响应或None)
+    """
+    if not roster_data:
+        return None, None
+    if not isinstance(roster_data, dict):
+        return None, (jsonify({
+            "error": "roster必须为对象"
+        }), 400)
+    for key in ('heroes', 'skills'):
+        names = roster_data.get(key)
+        if names is not None and (not isinstance(names, list) or
+                                  not all(isinstance(name, str) for name in names)):
+            return None, (jsonify({
+                "error": f"roster.{key}必须为名称列表"
+            }), 400)
+    roster = Roster.from_names(
+        synergy_analyzer.get_compiled_heroes(),
+        heroes=roster_data.get('heroes'),
+        skills=roster_data.get('skills'),
+        drop_missing_skills=roster_data.get('drop_missing_skills', False)
+    )
+    if roster.unknown_heroes or roster.unknown_skills:
+        return None, (jsonify({
+            "error": "阵容中包含未知的武将或战法",
+            "unknown_heroes": roster.unknown_heroes,
+            "unknown_skills": roster.unknown_skills
+        }), 400)
+    return roster, None
+
 @api_bp.route('/synergy', methods=['POST'])
 def analyze_synergy():
     """分析队伍协同效应（支持详细分析）"""
@@ -193,6 +561,13 @@ def analyze_synergy():
             "error": "必须提供武将名单"
         }), 400
     
+    try:
+        weights = parse_score_weights(data.get('weights'))
+    except ValueError as e:
+        return jsonify({
+            "error": str(e)
+        }), 400
+    
     # 调用协同分析器
     if detailed:
         # 获取详细分析结果
@@ -201,14 +576,39 @@ def analyze_synergy():
         # 获取基础分析结果
         synergy_analysis = synergy_analyzer.analyze_synergy(team_heroes)
     
-    synergy_score = synergy_analyzer.calculate_synergy_score(team_heroes)
+    synergy_score = synergy_analyzer.calculate_synergy_score(team_heroes, weights=weights)
     
     return jsonify({
         "team": team_heroes,
         "synergy_analysis": synergy_analysis,
-        "synergy_score": synergy_score
+        "synergy_score": synergy_score,
+        "weights": dict(zip(SCORE_WEIGHT_NAMES, weights))
     })
 
+@api_bp.route('/synergy/replacements', methods=['POST'])
+def rank_replacements():
+    """评估替换队伍中某个武将后的协同评分（slot为位置0-2，或用replace指定被替换的武将）"""
+    data = request.get_json()
+    team_heroes = data.get('heroes', [])
+    slot = data.get('slot')
+    replace = data.get('replace')
+    if replace is not None:
+        if replace not in team_heroes:
+            return jsonify({
+                "error": f"武将 {replace} 不在队伍中"
+            }), 400
+        slot = team_heroes.index(replace)
+    
+    result = synergy_analyzer.rank_replacements(
+        team_heroes,
+        slot,
+        candidates=data.get('candidates'),
+        count=data.get('count')
+    )
+    if "error" in result:
+        return jsonify(result), 400
+    return jsonify(result)
+
 @api_bp.route('/announcements', methods=['GET'])
 def get_announcements():
     """获取游戏公告列表（支持分页和搜索）"""
@@ -271,28 +671,22 @@ def check_updates():
 @api_bp.route('/metadata', methods=['GET'])
 def get_metadata():
     """获取元数据（阵营、标签等）"""
-    # 获取所有武将数据
-    heroes = data_manager.get_heroes()
-    
-    # 收集所有阵营和标签
-    camps = set()
-    tags = set()
-    
-    for hero_info in heroes.values():
-        # 收集阵营
-        camp = hero_info.get("阵营", "")
-        if camp:
-            camps.add(camp)
-        
-        # 收集标签
-        hero_tags = hero_info.get("标签", [])
-        tags.update(hero_tags)
+    # 从二级索引中读取所有阵营和标签
+    camps = data_manager.get_hero_index_values("阵营")
+    tags = data_manager.get_hero_index_values("标签")
     
     return jsonify({
-        "camps": sorted(list(camps)),
-        "tags": sorted(list(tags))
+        "camps": sorted(camps),
+        "tags": sorted(tags)
     })
 
+@api_bp.route('/cache/stats', methods=['GET'])
+def get_cache_stats():
+    """获取武将、战法和协同评分缓存的命中统计"""
+    stats = data_manager.get_cache_stats()
+    stats.update(synergy_analyzer.get_cache_stats())
+    return jsonify(stats)
+
 @api_bp.route('/health', methods=['GET'])
 def health_check():
     """健康检查接口"""
@@ -8,8 +8,42 @@ class Config:
     # 数据文件路径
     DATA_FILE_PATH = 'data/consolidated_ocr_data.json'
     
+    # 数据文件的二进制快照（保存在数据文件旁，数据文件未变化时直接读取解析后的数据、索引和评分表）
+    DATA_SNAPSHOT = True
+    
+    # 战法更新写入数据文件旁的日志，累计到该条数后在后台合并到数据文件
+    JOURNAL_COMPACT_THRESHOLD = 100
+    
     # 静态资源路径
     ASSETS_PATH = 'assets/portraits/'
+    
+    # 精确队伍搜索的并行评分进程数（0表示在当前进程内评分）
+    PARALLEL_SCORING_WORKERS = 0
+    
+    # LRU缓存容量
+    HERO_CACHE_SIZE = 1000
+    SKILL_CACHE_SIZE = 1000
+    SCORE_CACHE_SIZE = 10000
+    
+    # 持久化协同评分存储（保存在数据文件所在目录）
+    PERSISTENT_SCORE_CACHE = False
+    SCORE_STORE_FILENAME = 'score_cache.sqlite3'
+    
+    # 全量队伍评分列式文件（由utils/build_score_columns.py生成，数据变化后在后台重新生成）
+    USE_SCORE_COLUMNS = False
+    SCORE_COLUMNS_DIR = 'data/score_columns'
+    
+    # 单武将、阵营、标签推荐的预计算排行榜（启动时构建，每个排行榜可查询的队伍数量）
+    USE_LEADERBOARDS = True
+    LEADERBOARD_SIZE = 50
+    
+    # 异步推荐任务的工作线程数和保留的已结束任务数量
+    JOB_WORKERS = 2
+    JOB_HISTORY_SIZE = 100
+    
+    # 批量推荐的最大查询数量和并行线程数（0表示CPU核数）
+    BATCH_MAX_QUERIES = 1000
+    BATCH_WORKERS = 0
 
 
 class DevelopmentConfig(Config):
@@ -0,0 +1,115 @@
+# 多样化队伍选择
+
+from typing import Iterator, List, Optional
+
+import numpy as np
+
+# 默认每名武将最多出现在几支推荐队伍中
+DEFAULT_MAX_HERO_REUSE = 2
+
+# 默认任意两支推荐队伍最多共有几名武将（1表示不允许两支队伍共用同一对武将）
+DEFAULT_MAX_SHARED_HEROES = 1
+
+# 第一批按评分排序的候选数量为count的倍数，不够时每批加倍
+INITIAL_BLOCK_FACTOR = 64
+
+
+def select_diverse_teams(
+    teams: np.ndarray,
+    scores: np.ndarray,
+    count: int,
+    hero_count: int,
+    max_hero_reuse: int = DEFAULT_MAX_HERO_REUSE,
+    max_shared_heroes: int = DEFAULT_MAX_SHARED_HEROES,
+    required: Optional[int] = None
+) -> List[int]:
+    """按评分从高到低贪心选择count支互不相似的队伍
+
+    每名武将最多出现在max_hero_reuse支队伍中；任意两支队伍最多共有
+    max_shared_heroes名武将。记录每名武将的使用次数和已使用的武将对，
+    判断一支队伍能否入选只需O(1)次查表，不需要与已选队伍逐一比较。
+    候选按评分分批部分排序，通常只需排序评分最高的一小部分。
+
+    Args:
+        teams: (N, 3)武将索引数组（按枚举顺序）
+        scores: 长度为N的评分数组
+        count: 选出的队伍数量
+        hero_count: 武将总数
+        max_hero_reuse: 每名武将最多出现的队伍数量
+        max_shared_heroes: 两支队伍最多共有的武将数量（0-2）
+        required: 每支队伍都包含的武将，不计入使用次数，也不计入两支队伍共有的武将
+
+    Returns:
+        入选队伍在teams中的下标，按评分从高到低（评分相同时按枚举顺序）
+    """
+    teams = np.asarray(teams, dtype=np.intp).reshape(-1, 3)
+    scores = np.asarray(scores, dtype=np.float64)
+    if count <= 0 or len(scores) == 0:
+        return []
+
+    hero_uses = np.zeros(hero_count, dtype=np.int32)
+    pair_used = np.zeros((hero_count, hero_count), dtype=bool)
+    # 必选武将不计入使用次数和武将对
+    exempt = np.zeros(hero_count, dtype=bool)
+    if required is not None:
+        exempt[required] = True
+
+    chosen = []
+    for block in _iter_descending(scores, max(count * INITIAL_BLOCK_FACTOR, 1)):
+        block_teams = teams[block]
+        # 按当前状态先向量化地排除已不可能入选的队伍，剩余的逐个判断
+        allowed = ((hero_uses[block_teams] < max_hero_reuse) | exempt[block_teams]).all(axis=1)
+        allowed &= ~_shares_too_many(block_teams, pair_used, hero_uses, exempt, max_shared_heroes)
+        for position in np.nonzero(allowed)[0].tolist():
+            team = block_teams[position]
+            if not _can_select(team, hero_uses, pair_used, exempt, max_hero_reuse, max_shared_heroes):
+                continue
+            chosen.append(int(block[position]))
+            for hero in team:
+                if not exempt[hero]:
+                    hero_uses[hero] += 1
+            for x, y in ((team[0], team[1]), (team[0], team[2]), (team[1], team[2])):
+                # 包含必选武将的武将对不记录，必选武将与其他武将的组合不受限制
+                if not exempt[x] and not exempt[y]:
+                    pair_used[x, y] = pair_used[y, x] = True
+            if len(chosen) == count:
+                return chosen
+    return chosen
+
+
+def _can_select(team, hero_uses, pair_used, exempt, max_hero_reuse, max_shared_heroes) -> bool:
+    for hero in team:
+        if not exempt[hero] and hero_uses[hero] >= max_hero_reuse:
+            return False
+    return not _shares_too_many(team.reshape(1, 3), pair_used, hero_uses, exempt, max_shared_heroes)[0]
+
+
+def _shares_too_many(teams, pair_used, hero_uses, exempt, max_shared_heroes) -> np.ndarray:
+    """队伍是否与某支已选队伍共有超过max_shared_heroes名武将（不计必选武将）"""
+    if max_shared_heroes >= 2:
+        return np.zeros(len(teams), dtype=bool)
+    if max_shared_heroes <= 0:
+        # 不允许共有武将：除必选武将外的武将都不能已被使用
+        return ((hero_uses[teams] > 0) & ~exempt[teams]).any(axis=1)
+    a, b, c = teams[:, 0], teams[:, 1], teams[:, 2]
+    return pair_used[a, b] | pair_used[a, c] | pair_used[b, c]
+
+
+def _iter_descending(scores: np.ndarray, block_size: int) -> Iterator[np.ndarray]:
+    """分批生成按评分从高到低（评分相同时按下标）排列的下标
+
+    每批用np.partition找出剩余候选中评分最高的block_size个（包括与边界
+    同分的全部候选），只对这一批排序，下一批的大小加倍。
+    """
+    remaining = np.arange(len(scores))
+    while len(remaining):
+        remaining_scores = scores[remaining]
+        if len(remaining) > block_size:
+            threshold = np.partition(remaining_scores, len(remaining) - block_size)[len(remaining) - block_size]
+            in_block = remaining_scores >= threshold
+        else:
+            in_block = np.ones(len(remaining), dtype=bool)
+        block = remaining[in_block]
+        yield block[np.argsort(-scores[block], kind="stable")]
+        remaining = remaining[~in_block]
+        block_size *= 2
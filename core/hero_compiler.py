@@ -0,0 +1,175 @@
+# 武将数据编译器
+
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from core.synergy_analyzer import (
+    DEFAULT_SKILL_SYNERGY,
+    FITNESS_VALUES,
+    SKILL_SYNERGY_RULES,
+    TAG_SYNERGY_VALUES,
+    TROOP_ADVANTAGE,
+)
+
+# 战法详情缺少类型时使用的类型名称
+UNKNOWN_SKILL_TYPE = "未知"
+
+
+class HeroRecord(NamedTuple):
+    """编译后的武将记录，所有字段均为整数编码"""
+    index: int                          # 武将在get_all_hero_names()中的位置
+    tag_ids: Tuple[int, ...]            # 去重后的标签编号
+    tag_mask: int                       # 标签位掩码
+    tag_count: int                      # 标签数量（含重复）
+    troop_grades: Tuple[int, ...]       # 各兵种适性等级编号，-1表示没有该兵种
+    troop_mask: int                     # 拥有兵种的位掩码
+    troop_count: int                    # 兵种数量
+    fitness_sum: int                    # 兵种适性等级值之和
+    s_count: int                        # S级兵种数量
+    advantage_targets: Tuple[int, ...]  # 每个拥有的兵种所克制的兵种编号
+    camp_id: int                        # 阵营编号，-1表示没有阵营
+    skill_types: Tuple[int, ...]        # 自带战法、传承战法的类型编号（仅包含能找到的战法）
+    skill_ids: Tuple[int, ...]          # 与skill_types对应的战法编号（在get_all_skill_names()中的位置）
+    inherited_skill_id: int             # 传承战法编号，-1表示没有或找不到
+
+
+class CompiledHeroes:
+    """编译后的武将数据和规则查找表
+
+    把consolidated_ocr_data.json中以中文键嵌套的武将、战法数据编译为整数
+    编码的HeroRecord，把标签协同、战法协同等规则字典编译为查找矩阵。
+    协同评分热路径只读取这些记录，无需再访问嵌套字典或按名称查询战法。
+    """
+
+    def __init__(self, data_manager):
+        self.data_version = getattr(data_manager, "data_version", 0)
+        self.hero_names = data_manager.get_all_hero_names()
+        self.skill_names = data_manager.get_all_skill_names()
+        self.skill_ids = {name: i for i, name in enumerate(self.skill_names)}
+        heroes_info = [data_manager.get_hero_by_name(name) for name in self.hero_names]
+
+        # 词表：标签词表包含规则中出现的标签，保证规则矩阵覆盖所有组合
+        self.tag_vocab = _build_vocab(
+            [tag for info in heroes_info if info for tag in info.get("标签", [])] +
+            [tag for pair in TAG_SYNERGY_VALUES for tag in pair])
+        self.troop_vocab = _build_vocab(
+            [troop for info in heroes_info if info for troop in info.get("兵种", {})] +
+            list(TROOP_ADVANTAGE) + list(TROOP_ADVANTAGE.values()))
+        self.grade_vocab = _build_vocab(
+            list(FITNESS_VALUES) +
+            [grade for info in heroes_info if info for grade in info.get("兵种", {}).values()])
+        self.camp_vocab = _build_vocab(
+            [info.get("阵营", "") for info in heroes_info if info and info.get("阵营", "")])
+
+        hero_skills = [self._resolve_skills(data_manager, name, info) if info else []
+                       for name, info in zip(self.hero_names, heroes_info)]
+        self.skill_type_vocab = _build_vocab(
+            [skill.get("类型", UNKNOWN_SKILL_TYPE) for skills in hero_skills for _, skill in skills] +
+            [skill_type for pair in SKILL_SYNERGY_RULES for skill_type in pair])
+
+        self.tag_ids = {tag: i for i, tag in enumerate(self.tag_vocab)}
+        self.troop_ids = {troop: i for i, troop in enumerate(self.troop_vocab)}
+        self.grade_ids = {grade: i for i, grade in enumerate(self.grade_vocab)}
+        self.camp_ids = {camp: i for i, camp in enumerate(self.camp_vocab)}
+        self.skill_type_ids = {skill_type: i for i, skill_type in enumerate(self.skill_type_vocab)}
+
+        # 规则查找表
+        self.tag_synergy_matrix = _build_rule_matrix(self.tag_vocab, TAG_SYNERGY_VALUES, 0)
+        self.skill_synergy_matrix = _build_rule_matrix(
+            self.skill_type_vocab, SKILL_SYNERGY_RULES, DEFAULT_SKILL_SYNERGY)
+        self.grade_values = tuple(FITNESS_VALUES.get(grade, 0) for grade in self.grade_vocab)
+        self.advantage_target = tuple(
+            self.troop_ids[TROOP_ADVANTAGE[troop]] if troop in TROOP_ADVANTAGE else -1
+            for troop in self.troop_vocab)
+
+        # 编译武将记录，数据为空的武将记为None（与get_hero_by_name返回空值时的处理一致）
+        self.records: List[Optional[HeroRecord]] = [
+            self._compile_hero(i, info, hero_skills[i]) if info else None
+            for i, info in enumerate(heroes_info)
+        ]
+        self.records_by_name: Dict[str, Optional[HeroRecord]] = dict(zip(self.hero_names, self.records))
+
+    def __len__(self):
+        return len(self.hero_names)
+
+    def get(self, hero_name: str) -> Optional[HeroRecord]:
+        """按名称获取编译后的武将记录"""
+        return self.records_by_name.get(hero_name)
+
+    @staticmethod
+    def _resolve_skills(data_manager, hero_name, hero_info):
+        """按自带战法、传承战法的顺序读取武将关系图中已解析的战法，返回[((战法字段, 战法名称), 战法详情)]"""
+        return [((skill_key, skill_name), skill_detail)
+                for skill_key, skill_name, skill_detail in data_manager.get_hero_skills(hero_name, hero_info)]
+
+    def _compile_hero(self, index, hero_info, skills) -> HeroRecord:
+        tags = hero_info.get("标签", [])
+        tag_ids = tuple(sorted({self.tag_ids[tag] for tag in tags}))
+        tag_mask = 0
+        for tag_id in tag_ids:
+            tag_mask |= 1 << tag_id
+
+        troops = hero_info.get("兵种", {})
+        troop_grades = [-1] * len(self.troop_vocab)
+        troop_mask = 0
+        fitness_sum = 0
+        s_count = 0
+        advantage_targets = []
+        for troop_type, fitness in troops.items():
+            troop_id = self.troop_ids[troop_type]
+            grade_id = self.grade_ids[fitness]
+            troop_grades[troop_id] = grade_id
+            troop_mask |= 1 << troop_id
+            fitness_sum += self.grade_values[grade_id]
+            if fitness == "S":
+                s_count += 1
+            if self.advantage_target[troop_id] >= 0:
+                advantage_targets.append(self.advantage_target[troop_id])
+
+        camp = hero_info.get("阵营", "")
+        skill_types = tuple(
+            self.skill_type_ids[skill.get("类型", UNKNOWN_SKILL_TYPE)] for _, skill in skills)
+        skill_ids = tuple(self.skill_ids.get(skill_name, -1) for (_, skill_name), _ in skills)
+        inherited_skill_id = next(
+            (self.skill_ids.get(skill_name, -1) for (skill_key, skill_name), _ in skills
+             if skill_key == "传承战法"), -1)
+
+        return HeroRecord(
+            index=index,
+            tag_ids=tag_ids,
+            tag_mask=tag_mask,
+            tag_count=len(tags),
+            troop_grades=tuple(troop_grades),
+            troop_mask=troop_mask,
+            troop_count=len(troops),
+            fitness_sum=fitness_sum,
+            s_count=s_count,
+            advantage_targets=tuple(advantage_targets),
+            camp_id=self.camp_ids.get(camp, -1) if camp else -1,
+            skill_types=skill_types,
+            skill_ids=skill_ids,
+            inherited_skill_id=inherited_skill_id,
+        )
+
+
+def _build_vocab(values) -> List[str]:
+    """按首次出现的顺序去重，生成词表"""
+    return list(dict.fromkeys(values))
+
+
+def _build_rule_matrix(vocab, rules, default) -> Tuple[Tuple[int, ...], ...]:
+    """把成对规则字典编译为查找矩阵
+
+    与规则字典的查询顺序一致：先查(a, b)，再查(b, a)，都没有时取默认值。
+    """
+    matrix = []
+    for a in vocab:
+        row = []
+        for b in vocab:
+            if (a, b) in rules:
+                row.append(rules[(a, b)])
+            elif (b, a) in rules:
+                row.append(rules[(b, a)])
+            else:
+                row.append(default)
+        matrix.append(tuple(row))
+    return tuple(matrix)
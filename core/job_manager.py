@@ -0,0 +1,166 @@
+# 异步任务管理
+
+import itertools
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+# 任务状态
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+
+FINISHED_STATES = (JOB_DONE, JOB_FAILED, JOB_CANCELLED)
+
+
+class JobCancelled(Exception):
+    """任务被取消时由进度回调抛出，中断正在进行的搜索"""
+
+
+class Job:
+    """一个异步任务：记录状态、进度和结果
+
+    任务函数接收Job实例作为第一个参数，通过report_progress报告进度；
+    任务被取消后下一次报告进度时抛出JobCancelled。
+    """
+
+    def __init__(self, job_id: str, kind: str):
+        self.job_id = job_id
+        self.kind = kind
+        self.state = JOB_PENDING
+        self.done_count = 0
+        self.total_count = 0
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.future = None
+        self._cancel_event = threading.Event()
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel_event.is_set()
+
+    @property
+    def finished(self) -> bool:
+        return self.state in FINISHED_STATES
+
+    def report_progress(self, done_count: int, total_count: int) -> None:
+        """报告进度（已评分队伍数/队伍总数），任务已被取消时抛出JobCancelled"""
+        self.done_count = done_count
+        self.total_count = total_count
+        if self._cancel_event.is_set():
+            raise JobCancelled()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """任务状态摘要（不含结果）"""
+        progress = None
+        if self.total_count:
+            progress = round(min(self.done_count / self.total_count, 1.0), 4)
+        if self.state == JOB_DONE:
+            progress = 1.0
+        return {
+            "job_id": self.job_id,
+            "kind": self.kind,
+            "state": self.state,
+            "scored": self.done_count,
+            "total": self.total_count,
+            "progress": progress,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at
+        }
+
+
+class JobManager:
+    """在本地线程池中执行长时间的推荐任务
+
+    提交后立即返回任务编号，调用方轮询进度并在完成后读取结果。只保留最近
+    history_size个已结束的任务，超出时丢弃最早结束的任务。
+    """
+
+    def __init__(self, max_workers: int = 2, history_size: int = 100):
+        self.max_workers = max_workers
+        self.history_size = history_size
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._sequence = itertools.count(1)
+
+    def submit(self, kind: str, func: Callable[..., Any], *args, **kwargs) -> Job:
+        """提交任务，func(job, *args, **kwargs)的返回值作为任务结果"""
+        job = Job(f"{next(self._sequence)}-{uuid.uuid4().hex[:12]}", kind)
+        with self._lock:
+            self._jobs[job.job_id] = job
+            self._trim_locked()
+        job.future = self._executor.submit(self._run, job, func, args, kwargs)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """取消任务：尚未开始的任务直接取消，运行中的任务在下一次报告进度时中断"""
+        job = self.get(job_id)
+        if job is None or job.finished:
+            return job
+        job._cancel_event.set()
+        if job.future is not None and job.future.cancel():
+            self._finish(job, JOB_CANCELLED)
+        return job
+
+    def shutdown(self, wait: bool = True) -> None:
+        """取消所有未结束的任务并关闭线程池"""
+        with self._lock:
+            jobs = list(self._jobs.values())
+        for job in jobs:
+            if not job.finished:
+                self.cancel(job.job_id)
+        self._executor.shutdown(wait=wait)
+
+    def stats(self) -> Dict[str, int]:
+        """各状态的任务数量"""
+        with self._lock:
+            counts = {state: 0 for state in (JOB_PENDING, JOB_RUNNING) + FINISHED_STATES}
+            for job in self._jobs.values():
+                counts[job.state] += 1
+        return counts
+
+    def _run(self, job: Job, func, args, kwargs):
+        if job.cancel_requested:
+            self._finish(job, JOB_CANCELLED)
+            return
+        job.state = JOB_RUNNING
+        job.started_at = time.time()
+        try:
+            job.result = func(job, *args, **kwargs)
+        except JobCancelled:
+            self._finish(job, JOB_CANCELLED)
+        except Exception as e:
+            job.error = str(e)
+            self._finish(job, JOB_FAILED)
+        else:
+            # 任务完成时已请求取消的结果仍然有效，按完成处理
+            self._finish(job, JOB_DONE)
+
+    def _finish(self, job: Job, state: str):
+        with self._lock:
+            if job.finished:
+                return
+            job.finished_at = time.time()
+            job.state = state
+            self._trim_locked()
+
+    def _trim_locked(self):
+        """已结束的任务超过history_size时丢弃最早提交的那些"""
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(len(finished) - self.history_size, 0)]:
+            del self._jobs[job_id]
@@ -0,0 +1,237 @@
+# 预计算排行榜
+
+import threading
+from typing import Dict, Iterable, List, Optional, Set
+
+import numpy as np
+
+# 每个排行榜保存的队伍数量为可查询数量的倍数，增量更新移除队伍后仍有余量
+LEADERBOARD_DEPTH_FACTOR = 2
+
+
+class Leaderboard:
+    """单个排行榜：候选武将空间内评分最高的若干支队伍
+
+    指定required时队伍为(required, b, c)，否则为(a, b, c)，b、c等按武将
+    索引升序排列。每支队伍带有枚举顺序键，评分相同的队伍按键排列，与
+    SynergyTables.top_k的结果顺序一致。
+    """
+
+    def __init__(self, candidates: np.ndarray, required: Optional[int], depth: int, hero_count: int):
+        self.required = required
+        self.candidates = np.asarray(candidates, dtype=np.intp)
+        if required is not None:
+            self.candidates = self.candidates[self.candidates != required]
+        self.depth = depth
+        self.hero_count = hero_count
+        m = len(self.candidates)
+        self.space_size = m * (m - 1) // 2 if required is not None else m * (m - 1) * (m - 2) // 6
+        self.teams = np.empty((0, 3), dtype=np.intp)
+        self.scores = np.empty(0, dtype=np.float64)
+        self.keys = np.empty(0, dtype=np.int64)
+
+    @property
+    def complete(self) -> bool:
+        """排行榜是否包含候选空间内的全部队伍"""
+        return self.space_size <= self.depth
+
+    def rebuild(self, tables) -> None:
+        """重新搜索候选空间内评分最高的depth支队伍"""
+        top_teams = tables.top_k(self.depth, candidates=self.candidates, required=self.required)
+        self.teams = np.array([team for team, _ in top_teams], dtype=np.intp).reshape(-1, 3)
+        self.scores = np.array([score for _, score in top_teams], dtype=np.float64)
+        self.keys = self._team_keys(self.teams)
+
+    def update(self, tables, affected: np.ndarray, min_size: int) -> None:
+        """只为包含受影响武将的队伍重新评分，并与其余队伍合并
+
+        其余队伍的评分不变，排行榜中保留的部分就是它们的前若干名。排行榜
+        原本被截断时，合并结果只在最后一支保留队伍之前是准确的，剩余队伍
+        不足min_size时重新搜索整个候选空间。
+        """
+        if self.required is not None and affected[self.required]:
+            self.rebuild(tables)
+            return
+        affected_candidates = self.candidates[affected[self.candidates]]
+        if len(affected_candidates) == 0:
+            return
+
+        keep = ~affected[self.teams].any(axis=1)
+        if not self.complete and not keep.any():
+            self.rebuild(tables)
+            return
+
+        new_teams = self._teams_containing(affected_candidates, affected)
+        new_scores = tables.score_teams(new_teams) if len(new_teams) else np.empty(0, dtype=np.float64)
+        teams = np.concatenate([self.teams[keep], new_teams])
+        scores = np.concatenate([self.scores[keep], new_scores])
+        keys = np.concatenate([self.keys[keep], self._team_keys(new_teams)])
+        order = np.lexsort((keys, -scores))
+        teams, scores, keys = teams[order], scores[order], keys[order]
+
+        limit = self.depth
+        if not self.complete:
+            # 最后一支保留队伍之后可能缺少未重新评分的队伍
+            kept_positions = np.nonzero(order < keep.sum())[0]
+            limit = min(limit, int(kept_positions[-1]) + 1)
+        self.teams, self.scores, self.keys = teams[:limit], scores[:limit], keys[:limit]
+        if not self.complete and len(self.scores) < min_size:
+            self.rebuild(tables)
+
+    def top(self, count: int) -> Optional[List[tuple]]:
+        """读取前count名，排行榜中的队伍不足且不完整时返回None"""
+        if count > len(self.scores) and not self.complete:
+            return None
+        return [(tuple(int(i) for i in team), float(score))
+                for team, score in zip(self.teams[:count], self.scores[:count])]
+
+    def _team_keys(self, teams: np.ndarray) -> np.ndarray:
+        """队伍的枚举顺序键"""
+        n = self.hero_count
+        teams = teams.astype(np.int64)
+        if self.required is not None:
+            return teams[:, 1] * n + teams[:, 2]
+        return (teams[:, 0] * n + teams[:, 1]) * n + teams[:, 2]
+
+    def _teams_containing(self, affected_candidates: np.ndarray, affected: np.ndarray) -> np.ndarray:
+        """生成候选空间内包含受影响武将的所有队伍（每支队伍只生成一次）"""
+        team_chunks = []
+        for x in affected_candidates.tolist():
+            # 按队伍中索引最小的受影响武将归属，避免重复生成
+            others = self.candidates[(self.candidates != x) &
+                                     ~(affected[self.candidates] & (self.candidates < x))]
+            if self.required is not None:
+                teams = np.empty((len(others), 3), dtype=np.intp)
+                teams[:, 0] = self.required
+                teams[:, 1] = np.minimum(others, x)
+                teams[:, 2] = np.maximum(others, x)
+            else:
+                first, second = np.triu_indices(len(others), k=1)
+                teams = np.sort(np.stack([np.full(len(first), x), others[first], others[second]], axis=1), axis=1)
+            team_chunks.append(teams)
+        if not team_chunks:
+            return np.empty((0, 3), dtype=np.intp)
+        return np.concatenate(team_chunks).astype(np.intp)
+
+
+class Leaderboards:
+    """每个武将、阵营和标签的预计算排行榜
+
+    数据加载后一次性构建，查询时只需读取前K名。战法更新后只为包含使用该
+    战法武将的队伍重新评分；其他方式的数据变化在下次查询时完整重建。
+    """
+
+    def __init__(self, data_manager, synergy_analyzer, size: int = 50):
+        self.data_manager = data_manager
+        self.synergy_analyzer = synergy_analyzer
+        self.size = size
+        self.data_version = None
+        self.hero_boards: Dict[str, Leaderboard] = {}
+        self.camp_boards: Dict[str, Leaderboard] = {}
+        self.tag_boards: Dict[str, Leaderboard] = {}
+        self._lock = threading.RLock()
+
+    def build(self) -> None:
+        """完整构建所有排行榜"""
+        with self._lock:
+            tables = self.synergy_analyzer.get_synergy_tables()
+            # 数据文件未变化时直接读取快照中的排行榜
+            artifact_name = ("leaderboards", self.size)
+            boards = self.synergy_analyzer.load_snapshot_artifact(artifact_name)
+            if boards is not None:
+                self.hero_boards, self.camp_boards, self.tag_boards = boards
+                self.data_version = tables.data_version
+                return
+            hero_names = tables.hero_names
+            hero_count = len(hero_names)
+            depth = self.size * LEADERBOARD_DEPTH_FACTOR
+
+            camp_heroes: Dict[str, List[int]] = {}
+            tag_heroes: Dict[str, List[int]] = {}
+            for index, hero_name in enumerate(hero_names):
+                hero_info = self.data_manager.get_hero_by_name(hero_name)
+                if not hero_info:
+                    continue
+                camp = hero_info.get("阵营")
+                if camp:
+                    camp_heroes.setdefault(camp, []).append(index)
+                for tag in dict.fromkeys(hero_info.get("标签", [])):
+                    tag_heroes.setdefault(tag, []).append(index)
+
+            all_heroes = np.arange(hero_count)
+            self.hero_boards = {
+                hero_name: Leaderboard(all_heroes, index, depth, hero_count)
+                for index, hero_name in enumerate(hero_names)
+            }
+            self.camp_boards = {
+                camp: Leaderboard(heroes, None, depth, hero_count) for camp, heroes in camp_heroes.items()
+            }
+            self.tag_boards = {
+                tag: Leaderboard(heroes, None, depth, hero_count) for tag, heroes in tag_heroes.items()
+            }
+            for board in self._all_boards():
+                board.rebuild(tables)
+            self.data_version = tables.data_version
+            self.synergy_analyzer.save_snapshot_artifact(
+                artifact_name, (self.hero_boards, self.camp_boards, self.tag_boards))
+
+    def apply_skill_update(self, skill_name: str) -> None:
+        """战法更新后增量更新排行榜：只重新评分包含使用该战法的武将的队伍"""
+        with self._lock:
+            tables = self.synergy_analyzer.get_synergy_tables()
+            # 未构建或期间还有其他数据变化时完整重建
+            if self.data_version is None or tables.data_version != self.data_version + 1:
+                self.build()
+                return
+            affected_heroes = self._heroes_with_skills([skill_name])
+            affected = np.zeros(len(tables), dtype=bool)
+            affected[[tables.hero_index[name] for name in affected_heroes]] = True
+            if affected.any():
+                for board in self._all_boards():
+                    board.update(tables, affected, self.size)
+            self.data_version = tables.data_version
+
+    def top_for_hero(self, hero_name: str, count: int) -> Optional[List[Dict]]:
+        """读取包含指定武将的前count支队伍，无法从排行榜回答时返回None"""
+        return self._read(self.hero_boards, hero_name, count)
+
+    def top_for_camp(self, camp: str, count: int) -> Optional[List[Dict]]:
+        """读取指定阵营的前count支队伍，无法从排行榜回答时返回None"""
+        return self._read(self.camp_boards, camp, count)
+
+    def top_for_tag(self, tag: str, count: int) -> Optional[List[Dict]]:
+        """读取包含指定标签的前count支队伍，无法从排行榜回答时返回None"""
+        return self._read(self.tag_boards, tag, count)
+
+    def _read(self, boards: Dict[str, Leaderboard], key: str, count: int) -> Optional[List[Dict]]:
+        with self._lock:
+            # 数据发生了未经增量更新的变化时完整重建
+            if self.data_version != getattr(self.data_manager, "data_version", 0):
+                self.build()
+            board = boards.get(key)
+            if board is None:
+                return None
+            top_teams = board.top(count)
+            if top_teams is None:
+                return None
+            hero_names = self.synergy_analyzer.get_synergy_tables().hero_names
+            return [
+                {
+                    "队伍": [hero_names[i] for i in team],
+                    "评分": score
+                }
+                for team, score in top_teams
+            ]
+
+    def _all_boards(self) -> Iterable[Leaderboard]:
+        yield from self.hero_boards.values()
+        yield from self.camp_boards.values()
+        yield from self.tag_boards.values()
+
+    def _heroes_with_skills(self, skill_names: Iterable[str]) -> Set[str]:
+        """查找自带战法或传承战法属于skill_names的武将"""
+        skill_names = set(skill_names)
+        return {
+            hero_name for hero_name, hero_info in self.data_manager.get_heroes().items()
+            if hero_info.get("自带战法") in skill_names or hero_info.get("传承战法") in skill_names
+        }
@@ -0,0 +1,127 @@
+# 多队伍阵容分配
+
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from core.synergy_tables import iter_team_chunks
+
+# 默认最多展开的搜索节点数量，超出时返回已找到的最好方案
+DEFAULT_NODE_BUDGET = 200000
+
+
+def allocate_disjoint_teams(
+    tables,
+    candidates: Sequence[int],
+    team_count: int = 5,
+    node_budget: int = DEFAULT_NODE_BUDGET
+) -> Dict[str, Any]:
+    """从候选武将中选出team_count支互不重复的三人队伍，使总评分最高
+
+    先为候选武将的所有三人组合评分并按评分从高到低排序，以贪心方案作为
+    初始下界，再深度优先地分支定界：每个节点只保留与已选武将不冲突的队伍，
+    剩余队伍中评分最高的若干支之和作为上界。评分转换为整数（单位0.01）累加，
+    避免浮点误差影响比较。
+
+    Args:
+        tables: SynergyTables实例
+        candidates: 候选武将索引（按枚举顺序）
+        team_count: 队伍数量，候选武将不足时自动减少
+        node_budget: 最多展开的搜索节点数量
+
+    Returns:
+        {"teams": [(武将索引三元组, 评分)], "total": 总评分, "optimal": 是否已证明最优, "nodes": 展开的节点数}
+    """
+    candidates = np.asarray(candidates, dtype=np.intp)
+    team_count = max(0, min(team_count, len(candidates) // 3))
+    if team_count == 0:
+        return {"teams": [], "total": 0.0, "optimal": True, "nodes": 0}
+
+    team_chunks = list(iter_team_chunks(candidates))
+    teams = np.concatenate(team_chunks)
+    scores = tables.score_teams(teams)
+    order = np.argsort(-scores, kind="stable")
+    teams = teams[order]
+    points = np.rint(scores[order] * 100).astype(np.int64)
+
+    search = _DisjointTeamSearch(teams, points, team_count, len(tables), node_budget)
+    search.run()
+
+    chosen = [(tuple(int(i) for i in teams[j]), float(points[j]) / 100) for j in search.best]
+    return {
+        "teams": chosen,
+        "total": round(search.best_points / 100, 2),
+        "optimal": not search.exhausted,
+        "nodes": search.nodes
+    }
+
+
+class _DisjointTeamSearch:
+    """互不重复队伍组合的分支定界搜索"""
+
+    def __init__(self, teams: np.ndarray, points: np.ndarray, team_count: int, hero_count: int, node_budget: int):
+        self.teams = teams
+        self.points = points
+        self.team_count = team_count
+        self.node_budget = node_budget
+        self.used = np.zeros(hero_count, dtype=bool)
+        self.nodes = 0
+        self.exhausted = False
+        self.best: List[int] = []
+        self.best_points = -1
+
+    def run(self):
+        self._greedy()
+        self._search(np.arange(len(self.teams)), [], 0)
+
+    def _greedy(self):
+        """按评分从高到低贪心选择不冲突的队伍，作为初始下界"""
+        used = np.zeros_like(self.used)
+        chosen = []
+        for j in range(len(self.teams)):
+            if not used[self.teams[j]].any():
+                chosen.append(j)
+                used[self.teams[j]] = True
+                if len(chosen) == self.team_count:
+                    break
+        self._record(chosen)
+
+    def _record(self, chosen):
+        total = int(self.points[chosen].sum()) if chosen else 0
+        if len(chosen) == self.team_count and total > self.best_points:
+            self.best = list(chosen)
+            self.best_points = total
+
+    def _search(self, available: np.ndarray, chosen: List[int], current: int):
+        remaining = self.team_count - len(chosen)
+        if remaining == 0:
+            self._record(chosen)
+            return
+
+        available_points = self.points[available]
+        # window_sums[j]为从第j支可选队伍起评分最高的remaining支之和（队伍已按评分降序排列）
+        cumulative = np.concatenate([[0], np.cumsum(available_points)])
+        stop = len(available) - remaining + 1
+        if stop <= 0:
+            return
+        window_sums = cumulative[remaining:remaining + stop] - cumulative[:stop]
+
+        for position in range(stop):
+            if current + window_sums[position] <= self.best_points:
+                break
+            if self.nodes >= self.node_budget:
+                self.exhausted = True
+                return
+            self.nodes += 1
+
+            team_index = available[position]
+            team = self.teams[team_index]
+            self.used[team] = True
+            rest = available[position + 1:]
+            rest = rest[~self.used[self.teams[rest]].any(axis=1)]
+            chosen.append(team_index)
+            self._search(rest, chosen, current + int(self.points[team_index]))
+            chosen.pop()
+            self.used[team] = False
+            if self.exhausted:
+                return
@@ -0,0 +1,71 @@
+# LRU缓存
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable
+
+# 缓存未命中时的默认返回值（缓存的值本身可以是None）
+MISSING = object()
+
+
+class LRUCache:
+    """线程安全的LRU缓存
+
+    查询和写入均为O(1)：命中的键移到末尾，缓存满时逐个淘汰最久未使用的键。
+    同时统计命中、未命中和淘汰次数。
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max(int(max_size), 0)
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        """获取缓存值，未命中时返回default"""
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """写入缓存值，缓存已满时淘汰最久未使用的键"""
+        if self.max_size == 0:
+            return
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+            self._data[key] = value
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """清空缓存（保留统计数据）"""
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """获取缓存统计信息"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
@@ -0,0 +1,163 @@
+# 多进程并行队伍评分
+
+import atexit
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.synergy_tables import SynergyTables, select_top_k
+
+# 每个工作进程分到的分片数量，分片越多负载越均衡
+SHARDS_PER_WORKER = 4
+
+# 工作进程中由共享内存重建的分解表
+_worker_tables = None
+_worker_blocks = []
+
+
+class SharedTables:
+    """把协同评分分解表的数组放入共享内存
+
+    工作进程只需按名称挂载共享内存块，无需各自反序列化DataManager.data或
+    重新构建分解表。
+    """
+
+    def __init__(self, tables: SynergyTables):
+        self.hero_names = list(tables.hero_names)
+        self.data_version = tables.data_version
+        self.specs = []
+        self._blocks = []
+        for name, array in tables.to_arrays().items():
+            array = np.ascontiguousarray(array)
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            view = np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)
+            view[...] = array
+            self._blocks.append(block)
+            self.specs.append((name, block.name, array.shape, array.dtype.str))
+
+    def close(self):
+        """释放共享内存"""
+        for block in self._blocks:
+            block.close()
+            try:
+                block.unlink()
+            except FileNotFoundError:
+                pass
+        self._blocks = []
+
+
+def _attach_shared_tables(hero_names, specs, data_version):
+    """工作进程初始化：挂载共享内存中的分解表"""
+    global _worker_tables, _worker_blocks
+    arrays = {}
+    blocks = []
+    for name, block_name, shape, dtype in specs:
+        # 进程池的工作进程与主进程共用资源跟踪器，共享内存由主进程负责释放
+        block = shared_memory.SharedMemory(name=block_name)
+        blocks.append(block)
+        arrays[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+    _worker_blocks = blocks
+    _worker_tables = SynergyTables.from_arrays(hero_names, arrays, data_version)
+
+
+def _score_shard(count, candidates, required, first_range):
+    """在工作进程中为一个分片搜索局部前count名"""
+    return _worker_tables.top_k(count, candidates=candidates, required=required,
+                                first_range=first_range)
+
+
+class ParallelScorer:
+    """多进程并行的精确队伍搜索
+
+    按首位可变武将把候选队伍空间切分为多个分片，由进程池并行评分，每个
+    分片返回局部前K名，最后在主进程中合并。分片按枚举顺序合并，评分相同的
+    队伍顺序与单进程的SynergyTables.top_k一致。
+    """
+
+    def __init__(self, synergy_analyzer, workers: Optional[int] = None):
+        self.synergy_analyzer = synergy_analyzer
+        self.workers = workers or os.cpu_count() or 1
+        self._executor = None
+        self._shared = None
+        atexit.register(self.close)
+
+    def _get_executor(self, tables):
+        """获取进程池，分解表更新后重新共享并重建进程池"""
+        if self._shared is not None and self._shared.data_version == tables.data_version:
+            return self._executor
+        self.close()
+        self._shared = SharedTables(tables)
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_attach_shared_tables,
+            initargs=(self._shared.hero_names, self._shared.specs, self._shared.data_version)
+        )
+        return self._executor
+
+    def close(self):
+        """关闭进程池并释放共享内存"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        if self._shared is not None:
+            self._shared.close()
+            self._shared = None
+
+    def top_k(
+        self,
+        count: int,
+        candidates: Optional[Sequence[int]] = None,
+        required: Optional[int] = None
+    ) -> List[Tuple[Tuple[int, int, int], float]]:
+        """并行精确搜索评分最高的count支三人队伍，参数与SynergyTables.top_k相同"""
+        tables = self.synergy_analyzer.get_synergy_tables()
+        if count <= 0:
+            return []
+        if candidates is None:
+            candidates = range(len(tables))
+        candidates = np.asarray(candidates, dtype=np.intp)
+        if required is not None:
+            candidates = candidates[candidates != required]
+
+        shards = _split_shards(len(candidates), required is not None,
+                               self.workers * SHARDS_PER_WORKER)
+        executor = self._get_executor(tables)
+        futures = [
+            executor.submit(_score_shard, count, candidates, required, shard)
+            for shard in shards
+        ]
+
+        # 按分片顺序合并，稳定排序保证同分队伍保持枚举顺序
+        merged = [team for future in futures for team in future.result()]
+        if not merged:
+            return []
+        teams = np.array([team for team, _ in merged], dtype=np.intp)
+        scores = np.array([score for _, score in merged], dtype=np.float64)
+        teams, scores = select_top_k(teams, scores, count)
+        return [(tuple(int(i) for i in team), float(score))
+                for team, score in zip(teams, scores)]
+
+
+def _split_shards(n: int, has_required: bool, shard_count: int) -> List[Tuple[int, int]]:
+    """按队伍数量把首位可变武将的位置范围切分为大致均衡的分片
+
+    不指定必选武将时，首位为a的队伍数量为C(n-a-1, 2)；指定时首位为b的
+    队伍数量为n-b-1。
+    """
+    positions = np.arange(n)
+    if has_required:
+        weights = np.maximum(n - positions - 1, 0)
+    else:
+        remaining = np.maximum(n - positions - 1, 0)
+        weights = remaining * (remaining - 1) // 2
+    total = int(weights.sum())
+    if total == 0:
+        return []
+
+    shard_count = max(1, min(shard_count, n))
+    boundaries = np.searchsorted(np.cumsum(weights), np.linspace(0, total, shard_count + 1)[1:-1], side="right")
+    edges = [0] + sorted(set(int(b) for b in boundaries)) + [n]
+    return [(start, stop) for start, stop in zip(edges[:-1], edges[1:]) if start < stop]
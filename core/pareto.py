@@ -0,0 +1,99 @@
+# 多目标帕累托前沿
+
+from typing import Any, Dict
+
+import numpy as np
+
+# 估算输出时武将的等级
+DAMAGE_ESTIMATE_LEVEL = 50
+
+# 逐块过滤时第一块的大小，之后每块加倍
+INITIAL_BLOCK_SIZE = 256
+MAX_BLOCK_SIZE = 8192
+
+
+def estimate_hero_damage(hero_info: Dict[str, Any], level: int = DAMAGE_ESTIMATE_LEVEL) -> float:
+    """估算武将的输出能力：指定等级下武力和智力中较高的一项
+
+    属性按 base + growth × (等级 - 1) 计算，武力对应兵刃伤害，智力对应谋略伤害。
+    """
+    attributes = hero_info.get("属性", {})
+    values = []
+    for name in ("武力", "智力"):
+        attribute = attributes.get(name) or {}
+        values.append(attribute.get("base", 0) + attribute.get("growth", 0) * (level - 1))
+    return float(max(values))
+
+
+def pareto_front(objectives: np.ndarray) -> np.ndarray:
+    """计算(N, D)目标矩阵（各目标越大越好）的帕累托前沿
+
+    1. 前D-1个目标完全相同的点中只有最后一个目标最大的点可能不被支配，
+       先按前D-1个目标分组，每组只保留最大值（取值离散的目标放在前面时
+       可以大幅减少候选点）；
+    2. 在剩余点上做排序过滤(SFS)：按各目标秩次之和降序处理，支配者的秩次
+       之和一定更大，因此每个点只需与已确认的前沿点比较，并逐块向量化。
+
+    目标向量完全相同的点互不支配，都会出现在前沿中。
+
+    Returns:
+        前沿点在objectives中的下标（升序）
+    """
+    objectives = np.asarray(objectives, dtype=np.float64)
+    if objectives.ndim != 2:
+        raise ValueError(f"目标矩阵的形状应为(N, D)，实际为{objectives.shape}")
+    count, dims = objectives.shape
+    if count == 0:
+        return np.empty(0, dtype=np.intp)
+
+    # 1. 按前D-1个目标分组，保留每组最后一个目标的最大值（包括同为最大值的点）
+    keys = tuple(objectives[:, i] for i in reversed(range(dims - 1)))
+    order = np.lexsort((-objectives[:, -1],) + keys)
+    grouped = objectives[order]
+    group_start = np.ones(count, dtype=bool)
+    if dims > 1:
+        group_start[1:] = (grouped[1:, :-1] != grouped[:-1, :-1]).any(axis=1)
+    group_id = np.cumsum(group_start) - 1
+    group_max = grouped[group_start, -1][group_id]
+    candidates = order[grouped[:, -1] == group_max]
+
+    # 2. 按秩次之和降序排序后逐块过滤
+    points = objectives[candidates]
+    rank_sum = np.zeros(len(points), dtype=np.int64)
+    for i in range(dims):
+        rank_sum += np.unique(points[:, i], return_inverse=True)[1].reshape(-1)
+    candidates = candidates[np.argsort(-rank_sum, kind="stable")]
+
+    front = []
+    front_points = np.empty((0, dims), dtype=np.float64)
+    block_size = INITIAL_BLOCK_SIZE
+    position = 0
+    while position < len(candidates):
+        block = candidates[position:position + block_size]
+        position += block_size
+        block_size = min(block_size * 2, MAX_BLOCK_SIZE)
+
+        block_points = objectives[block]
+        if len(front_points):
+            dominated = _dominated_by(block_points, front_points)
+            block, block_points = block[~dominated], block_points[~dominated]
+        if len(block):
+            # 同一块内的点也可能相互支配
+            dominated = _dominated_by(block_points, block_points)
+            front.append(block[~dominated])
+            front_points = np.vstack([front_points, block_points[~dominated]])
+
+    if not front:
+        return np.empty(0, dtype=np.intp)
+    return np.sort(np.concatenate(front))
+
+
+def _dominated_by(points: np.ndarray, others: np.ndarray, chunk_size: int = 1024) -> np.ndarray:
+    """points中的每个点是否被others中的某个点支配（各目标不小于且至少一项更大）"""
+    dominated = np.zeros(len(points), dtype=bool)
+    for start in range(0, len(others), chunk_size):
+        chunk = others[start:start + chunk_size]
+        not_less = (chunk[None, :, :] >= points[:, None, :]).all(axis=2)
+        greater = (chunk[None, :, :] > points[:, None, :]).any(axis=2)
+        dominated |= (not_less & greater).any(axis=1)
+    return dominated
@@ -0,0 +1,49 @@
+# 队伍流式排序
+
+import heapq
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+# 协同评分上限（各子评分最高100分，权重之和为1）
+MAX_SYNERGY_SCORE = 100
+
+
+def top_k_teams(
+    candidates: Iterable[Sequence[str]],
+    score_fn: Callable[[List[str]], float],
+    count: int,
+    score_ceiling: Optional[float] = MAX_SYNERGY_SCORE
+) -> List[Dict[str, Any]]:
+    """流式选出评分最高的count支队伍
+
+    逐个消费候选队伍，只保留大小为count的最小堆，内存占用为O(count)。
+    评分相同的队伍保留先出现的，结果与“全部评分后稳定排序再截取”一致。
+
+    Args:
+        candidates: 候选队伍的可迭代对象（可以是生成器）
+        score_fn: 队伍评分函数
+        count: 返回的队伍数量
+        score_ceiling: 评分上限，堆中最低分达到该值后提前结束，None表示不提前结束
+
+    Returns:
+        [{"队伍": [...], "评分": score}]，按评分从高到低排列
+    """
+    if count <= 0:
+        return []
+
+    # 堆元素为(评分, -序号, 队伍)，堆顶是当前最差的队伍；同分时序号大的更差
+    heap = []
+    for seq, team in enumerate(candidates):
+        team = list(team)
+        score = score_fn(team)
+        entry = (score, -seq, team)
+        if len(heap) < count:
+            heapq.heappush(heap, entry)
+        elif entry[:2] > heap[0][:2]:
+            heapq.heapreplace(heap, entry)
+
+        # 后续队伍同分也不会替换先出现的队伍，可提前结束
+        if score_ceiling is not None and len(heap) >= count and heap[0][0] >= score_ceiling:
+            break
+
+    heap.sort(key=lambda entry: (-entry[0], -entry[1]))
+    return [{"队伍": team, "评分": score} for score, _, team in heap]
@@ -1,41 +1,109 @@
 # 推荐引擎
 import itertools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Optional, Dict, Any
 
+import numpy as np
+
+from core.diversity import DEFAULT_MAX_HERO_REUSE, DEFAULT_MAX_SHARED_HEROES, select_diverse_teams
+from core.lineup_allocator import DEFAULT_NODE_BUDGET, allocate_disjoint_teams
+from core.lru_cache import LRUCache, MISSING
+from core.parallel_scorer import ParallelScorer
+from core.pareto import DAMAGE_ESTIMATE_LEVEL, estimate_hero_damage, pareto_front
+from core.ranking import top_k_teams
+from core.score_columns import ScoreColumns
+from core.synergy_analyzer import SCORE_WEIGHTS
+from core.synergy_tables import DEFAULT_CHUNK_SIZE, combine_components, iter_team_chunks
+from core.team_search import branch_and_bound_search
+
+# 缓存的阵容分解表数量
+ROSTER_TABLES_CACHE_SIZE = 32
+
+# 需要报告进度时精确搜索每个分块评分的队伍数量
+PROGRESS_CHUNK_SIZE = 20000
+
 class Recommender:
-    def __init__(self, data_manager, synergy_analyzer):
+    def __init__(self, data_manager, synergy_analyzer, parallel_workers=0, score_columns=None, leaderboards=None):
         self.data_manager = data_manager
         self.synergy_analyzer = synergy_analyzer
+        # 可选的预计算排行榜（Leaderboards），单武将、阵营、标签推荐优先直接读取
+        self.leaderboards = leaderboards
+        # 可选的全量队伍评分列式文件（ScoreColumnsProvider），可用时以筛选扫描代替实时评分
+        self.score_columns = score_columns
+        # 阵容对应的分解表缓存
+        self._roster_tables = LRUCache(ROSTER_TABLES_CACHE_SIZE)
+        # 批量推荐共用的全量队伍评分(数据版本, ScoreColumns)
+        self._shared_scores = None
+        self._shared_scores_lock = threading.Lock()
+        # 精确搜索的并行评分后端（parallel_workers为0时在当前进程内评分）
+        self.parallel_scorer = None
+        if parallel_workers:
+            self.parallel_scorer = ParallelScorer(synergy_analyzer, workers=parallel_workers)
     
-    def recommend_teams(self, count=10, required_hero=None, excluded_heroes=None, required_camp=None, required_tags=None, strategy="balanced"):
-        """推荐最佳队伍组合 - 改进版"""
-        # 获取所有可用武将
-        all_heroes = self.data_manager.get_all_hero_names()
-        
-        # 处理必需阵营筛选
-        if required_camp:
-            filtered_heroes = []
-            for hero_name in all_heroes:
-                hero_info = self.data_manager.get_hero_by_name(hero_name)
-                if hero_info and hero_info.get("阵营") == required_camp:
-                    filtered_heroes.append(hero_name)
-            all_heroes = filtered_heroes
-        
-        # 处理必需标签筛选
-        if required_tags:
-            filtered_heroes = []
-            for hero_name in all_heroes:
-                hero_info = self.data_manager.get_hero_by_name(hero_name)
-                if hero_info:
-                    hero_tags = hero_info.get("标签", [])
-                    # 检查是否包含所有必需标签
-                    if all(tag in hero_tags for tag in required_tags):
-                        filtered_heroes.append(hero_name)
-            all_heroes = filtered_heroes
-        
-        # 处理排除的武将
-        if excluded_heroes:
-            all_heroes = [hero for hero in all_heroes if hero not in excluded_heroes]
+    def recommend_teams(self, count=10, required_hero=None, excluded_heroes=None, required_camp=None, required_tags=None, strategy="balanced", roster=None, time_budget_ms=None, progress=None, score_columns=None, weights=None,
+                        max_hero_reuse=DEFAULT_MAX_HERO_REUSE, max_shared_heroes=DEFAULT_MAX_SHARED_HEROES):
+        """推荐最佳队伍组合 - 改进版
+        
+        roster为玩家阵容（Roster）时只在拥有的武将中精确搜索，未拥有的传承战法不计入评分
+        
+        指定time_budget_ms时精确搜索改用可限时的分支定界，到时返回已找到的最好队伍，
+        结果为{"队伍": [...], "精确": 是否为精确结果, "评分差距上界": 与精确结果第count名评分的最大差距}；
+        balanced、high_synergy为启发式策略，"精确"总为False，"评分差距上界"为None
+        
+        progress为进度回调，精确搜索每评分一批队伍后调用progress(已评分队伍数, 队伍总数)；
+        score_columns为预先计算的全量队伍评分（ScoreColumns），精确搜索直接读取其中的评分
+        
+        weights为自定义的(标签, 兵种, 阵营, 战法)评分权重，与默认权重不同时总是精确搜索：
+        按新权重合并全量队伍评分中缓存的子评分后选出前count名，不重新计算评分规则
+        
+        diverse策略按评分从高到低选择互不相似的队伍：每名武将最多出现在max_hero_reuse支
+        队伍中，任意两支队伍最多共有max_shared_heroes名武将（必选武将不计）
+        """
+        if weights is not None and tuple(weights) == SCORE_WEIGHTS:
+            weights = None
+        diversity = (max_hero_reuse, max_shared_heroes)
+        if time_budget_ms is None:
+            return self._recommend_teams(count, required_hero, excluded_heroes, required_camp,
+                                         required_tags, strategy, roster, progress=progress,
+                                         columns=score_columns, weights=weights, diversity=diversity)
+        
+        deadline = time.perf_counter() + max(time_budget_ms, 0) / 1000
+        status = {"exact": False, "gap": None}
+        result = self._recommend_teams(count, required_hero, excluded_heroes, required_camp,
+                                       required_tags, strategy, roster, deadline=deadline, status=status,
+                                       progress=progress, columns=score_columns, weights=weights,
+                                       diversity=diversity)
+        if isinstance(result, dict):
+            return result
+        return {"队伍": result, "精确": status["exact"], "评分差距上界": status["gap"]}
+    
+    def _recommend_teams(self, count, required_hero, excluded_heroes, required_camp, required_tags, strategy, roster,
+                         deadline=None, status=None, progress=None, columns=None, weights=None,
+                         diversity=(DEFAULT_MAX_HERO_REUSE, DEFAULT_MAX_SHARED_HEROES)):
+        """recommend_teams的实现，deadline不为None时精确搜索在截止时刻返回，搜索状态写入status"""
+        all_heroes = self._filter_available_heroes(required_camp, required_tags, excluded_heroes)
+        
+        # 精确策略：使用协同评分分解表向量化地为所有组合评分
+        # 分支定界策略：按评分上界剪枝，结果与精确策略一致
+        # 多样化策略：在精确评分的全部组合中选择互不相似的队伍
+        # 指定阵容或自定义权重时总是使用精确搜索
+        if strategy in ("exact", "branch_and_bound", "diverse") or roster is not None or weights is not None:
+            if required_hero and required_hero not in all_heroes:
+                return {"error": f"必须包含的武将 {required_hero} 不在可用武将列表中"}
+            if roster is not None and required_hero:
+                required_index = self.synergy_analyzer.get_hero_indices([required_hero])[0]
+                if required_index < 0 or not roster.hero_mask[required_index]:
+                    return {"error": f"必须包含的武将 {required_hero} 不在阵容中"}
+            if strategy == "diverse":
+                return self._recommend_teams_diverse(all_heroes, count, required_hero, roster=roster,
+                                                     columns=columns, weights=weights, diversity=diversity)
+            return self._recommend_teams_exact(all_heroes, count, required_hero,
+                                               pruned=(strategy == "branch_and_bound"), roster=roster,
+                                               deadline=deadline, status=status, progress=progress,
+                                               columns=columns, weights=weights)
         
         # 生成队伍组合
         combinations = []
@@ -44,11 +112,15 @@ class Recommender:
             if required_hero not in all_heroes:
                 return {"error": f"必须包含的武将 {required_hero} 不在可用武将列表中"}
             
+            # 限时查询或批量查询时改用向量化的精确搜索（枚举的组合与下面的逐个评分相同）
+            if deadline is not None or columns is not None:
+                return self._recommend_teams_exact(all_heroes, count, required_hero,
+                                                   deadline=deadline, status=status, progress=progress,
+                                                   columns=columns)
+            
             # 从其他武将中选择2个与指定武将组合
             other_heroes = [hero for hero in all_heroes if hero != required_hero]
-            combinations = []
-            for combo in itertools.combinations(other_heroes, 2):
-                combinations.append((required_hero,) + combo)
+            combinations = ((required_hero,) + combo for combo in itertools.combinations(other_heroes, 2))
         else:
             # 根据不同策略生成队伍组合
             if strategy == "balanced":
@@ -58,23 +130,322 @@ class Recommender:
                 # 高协同策略：优先选择协同评分高的队伍
                 combinations = self._generate_high_synergy_teams(all_heroes)
             else:
-                # 默认策略：生成所有三人组合
-                combinations = list(itertools.combinations(all_heroes, 3))
-        
-        # 计算每个组合的协同评分和详细分析
-        team_scores = []
-        for combo in combinations:
-            # 计算协同评分
-            score = self.synergy_analyzer.calculate_synergy_score(list(combo))
-            
-            team_scores.append({
-                "队伍": list(combo),
+                # 默认策略：对所有三人组合精确评分
+                return self._recommend_teams_exact(all_heroes, count, deadline=deadline, status=status,
+                                                   progress=progress, columns=columns)
+        
+        # 流式计算每个组合的协同评分，只保留前N个
+        return top_k_teams(combinations, self.synergy_analyzer.calculate_synergy_score, count)
+    
+    def _filter_available_heroes(self, required_camp=None, required_tags=None, excluded_heroes=None):
+        """按阵营、标签和排除名单筛选可用武将（保持武将列表顺序）"""
+        # 通过二级索引按阵营和标签筛选（须包含所有必需标签）
+        all_heroes = self.data_manager.filter_hero_names(camp=required_camp, tags=required_tags)
+        
+        # 处理排除的武将
+        if excluded_heroes:
+            excluded_set = set(excluded_heroes)
+            all_heroes = [hero for hero in all_heroes if hero not in excluded_set]
+        return all_heroes
+    
+    def _recommend_teams_exact(self, all_heroes, count, required_hero=None, pruned=False, roster=None,
+                               deadline=None, status=None, progress=None, columns=None, weights=None):
+        """在候选武将的所有三人组合中精确选出评分最高的队伍
+        
+        pruned为True时使用分支定界搜索，跳过评分上界不可能进入前count名的武将对；
+        指定deadline（time.perf_counter()的截止时刻）时同样使用分支定界搜索，
+        到时返回已找到的最好队伍，是否精确及评分差距上界写入status；
+        指定progress时按较小的分块评分以便更频繁地报告进度；
+        columns为预先计算的全量队伍评分，不指定时使用可用的列式文件；
+        weights为自定义权重，基础评分下按新权重合并全量队伍评分中的子评分
+        """
+        search_space = self._resolve_search_space(all_heroes, required_hero, roster)
+        if search_space is None:
+            if status is not None:
+                status.update(exact=True, gap=0.0)
+            return []
+        tables, candidates, required = search_space
+        # 限时搜索不为自定义权重现场构建全量评分（构建耗时不受时间上限约束），只使用已有的评分
+        columns = self._usable_columns(tables, candidates, required, columns, shared=weights is not None,
+                                       build=deadline is None)
+        
+        if columns is not None:
+            top_teams = columns.top_k(count, candidates=candidates, weights=weights)
+            if progress is not None:
+                progress(1, 1)
+            if status is not None:
+                status.update(exact=True, gap=0.0)
+        elif deadline is not None:
+            top_teams, search_status = branch_and_bound_search(tables, count, candidates=candidates,
+                                                               required=required, deadline=deadline,
+                                                               progress=progress, weights=weights)
+            if status is not None:
+                status.update(exact=search_status["exact"], gap=search_status["gap"])
+        elif pruned:
+            top_teams, _ = branch_and_bound_search(tables, count, candidates=candidates, required=required,
+                                                   progress=progress, weights=weights)
+        elif (self.parallel_scorer is not None and tables is self.synergy_analyzer.get_synergy_tables() and
+              progress is None and weights is None):
+            top_teams = self.parallel_scorer.top_k(count, candidates=candidates, required=required)
+        else:
+            chunk_size = PROGRESS_CHUNK_SIZE if progress is not None else DEFAULT_CHUNK_SIZE
+            top_teams = tables.top_k(count, candidates=candidates, required=required,
+                                     chunk_size=chunk_size, progress=progress, weights=weights)
+        return [
+            {
+                "队伍": [tables.hero_names[i] for i in team],
                 "评分": score
+            }
+            for team, score in top_teams
+        ]
+    
+    def _recommend_teams_diverse(self, all_heroes, count, required_hero=None, roster=None, columns=None,
+                                 weights=None, diversity=(DEFAULT_MAX_HERO_REUSE, DEFAULT_MAX_SHARED_HEROES)):
+        """为候选武将的所有三人组合评分，再按评分从高到低选择互不相似的队伍
+        
+        基础评分下不指定必选武将时从全量队伍评分中读取，否则实时评分
+        """
+        search_space = self._resolve_search_space(all_heroes, required_hero, roster)
+        if search_space is None:
+            return []
+        tables, candidates, required = search_space
+        if required is not None:
+            candidates = candidates[candidates != required]
+        columns = self._usable_columns(tables, candidates, required, columns, shared=True)
+        
+        team_chunks, score_chunks = [], []
+        for teams in iter_team_chunks(candidates, required):
+            team_chunks.append(teams)
+            if columns is not None:
+                score_chunks.append(columns.lookup(teams, weights=weights))
+            else:
+                score_chunks.append(tables.score_teams(teams, weights=weights))
+        if not team_chunks:
+            return []
+        teams = np.concatenate(team_chunks)
+        scores = np.concatenate(score_chunks)
+        
+        max_hero_reuse, max_shared_heroes = diversity
+        chosen = select_diverse_teams(teams, scores, count, len(tables), max_hero_reuse=max_hero_reuse,
+                                      max_shared_heroes=max_shared_heroes, required=required)
+        return [
+            {
+                "队伍": [tables.hero_names[i] for i in teams[j]],
+                "评分": float(scores[j])
+            }
+            for j in chosen
+        ]
+    
+    def _resolve_search_space(self, all_heroes, required_hero=None, roster=None):
+        """确定精确搜索的分解表、候选武将索引和必选武将索引
+        
+        按阵容筛选候选武将，未拥有传承战法的武将使用重新构建的战法表评分；
+        必选武将因缺少传承战法被排除时返回None
+        """
+        base_tables = self.synergy_analyzer.get_synergy_tables()
+        candidates = np.array([base_tables.hero_index[hero] for hero in all_heroes if hero in base_tables.hero_index],
+                              dtype=np.intp)
+        required = base_tables.hero_index.get(required_hero) if required_hero else None
+        
+        tables = base_tables
+        if roster is not None:
+            candidates = roster.filter_candidates(candidates)
+            if roster.drop_missing_skills:
+                missing = roster.missing_inherited_skills(self.synergy_analyzer.get_compiled_heroes())
+                candidates = candidates[~missing[candidates]]
+                if required is not None and missing[required]:
+                    return None
+            else:
+                tables = self._get_roster_tables(roster)
+        return tables, candidates, required
+    
+    def _usable_columns(self, tables, candidates, required, columns=None, shared=False, build=True):
+        """选择可以回答查询的全量队伍评分
+        
+        全量评分按武将索引升序保存队伍，评分与武将顺序有关，只能回答基础评分下
+        候选武将按索引升序排列且不指定必选武将的查询。shared为True时没有列式文件
+        也在内存中评分一次并缓存（build为False时只使用已缓存的评分）。
+        """
+        base_tables = self.synergy_analyzer.get_synergy_tables()
+        if tables is not base_tables or required is not None or not np.all(np.diff(candidates) > 0):
+            return None
+        if columns is None and shared:
+            return self.get_shared_scores(build=build)
+        if columns is None and self.score_columns is not None:
+            return self.score_columns.get()
+        return columns
+    
+    def recommend_disjoint_teams(self, team_count=5, roster=None, excluded_heroes=None, node_budget=DEFAULT_NODE_BUDGET):
+        """从阵容中选出互不重复的多支队伍，使总协同评分最高
+        
+        Args:
+            team_count: 队伍数量
+            roster: 玩家阵容（Roster），None表示所有武将
+            excluded_heroes: 排除的武将
+            node_budget: 分支定界最多展开的节点数量，超出时返回已找到的最好方案
+        """
+        tables = self.synergy_analyzer.get_synergy_tables()
+        excluded_set = set(excluded_heroes or [])
+        candidates = np.array([i for i, hero in enumerate(tables.hero_names) if hero not in excluded_set],
+                              dtype=np.intp)
+        if roster is not None:
+            candidates = roster.filter_candidates(candidates)
+            if roster.drop_missing_skills:
+                missing = roster.missing_inherited_skills(self.synergy_analyzer.get_compiled_heroes())
+                candidates = candidates[~missing[candidates]]
+            else:
+                tables = self._get_roster_tables(roster)
+        
+        result = allocate_disjoint_teams(tables, candidates, team_count, node_budget=node_budget)
+        return {
+            "队伍": [
+                {
+                    "队伍": [tables.hero_names[i] for i in team],
+                    "评分": score
+                }
+                for team, score in result["teams"]
+            ],
+            "总评分": result["total"],
+            "最优": result["optimal"]
+        }
+    
+    def recommend_pareto_teams(self, required_hero=None, excluded_heroes=None, required_camp=None, required_tags=None,
+                               roster=None, weights=None, count=None, damage_level=DAMAGE_ESTIMATE_LEVEL):
+        """推荐多目标帕累托前沿上的队伍
+        
+        目标为标签、兵种、阵营、战法四项子评分，平均兵种适性和估算输出（三名武将在damage_level
+        级时武力、智力较高一项之和）。前沿中的队伍在这些目标上都不被其他队伍全面超过；
+        综合评分是子评分的非负加权和，任何权重下的最佳队伍都在前沿上，因此前沿与权重无关，
+        weights只影响返回的综合评分和排序。
+        
+        Returns:
+            按综合评分从高到低（同分时按枚举顺序）排列的前沿队伍，最多count支；
+            参数有误时返回{"error": ...}
+        """
+        all_heroes = self._filter_available_heroes(required_camp, required_tags, excluded_heroes)
+        if required_hero and required_hero not in all_heroes:
+            return {"error": f"必须包含的武将 {required_hero} 不在可用武将列表中"}
+        if roster is not None and required_hero:
+            required_index = self.synergy_analyzer.get_hero_indices([required_hero])[0]
+            if required_index < 0 or not roster.hero_mask[required_index]:
+                return {"error": f"必须包含的武将 {required_hero} 不在阵容中"}
+        
+        search_space = self._resolve_search_space(all_heroes, required_hero, roster)
+        if search_space is None:
+            return []
+        tables, candidates, required = search_space
+        if required is not None:
+            candidates = candidates[candidates != required]
+        columns = self._usable_columns(tables, candidates, required, shared=True)
+        
+        team_chunks, component_chunks = [], []
+        for teams in iter_team_chunks(candidates, required):
+            team_chunks.append(teams)
+            if columns is not None:
+                component_chunks.append(columns.lookup_components(teams))
+            else:
+                component_chunks.append(tables.score_components(teams))
+        if not team_chunks:
+            return []
+        teams = np.concatenate(team_chunks)
+        components = np.concatenate(component_chunks)
+        
+        # 平均适性按队伍顺序求和，与兵种评分中的计算一致
+        fitness = tables.troop_fitness
+        avg_fitness = (fitness[teams[:, 0]] + fitness[teams[:, 1]] + fitness[teams[:, 2]]) / 3
+        hero_damage = np.array([
+            estimate_hero_damage(self.data_manager.get_hero_by_name(hero) or {}, level=damage_level)
+            for hero in tables.hero_names
+        ])
+        damage = hero_damage[teams].sum(axis=1)
+        
+        # 取值离散的目标在前，估算输出在最后，便于前沿计算先按前几项分组
+        objectives = np.column_stack([components, avg_fitness, damage])
+        front = pareto_front(objectives)
+        scores = combine_components(components[front], weights)
+        order = np.argsort(-scores, kind="stable")[:count]
+        
+        results = []
+        for j, score in zip(front[order], scores[order]):
+            tag_score, troop_score, camp_score, skill_score = (float(value) for value in components[j])
+            results.append({
+                "队伍": [tables.hero_names[i] for i in teams[j]],
+                "评分": float(score),
+                "目标": {
+                    "标签协同": round(tag_score, 2),
+                    "兵种协同": round(troop_score, 2),
+                    "阵营协同": round(camp_score, 2),
+                    "战法协同": round(skill_score, 2),
+                    "平均兵种适性": round(float(avg_fitness[j]), 2),
+                    "估算输出": round(float(damage[j]), 2)
+                }
             })
-        
-        # 按评分排序并返回前N个
-        team_scores.sort(key=lambda x: x["评分"], reverse=True)
-        return team_scores[:count]
+        return results
+    
+    def recommend_teams_batch(self, queries, workers=None):
+        """批量推荐：所有查询共用一份全量队伍评分，并在线程池中并行处理
+        
+        不指定必选武将的精确搜索直接按组合排名读取共享评分中候选队伍所在的行，
+        不再重复评分；必选武将的查询只需为C(n-1, 2)支队伍实时评分，需要重新
+        评分的阵容查询和启发式策略照常处理。
+        
+        Args:
+            queries: recommend_teams的参数字典列表
+            workers: 并行线程数，默认CPU核数
+        
+        Returns:
+            与queries一一对应的推荐结果，出错的查询对应{"error": ...}
+        """
+        if not queries:
+            return []
+        shared = self.get_shared_scores()
+        
+        def run(query):
+            try:
+                return self.recommend_teams(score_columns=shared, **query)
+            except Exception as e:
+                return {"error": f"推荐时出错: {str(e)}"}
+        
+        workers = workers or os.cpu_count() or 1
+        if workers <= 1 or len(queries) == 1:
+            return [run(query) for query in queries]
+        with ThreadPoolExecutor(max_workers=min(workers, len(queries))) as executor:
+            return list(executor.map(run, queries))
+    
+    def get_shared_scores(self, build=True):
+        """获取与当前数据一致的全量队伍评分：优先使用列式文件，否则在内存中评分一次并缓存
+        
+        build为False时不现场评分，没有可用的评分时返回None
+        """
+        if self.score_columns is not None:
+            columns = self.score_columns.get()
+            if columns is not None:
+                return columns
+        tables = self.synergy_analyzer.get_synergy_tables()
+        with self._shared_scores_lock:
+            cached = self._shared_scores
+            if cached is None or cached[0] != tables.data_version:
+                if not build:
+                    return None
+                cached = (tables.data_version, ScoreColumns.build(self.synergy_analyzer))
+                self._shared_scores = cached
+            return cached[1]
+    
+    def _get_roster_tables(self, roster):
+        """获取阵容对应的分解表：所有传承战法都拥有时即为原表"""
+        compiled = self.synergy_analyzer.get_compiled_heroes()
+        base_tables = self.synergy_analyzer.get_synergy_tables()
+        missing = roster.missing_inherited_skills(compiled)
+        if not missing.any():
+            return base_tables
+        
+        # 缺少的传承战法组合相同的阵容共用同一份分解表
+        cache_key = (base_tables.data_version, np.packbits(missing).tobytes())
+        tables = self._roster_tables.get(cache_key)
+        if tables is MISSING:
+            tables = base_tables.with_skill_types(roster.hero_skill_types(compiled))
+            self._roster_tables.put(cache_key, tables)
+        return tables
     
     def _generate_balanced_teams(self, all_heroes):
         """生成平衡策略的队伍组合"""
@@ -136,26 +507,32 @@ class Recommender:
         
         # 为每个武将对添加第三个武将
         combinations = []
+        hero_indices = self.synergy_analyzer.get_hero_indices(all_heroes)
         for pair, score in top_pairs:
-            # 为当前武将对寻找最佳的第三个武将
-            best_third_hero = None
-            best_total_score = 0
-            
-            for hero in all_heroes:
-                if hero not in pair:
-                    team = list(pair) + [hero]
-                    total_score = self.synergy_analyzer.calculate_synergy_score(team)
-                    if total_score > best_total_score:
-                        best_total_score = total_score
-                        best_third_hero = hero
+            # 为当前武将对批量评分所有可能的第三个武将，取评分最高者（同分取靠前的武将）
+            pair_indices = self.synergy_analyzer.get_hero_indices(pair)
+            third_heroes = [hero for hero, index in zip(all_heroes, hero_indices)
+                            if hero not in pair and index >= 0]
+            if pair_indices.min() < 0 or not third_heroes:
+                continue
+            teams = np.empty((len(third_heroes), 3), dtype=np.intp)
+            teams[:, :2] = pair_indices
+            teams[:, 2] = self.synergy_analyzer.get_hero_indices(third_heroes)
+            total_scores = self.synergy_analyzer.calculate_synergy_scores(teams)
             
-            if best_third_hero:
-                combinations.append(tuple(list(pair) + [best_third_hero]))
+            best = int(np.argmax(total_scores))
+            if total_scores[best] > 0:
+                combinations.append(tuple(list(pair) + [third_heroes[best]]))
         
         return combinations
     
     def recommend_single_hero_team(self, main_hero: str, count: int = 10) -> List[Dict[str, Any]]:
         """为指定主将推荐最佳副将组合"""
+        if self.leaderboards is not None:
+            teams = self.leaderboards.top_for_hero(main_hero, count)
+            if teams is not None:
+                return teams
+        
         # 获取所有可用武将
         all_heroes = self.data_manager.get_all_hero_names()
         
@@ -165,72 +542,34 @@ class Recommender:
         else:
             return [{"error": f"主将 {main_hero} 不存在"}]
         
-        # 生成所有二人组合作为副将
-        pairs = list(itertools.combinations(all_heroes, 2))
-        
-        # 为每个组合计算协同评分
-        team_scores = []
-        for pair in pairs:
-            team = [main_hero] + list(pair)
-            score = self.synergy_analyzer.calculate_synergy_score(team)
-            team_scores.append({
-                "队伍": team,
-                "评分": score
-            })
-        
-        # 按评分排序并返回前N个
-        team_scores.sort(key=lambda x: x["评分"], reverse=True)
-        return team_scores[:count]
+        # 以主将为必选武将，批量评分所有二人副将组合，只保留前N个
+        return self._recommend_teams_exact(all_heroes + [main_hero], count, main_hero)
     
     def recommend_teams_by_camp(self, camp: str, count: int = 10) -> List[Dict[str, Any]]:
         """推荐指定阵营的队伍"""
+        if self.leaderboards is not None:
+            teams = self.leaderboards.top_for_camp(camp, count)
+            if teams is not None:
+                return teams
+        
         # 获取指定阵营的所有武将
-        all_heroes = []
-        for hero_name in self.data_manager.get_all_hero_names():
-            hero_info = self.data_manager.get_hero_by_name(hero_name)
-            if hero_info and hero_info.get("阵营") == camp:
-                all_heroes.append(hero_name)
-        
-        # 生成所有三人组合
-        combinations = list(itertools.combinations(all_heroes, 3))
-        
-        # 计算每个组合的协同评分
-        team_scores = []
-        for combo in combinations:
-            score = self.synergy_analyzer.calculate_synergy_score(list(combo))
-            team_scores.append({
-                "队伍": list(combo),
-                "评分": score
-            })
+        all_heroes = self.data_manager.filter_hero_names(camp=camp)
         
-        # 按评分排序并返回前N个
-        team_scores.sort(key=lambda x: x["评分"], reverse=True)
-        return team_scores[:count]
+        # 批量计算所有三人组合的协同评分，只保留前N个
+        return self._recommend_teams_exact(all_heroes, count)
     
     def recommend_teams_by_tag(self, tag: str, count: int = 10) -> List[Dict[str, Any]]:
         """推荐包含指定标签的队伍"""
+        if self.leaderboards is not None:
+            teams = self.leaderboards.top_for_tag(tag, count)
+            if teams is not None:
+                return teams
+        
         # 获取包含指定标签的所有武将
-        tagged_heroes = []
-        for hero_name in self.data_manager.get_all_hero_names():
-            hero_info = self.data_manager.get_hero_by_name(hero_name)
-            if hero_info and tag in hero_info.get("标签", []):
-                tagged_heroes.append(hero_name)
-        
-        # 生成所有三人组合
-        combinations = list(itertools.combinations(tagged_heroes, 3))
-        
-        # 计算每个组合的协同评分
-        team_scores = []
-        for combo in combinations:
-            score = self.synergy_analyzer.calculate_synergy_score(list(combo))
-            team_scores.append({
-                "队伍": list(combo),
-                "评分": score
-            })
+        tagged_heroes = self.data_manager.filter_hero_names(tags=[tag])
         
-        # 按评分排序并返回前N个
-        team_scores.sort(key=lambda x: x["评分"], reverse=True)
-        return team_scores[:count]
+        # 批量计算所有三人组合的协同评分，只保留前N个
+        return self._recommend_teams_exact(tagged_heroes, count)
     
     def filter_teams_by_criteria(
         self, 
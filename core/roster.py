@@ -0,0 +1,90 @@
+# 玩家阵容
+
+from typing import Iterable, List, Optional
+
+import numpy as np
+
+
+class Roster:
+    """玩家阵容：拥有的武将和传承战法
+
+    以武将索引、战法索引上的布尔位集表示，筛选候选武将和判断战法是否可用
+    都是一次向量化的掩码运算。武将的自带战法总是可用，传承战法只有在阵容中
+    拥有时才计入评分。
+    """
+
+    def __init__(self, hero_mask: np.ndarray, skill_mask: np.ndarray, drop_missing_skills: bool = False):
+        self.hero_mask = np.asarray(hero_mask, dtype=bool)
+        self.skill_mask = np.asarray(skill_mask, dtype=bool)
+        # 为True时直接排除传承战法未拥有的武将，否则去掉该战法后重新评分
+        self.drop_missing_skills = drop_missing_skills
+        self.unknown_heroes: List[str] = []
+        self.unknown_skills: List[str] = []
+
+    @classmethod
+    def from_names(cls, compiled, heroes: Optional[Iterable[str]] = None,
+                   skills: Optional[Iterable[str]] = None, drop_missing_skills: bool = False) -> "Roster":
+        """由武将名称和战法名称构建阵容，None表示全部拥有
+
+        Args:
+            compiled: CompiledHeroes实例，提供武将和战法的索引
+            heroes: 拥有的武将名称
+            skills: 拥有的传承战法名称
+            drop_missing_skills: 是否排除传承战法未拥有的武将（否则重新评分）
+        """
+        hero_index = {name: i for i, name in enumerate(compiled.hero_names)}
+        unknown_heroes = []
+        if heroes is None:
+            hero_mask = np.ones(len(compiled.hero_names), dtype=bool)
+        else:
+            hero_mask = np.zeros(len(compiled.hero_names), dtype=bool)
+            for name in heroes:
+                if name in hero_index:
+                    hero_mask[hero_index[name]] = True
+                else:
+                    unknown_heroes.append(name)
+
+        unknown_skills = []
+        if skills is None:
+            skill_mask = np.ones(len(compiled.skill_names), dtype=bool)
+        else:
+            skill_mask = np.zeros(len(compiled.skill_names), dtype=bool)
+            for name in skills:
+                if name in compiled.skill_ids:
+                    skill_mask[compiled.skill_ids[name]] = True
+                else:
+                    unknown_skills.append(name)
+
+        roster = cls(hero_mask, skill_mask, drop_missing_skills)
+        roster.unknown_heroes = unknown_heroes
+        roster.unknown_skills = unknown_skills
+        return roster
+
+    def filter_candidates(self, candidates: np.ndarray) -> np.ndarray:
+        """保留拥有的候选武将"""
+        candidates = np.asarray(candidates, dtype=np.intp)
+        return candidates[self.hero_mask[candidates]]
+
+    def missing_inherited_skills(self, compiled) -> np.ndarray:
+        """每个武将的传承战法是否未拥有（按武将索引排列的布尔数组）"""
+        inherited = np.array(
+            [record.inherited_skill_id if record is not None else -1 for record in compiled.records],
+            dtype=np.intp)
+        has_inherited = inherited >= 0
+        missing = np.zeros(len(inherited), dtype=bool)
+        missing[has_inherited] = ~self.skill_mask[inherited[has_inherited]]
+        return missing
+
+    def hero_skill_types(self, compiled) -> List[tuple]:
+        """按阵容可用的战法生成每个武将的战法类型编号，未拥有的传承战法不计入"""
+        missing = self.missing_inherited_skills(compiled)
+        hero_skill_types = []
+        for record, is_missing in zip(compiled.records, missing):
+            if record is None:
+                hero_skill_types.append(())
+            elif is_missing:
+                # 传承战法总是排在自带战法之后
+                hero_skill_types.append(record.skill_types[:-1])
+            else:
+                hero_skill_types.append(record.skill_types)
+        return hero_skill_types
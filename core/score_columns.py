@@ -0,0 +1,261 @@
+# 全量队伍评分列式文件
+
+import json
+import os
+import shutil
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.synergy_analyzer import SCORING_RULES_VERSION
+from core.synergy_tables import DEFAULT_CHUNK_SIZE, combine_components, iter_team_chunks, select_top_k
+
+# 列式文件格式版本
+COLUMNS_FORMAT_VERSION = 1
+
+# 元数据文件名，最后写入，存在时表示各列文件已完整写入
+META_FILENAME = "meta.json"
+
+
+def build_score_columns(synergy_analyzer, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict[str, np.ndarray]:
+    """按itertools.combinations的顺序为所有三人队伍(a < b < c)评分
+
+    Returns:
+        {"teams": (N, 3)武将索引, "total": (N,)综合评分, "components": (N, 4)子评分}
+    """
+    hero_count = len(synergy_analyzer.get_synergy_tables())
+    team_chunks, total_chunks, component_chunks = [], [], []
+    for teams in iter_team_chunks(np.arange(hero_count), chunk_size=chunk_size):
+        total, components = synergy_analyzer.calculate_synergy_scores(teams, return_components=True)
+        team_chunks.append(teams.astype(np.int16))
+        total_chunks.append(total)
+        component_chunks.append(components)
+
+    if not team_chunks:
+        return {
+            "teams": np.empty((0, 3), dtype=np.int16),
+            "total": np.empty(0, dtype=np.float64),
+            "components": np.empty((0, 4), dtype=np.float64)
+        }
+    return {
+        "teams": np.concatenate(team_chunks),
+        "total": np.concatenate(total_chunks),
+        "components": np.concatenate(component_chunks)
+    }
+
+
+def write_score_columns(directory: str, synergy_analyzer) -> Dict[str, Any]:
+    """为所有三人队伍评分并写入列式文件目录
+
+    先写入临时目录再替换原目录，读取方不会读到写了一半的文件。
+
+    Returns:
+        写入的元数据
+    """
+    data_manager = synergy_analyzer.data_manager
+    # 先记录数据哈希和武将列表，评分期间数据发生变化时写入的文件会被判定为过期
+    data_hash = getattr(data_manager, "data_hash", "")
+    hero_names = data_manager.get_all_hero_names()
+    columns = build_score_columns(synergy_analyzer)
+
+    temp_dir = directory.rstrip(os.sep) + ".tmp"
+    old_dir = directory.rstrip(os.sep) + ".old"
+    shutil.rmtree(temp_dir, ignore_errors=True)
+    os.makedirs(temp_dir)
+    for name, array in columns.items():
+        np.save(os.path.join(temp_dir, f"{name}.npy"), array)
+
+    meta = {
+        "format_version": COLUMNS_FORMAT_VERSION,
+        "data_hash": data_hash,
+        "rules_version": SCORING_RULES_VERSION,
+        "team_count": int(len(columns["total"])),
+        "hero_names": hero_names
+    }
+    with open(os.path.join(temp_dir, META_FILENAME), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+
+    # 已映射到内存的旧文件在删除后仍然可以读取
+    shutil.rmtree(old_dir, ignore_errors=True)
+    if os.path.exists(directory):
+        os.rename(directory, old_dir)
+    os.rename(temp_dir, directory)
+    shutil.rmtree(old_dir, ignore_errors=True)
+    return meta
+
+
+class ScoreColumns:
+    """内存映射的全量队伍评分列式文件
+
+    队伍按武将索引升序(a < b < c)保存，与候选武将按索引升序枚举时的
+    itertools.combinations顺序一致，因此筛选后的前K名与实时精确评分的
+    结果完全相同（包括同分队伍的顺序）。
+    """
+
+    def __init__(self, meta: Dict[str, Any], teams: np.ndarray, total: np.ndarray, components: np.ndarray):
+        self.meta = meta
+        self.data_hash = meta.get("data_hash", "")
+        self.rules_version = meta.get("rules_version")
+        self.hero_names: List[str] = meta.get("hero_names", [])
+        self.teams = teams
+        self.total = total
+        self.components = components
+
+    def __len__(self):
+        return len(self.total)
+
+    @classmethod
+    def build(cls, synergy_analyzer) -> "ScoreColumns":
+        """在内存中为所有三人队伍评分（不写入文件）"""
+        data_manager = synergy_analyzer.data_manager
+        meta = {
+            "format_version": COLUMNS_FORMAT_VERSION,
+            "data_hash": getattr(data_manager, "data_hash", ""),
+            "rules_version": SCORING_RULES_VERSION,
+            "hero_names": data_manager.get_all_hero_names()
+        }
+        columns = build_score_columns(synergy_analyzer)
+        meta["team_count"] = int(len(columns["total"]))
+        return cls(meta, columns["teams"], columns["total"], columns["components"])
+
+    @classmethod
+    def load(cls, directory: str) -> Optional["ScoreColumns"]:
+        """以内存映射方式加载列式文件，文件不存在或不完整时返回None"""
+        meta_path = os.path.join(directory, META_FILENAME)
+        if not os.path.exists(meta_path):
+            return None
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta.get("format_version") != COLUMNS_FORMAT_VERSION:
+                return None
+            arrays = [np.load(os.path.join(directory, f"{name}.npy"), mmap_mode='r')
+                      for name in ("teams", "total", "components")]
+        except (OSError, ValueError) as e:
+            print(f"加载队伍评分文件时出错: {e}")
+            return None
+
+        teams, total, components = arrays
+        team_count = meta.get("team_count")
+        if len(teams) != team_count or len(total) != team_count or len(components) != team_count:
+            return None
+        return cls(meta, teams, total, components)
+
+    def is_current(self, data_manager) -> bool:
+        """检查文件是否与当前数据和评分规则一致"""
+        return (self.data_hash == getattr(data_manager, "data_hash", "") and
+                self.rules_version == SCORING_RULES_VERSION and
+                self.hero_names == data_manager.get_all_hero_names())
+
+    def row_index(self, teams: np.ndarray) -> np.ndarray:
+        """计算(a < b < c)队伍在文件中的行号（组合的字典序排名）"""
+        teams = np.asarray(teams, dtype=np.int64).reshape(-1, 3)
+        a, b, c = teams[:, 0], teams[:, 1], teams[:, 2]
+        n = len(self.hero_names)
+        return (_comb3(n) - _comb3(n - a) +
+                _comb2(n - a - 1) - _comb2(n - b) +
+                (c - b - 1))
+
+    def lookup(self, teams: np.ndarray, weights: Optional[Sequence[float]] = None) -> np.ndarray:
+        """读取(N, 3)队伍的评分，队伍中的武将须按索引升序排列
+
+        评分与队伍中武将的先后顺序有关（兵种相克、浮点求和顺序），文件只保存
+        升序排列的队伍。weights为自定义权重时按权重合并保存的子评分。
+        """
+        rows = self.row_index(teams)
+        if weights is None:
+            return np.asarray(self.total[rows])
+        return combine_components(np.asarray(self.components[rows]), weights)
+
+    def lookup_components(self, teams: np.ndarray) -> np.ndarray:
+        """读取(N, 3)升序队伍的(N, 4)子评分（标签, 兵种, 阵营, 战法）"""
+        return np.asarray(self.components[self.row_index(teams)])
+
+    def top_k(self, count: int, candidates: Optional[Sequence[int]] = None,
+              chunk_size: int = DEFAULT_CHUNK_SIZE,
+              weights: Optional[Sequence[float]] = None) -> List[Tuple[Tuple[int, int, int], float]]:
+        """在三名武将都属于candidates（按索引升序）的队伍中选出评分最高的count支
+
+        不指定candidates时直接扫描全部评分，否则按组合排名只读取候选队伍所在的行。
+        必选武将的队伍以该武将开头评分，与文件中的升序队伍不同，不能由文件回答。
+        指定weights时按自定义权重合并保存的子评分，无需重新计算评分规则。
+
+        Returns:
+            [(武将索引三元组, 评分)]，评分相同的队伍保持枚举顺序
+        """
+        if count <= 0 or len(self.total) == 0:
+            return []
+        if candidates is None:
+            if weights is None:
+                scores = np.asarray(self.total)
+            else:
+                scores = combine_components(np.asarray(self.components), weights)
+            best_teams, best_scores = select_top_k(np.asarray(self.teams), scores, count)
+        else:
+            candidates = np.asarray(candidates, dtype=np.intp)
+            best_teams = np.empty((0, 3), dtype=np.intp)
+            best_scores = np.empty(0, dtype=np.float64)
+            for teams in iter_team_chunks(candidates, chunk_size=chunk_size):
+                scores = self.lookup(teams, weights=weights)
+                best_teams = np.concatenate([best_teams, teams])
+                best_scores = np.concatenate([best_scores, scores])
+                best_teams, best_scores = select_top_k(best_teams, best_scores, count)
+        return [(tuple(int(i) for i in team), float(score))
+                for team, score in zip(best_teams, best_scores)]
+
+
+def _comb2(n):
+    return n * (n - 1) // 2
+
+
+def _comb3(n):
+    return n * (n - 1) * (n - 2) // 6
+
+
+class ScoreColumnsProvider:
+    """管理全量队伍评分列式文件的加载和后台重新生成
+
+    文件与当前数据不一致时get()返回None（调用方回退到实时评分），同时在
+    后台线程中重新生成文件。
+    """
+
+    def __init__(self, synergy_analyzer, directory: str, auto_rebuild: bool = True):
+        self.synergy_analyzer = synergy_analyzer
+        self.directory = directory
+        self.auto_rebuild = auto_rebuild
+        self._columns = None
+        self._lock = threading.Lock()
+        self._rebuild_thread = None
+
+    def get(self) -> Optional[ScoreColumns]:
+        """获取与当前数据一致的列式文件"""
+        data_manager = self.synergy_analyzer.data_manager
+        columns = self._columns
+        if columns is not None and columns.is_current(data_manager):
+            return columns
+
+        columns = ScoreColumns.load(self.directory)
+        if columns is not None and columns.is_current(data_manager):
+            self._columns = columns
+            return columns
+
+        self._columns = None
+        if self.auto_rebuild:
+            self.rebuild_async()
+        return None
+
+    def rebuild_async(self) -> threading.Thread:
+        """在后台线程中重新生成列式文件（已有生成任务时不重复启动）"""
+        with self._lock:
+            if self._rebuild_thread is None or not self._rebuild_thread.is_alive():
+                self._rebuild_thread = threading.Thread(target=self._rebuild, daemon=True)
+                self._rebuild_thread.start()
+            return self._rebuild_thread
+
+    def _rebuild(self):
+        try:
+            write_score_columns(self.directory, self.synergy_analyzer)
+            print(f"队伍评分文件已重新生成: {self.directory}")
+        except Exception as e:
+            print(f"重新生成队伍评分文件时出错: {e}")
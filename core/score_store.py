@@ -0,0 +1,122 @@
+# 持久化协同评分存储
+
+import atexit
+import sqlite3
+import threading
+from typing import Dict, Hashable, Optional
+
+# 缓冲的写入达到该数量时批量写入数据库
+DEFAULT_FLUSH_SIZE = 500
+
+
+class ScoreStore:
+    """基于SQLite的持久化协同评分存储
+
+    评分按(数据文件内容哈希, 评分规则版本)分区保存，进程重启后可以直接复用。
+    当前分区在首次查询时一次性载入内存，写入先缓冲再批量提交。
+    数据文件或评分规则变化后切换到新分区，并删除其他分区的旧评分。
+    """
+
+    def __init__(self, db_path: str, flush_size: int = DEFAULT_FLUSH_SIZE):
+        self.db_path = db_path
+        self.flush_size = flush_size
+        self.data_hash = None
+        self.rules_version = None
+        self._scores: Optional[Dict[str, float]] = None
+        self._pending: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS synergy_scores ("
+            "data_hash TEXT NOT NULL, "
+            "rules_version INTEGER NOT NULL, "
+            "team_key TEXT NOT NULL, "
+            "score REAL NOT NULL, "
+            "PRIMARY KEY (data_hash, rules_version, team_key))"
+        )
+        self._conn.commit()
+        atexit.register(self.close)
+
+    def activate(self, data_hash: str, rules_version: int) -> None:
+        """切换到指定数据哈希和规则版本的分区，并删除其他分区的旧评分"""
+        with self._lock:
+            if self._conn is None:
+                return
+            if (data_hash, rules_version) == (self.data_hash, self.rules_version):
+                return
+            self._flush_locked()
+            self.data_hash = data_hash
+            self.rules_version = rules_version
+            self._scores = None
+            self._conn.execute(
+                "DELETE FROM synergy_scores WHERE data_hash != ? OR rules_version != ?",
+                (data_hash, rules_version))
+            self._conn.commit()
+
+    def get(self, team_key: Hashable) -> Optional[float]:
+        """查询评分，未保存时返回None"""
+        key = _encode_key(team_key)
+        with self._lock:
+            if self._conn is None or self.data_hash is None:
+                return None
+            if self._scores is None:
+                self._load_locked()
+            score = self._pending.get(key)
+            if score is None:
+                score = self._scores.get(key)
+            return score
+
+    def put(self, team_key: Hashable, score: float) -> None:
+        """缓冲写入评分"""
+        key = _encode_key(team_key)
+        with self._lock:
+            if self._conn is None or self.data_hash is None:
+                return
+            self._pending[key] = score
+            if len(self._pending) >= self.flush_size:
+                self._flush_locked()
+
+    def flush(self) -> None:
+        """把缓冲的评分写入数据库"""
+        with self._lock:
+            self._flush_locked()
+
+    def close(self) -> None:
+        """写入缓冲的评分并关闭数据库"""
+        with self._lock:
+            if self._conn is None:
+                return
+            self._flush_locked()
+            self._conn.close()
+            self._conn = None
+
+    def __len__(self):
+        with self._lock:
+            if self._conn is None or self.data_hash is None:
+                return 0
+            if self._scores is None:
+                self._load_locked()
+            return len(self._scores.keys() | self._pending.keys())
+
+    def _load_locked(self):
+        rows = self._conn.execute(
+            "SELECT team_key, score FROM synergy_scores WHERE data_hash = ? AND rules_version = ?",
+            (self.data_hash, self.rules_version))
+        self._scores = dict(rows)
+
+    def _flush_locked(self):
+        if self._conn is None or not self._pending:
+            return
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO synergy_scores (data_hash, rules_version, team_key, score) "
+            "VALUES (?, ?, ?, ?)",
+            [(self.data_hash, self.rules_version, key, score) for key, score in self._pending.items()])
+        self._conn.commit()
+        if self._scores is not None:
+            self._scores.update(self._pending)
+        self._pending = {}
+
+
+def _encode_key(team_key) -> str:
+    """把武将索引元组编码为字符串键"""
+    return ",".join(str(i) for i in team_key)
@@ -0,0 +1,200 @@
+# 战法配置优化
+
+import heapq
+import itertools
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from core.lru_cache import LRUCache, MISSING
+from core.synergy_analyzer import SCORE_WEIGHTS
+
+# 每个武将可学习的战法数量（自带战法之外）
+LEARNED_SKILL_SLOTS = 2
+
+# 可以学习的战法来源（自带战法只能由武将本身使用）
+LEARNABLE_SKILL_SOURCES = ("传承", "事件")
+
+# 缓存的战法类型组合搜索结果数量
+LOADOUT_CACHE_SIZE = 1024
+
+
+class SkillLoadoutOptimizer:
+    """为三人队伍搜索战法协同评分最高的战法配置
+
+    每个武将保留自带战法，另外学习LEARNED_SKILL_SLOTS个战法，同一战法在队伍
+    中只能使用一次。战法协同评分只取决于队伍中战法类型的多重集合，因此先
+    按类型搜索：在每种类型可用战法数量的限制下，枚举学习战法的类型组合并
+    按协同总值的上界剪枝；再为选中的类型组合分配具体战法。类型组合的搜索
+    结果按(自带战法类型, 各类型可用数量)缓存。
+    """
+
+    def __init__(self, synergy_analyzer, learned_slots: int = LEARNED_SKILL_SLOTS):
+        self.synergy_analyzer = synergy_analyzer
+        self.learned_slots = learned_slots
+        self._data_version = None
+        self._learnable = []
+        self._search_cache = LRUCache(LOADOUT_CACHE_SIZE)
+
+    def optimize(self, team_heroes: List[str], count: int = 5,
+                 available_skills: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """搜索队伍战法协同评分最高的count个战法配置
+
+        Args:
+            team_heroes: 队伍武将名称
+            count: 返回的配置数量
+            available_skills: 可学习的战法名称（如玩家拥有的战法），None表示全部
+
+        Returns:
+            {"队伍": [...], "配置": [{"战法配置": {武将: [战法]}, "战法评分": ..., "综合评分": ...}]}
+        """
+        if not team_heroes:
+            return {"error": "队伍不能为空"}
+        if len(set(team_heroes)) != len(team_heroes):
+            return {"error": "队伍中存在重复的武将"}
+
+        compiled = self.synergy_analyzer.get_compiled_heroes()
+        self._refresh(compiled)
+        records = []
+        for hero_name in team_heroes:
+            record = compiled.get(hero_name)
+            if record is None:
+                return {"error": f"未找到武将 {hero_name} 的信息"}
+            records.append(record)
+
+        # 每个武将的自带战法（传承战法被学习的战法替换）
+        own_skills = [_own_skill_slots(record) for record in records]
+        own_types = tuple(skill_type for types, _ in own_skills for skill_type in types)
+        used_skill_ids = {skill_id for _, ids in own_skills for skill_id in ids}
+
+        # 每种类型可学习的战法（排除队伍中武将的自带战法）
+        allowed = None if available_skills is None else set(available_skills)
+        pools = [
+            [(skill_id, name) for skill_id, name in pool
+             if skill_id not in used_skill_ids and (allowed is None or name in allowed)]
+            for pool in self._learnable
+        ]
+        caps = tuple(len(pool) for pool in pools)
+
+        slots = self.learned_slots * len(records)
+        cache_key = (compiled.data_version, tuple(sorted(own_types)), caps, slots, count)
+        best_types = self._search_cache.get(cache_key)
+        if best_types is MISSING:
+            best_types = self._search_type_multisets(
+                compiled.skill_synergy_matrix, own_types, caps, slots, count)
+            self._search_cache.put(cache_key, best_types)
+
+        other_components = self._other_components(team_heroes)
+        loadouts = []
+        for learned_types in best_types:
+            loadouts.append(self._build_loadout(
+                team_heroes, records, own_skills, pools, learned_types, compiled, other_components))
+        return {"队伍": team_heroes, "配置": loadouts}
+
+    def _refresh(self, compiled):
+        """数据版本变化后重新整理各类型可学习的战法"""
+        if self._data_version == compiled.data_version:
+            return
+        data_manager = self.synergy_analyzer.data_manager
+        self._learnable = [[] for _ in compiled.skill_type_vocab]
+        for skill_id, skill_name in enumerate(compiled.skill_names):
+            skill_info = data_manager.get_skill_by_name(skill_name)
+            if not skill_info or skill_info.get("来源") not in LEARNABLE_SKILL_SOURCES:
+                continue
+            skill_type = skill_info.get("类型")
+            if skill_type in compiled.skill_type_ids:
+                self._learnable[compiled.skill_type_ids[skill_type]].append((skill_id, skill_name))
+        self._data_version = compiled.data_version
+
+    def _search_type_multisets(self, matrix, own_types, caps, slots, count) -> List[Tuple[int, ...]]:
+        """搜索协同总值最高的count个学习战法类型组合（类型编号非递减排列）
+
+        战法总数固定，协同对数量固定，战法协同评分随协同总值单调不减，因此
+        按协同总值排序即可。
+        """
+        type_count = len(caps)
+        # 每个类型与自带战法之间的协同值之和
+        own_gain = [sum(matrix[t][o] for o in own_types) for t in range(type_count)]
+        max_pair = max((matrix[a][b] for a in range(type_count) for b in range(type_count)
+                        if caps[a] and caps[b]), default=0)
+        max_gain = max((own_gain[t] for t in range(type_count) if caps[t]), default=0)
+
+        heap: List[Tuple[int, int, Tuple[int, ...]]] = []
+        sequence = [0]
+
+        def search(start, chosen, total):
+            placed = len(chosen)
+            if placed == slots:
+                entry = (total, -sequence[0], tuple(chosen))
+                sequence[0] += 1
+                if len(heap) < count:
+                    heapq.heappush(heap, entry)
+                elif entry[:2] > heap[0][:2]:
+                    heapq.heapreplace(heap, entry)
+                return
+            # 上界：剩余每个战法与自带战法的协同取最大值，新增的战法对都取最大协同值
+            remaining = slots - placed
+            new_pairs = remaining * placed + remaining * (remaining - 1) // 2
+            if len(heap) >= count and total + remaining * max_gain + new_pairs * max_pair <= heap[0][0]:
+                return
+            for t in range(start, type_count):
+                if chosen.count(t) >= caps[t]:
+                    continue
+                gain = own_gain[t] + sum(matrix[t][c] for c in chosen)
+                chosen.append(t)
+                search(t, chosen, total + gain)
+                chosen.pop()
+
+        if slots <= sum(caps) and count > 0:
+            search(0, [], 0)
+        heap.sort(key=lambda entry: (-entry[0], -entry[1]))
+        return [types for _, _, types in heap]
+
+    def _other_components(self, team_heroes):
+        """队伍的标签、兵种、阵营子评分（与战法配置无关）"""
+        indices = self.synergy_analyzer.get_hero_indices(team_heroes)
+        if len(indices) != 3:
+            return None
+        _, components = self.synergy_analyzer.calculate_synergy_scores([indices], return_components=True)
+        return components[0]
+
+    def _build_loadout(self, team_heroes, records, own_skills, pools, learned_types, compiled, other_components):
+        """为类型组合分配具体战法，依次分给各武将"""
+        next_position = [0] * len(pools)
+        learned = []
+        for skill_type in learned_types:
+            skill_id, skill_name = pools[skill_type][next_position[skill_type]]
+            learned.append((skill_type, skill_name))
+            next_position[skill_type] += 1
+
+        loadout = {}
+        loadout_records = []
+        skill_names = compiled.skill_names
+        for i, (hero_name, record) in enumerate(zip(team_heroes, records)):
+            own_types, own_ids = own_skills[i]
+            hero_learned = learned[i * self.learned_slots:(i + 1) * self.learned_slots]
+            loadout[hero_name] = [skill_names[skill_id] for skill_id in own_ids] + [name for _, name in hero_learned]
+            learned_type_ids = tuple(skill_type for skill_type, _ in hero_learned)
+            loadout_records.append(record._replace(skill_types=own_types + learned_type_ids))
+
+        skill_score = self.synergy_analyzer._calculate_skill_synergy(loadout_records, compiled)
+        # 战法评分达到上限时，平均协同值仍可区分不同配置
+        skill_types = [skill_type for record in loadout_records for skill_type in record.skill_types]
+        pairs = list(itertools.combinations(skill_types, 2))
+        average = sum(compiled.skill_synergy_matrix[a][b] for a, b in pairs) / len(pairs) if pairs else 0
+        result = {"战法配置": loadout, "战法评分": round(skill_score, 2), "平均协同值": round(average, 2)}
+        if other_components is not None:
+            tag_weight, troop_weight, camp_weight, skill_weight = SCORE_WEIGHTS
+            total = (
+                other_components[0] * tag_weight +
+                other_components[1] * troop_weight +
+                other_components[2] * camp_weight +
+                skill_score * skill_weight
+            )
+            result["综合评分"] = round(float(total), 2)
+        return result
+
+
+def _own_skill_slots(record) -> Tuple[Tuple[int, ...], Tuple[int, ...]]:
+    """武将的自带战法类型和编号（传承战法总是排在自带战法之后）"""
+    if record.inherited_skill_id >= 0:
+        return record.skill_types[:-1], record.skill_ids[:-1]
+    return record.skill_types, record.skill_ids
@@ -1,10 +1,96 @@
 # 战法协同分析器
 
-import hashlib
-import json
+import math
+
+import numpy as np
+
+from config import Config
+from core.lru_cache import LRUCache, MISSING
+
+# 评分规则表（评分计算与协同分解表共用）
+# 标签协同价值矩阵
+TAG_SYNERGY_VALUES = {
+    ("控制", "输出"): 90,
+    ("控制", "谋略"): 85,
+    ("输出", "谋略"): 80,
+    ("治疗", "增益"): 75,
+    ("控制", "辅助"): 70,
+    ("防御", "辅助"): 65
+}
+
+# 兵种相克关系：骑兵→盾兵→弓兵→枪兵→骑兵
+TROOP_ADVANTAGE = {
+    "骑兵": "盾兵",
+    "盾兵": "弓兵",
+    "弓兵": "枪兵",
+    "枪兵": "骑兵"
+}
+
+# 兵种适性等级值
+FITNESS_VALUES = {"S": 5, "A": 4, "B": 3, "C": 2}
+
+# 战法协同规则
+SKILL_SYNERGY_RULES = {
+    ("主动", "被动"): 90,
+    ("指挥", "主动"): 85,
+    ("追击", "输出"): 80,
+    ("控制", "输出"): 75,
+    ("治疗", "增益"): 70
+}
+
+# 战法之间未命中任何协同规则时的默认协同值
+DEFAULT_SKILL_SYNERGY = 30
+
+# 综合评分权重：标签、兵种、阵营、战法
+SCORE_WEIGHTS = (0.25, 0.25, 0.15, 0.35)
+
+# 自定义权重时各子评分的名称（与SCORE_WEIGHTS顺序一致）
+SCORE_WEIGHT_NAMES = ("tag", "troop", "camp", "skill")
+
+# 评分规则版本，修改上述规则或评分算法时需要递增，使持久化的评分失效
+SCORING_RULES_VERSION = 1
+
+
+def parse_score_weights(weights):
+    """解析自定义评分权重，归一化为和为1，使综合评分保持在0-100之间
+
+    Args:
+        weights: None（默认权重）、四个数的列表，或以tag、troop、camp、skill为键的字典
+            （省略的键使用默认权重）
+
+    Returns:
+        (标签, 兵种, 阵营, 战法)权重元组
+
+    Raises:
+        ValueError: 权重格式有误、不是有限数、为负数或全为0
+    """
+    if weights is None:
+        return SCORE_WEIGHTS
+    if isinstance(weights, dict):
+        unknown = set(weights) - set(SCORE_WEIGHT_NAMES)
+        if unknown:
+            raise ValueError(f"未知的权重项: {', '.join(sorted(unknown))}")
+        weights = [weights.get(name, default) for name, default in zip(SCORE_WEIGHT_NAMES, SCORE_WEIGHTS)]
+    if not isinstance(weights, (list, tuple)) or len(weights) != len(SCORE_WEIGHTS):
+        raise ValueError("权重必须为四个数的列表或以tag、troop、camp、skill为键的字典")
+    if not all(isinstance(w, (int, float)) and not isinstance(w, bool) and math.isfinite(w) for w in weights):
+        raise ValueError("权重必须为有限的数字")
+    if any(w < 0 for w in weights) or not any(weights):
+        raise ValueError("权重不能为负数且不能全为0")
+    # 先除以最大值，避免很大的权重求和时溢出
+    largest = float(max(weights))
+    scaled = [float(w) / largest for w in weights]
+    total = math.fsum(scaled)
+    return tuple(w / total for w in scaled)
+
+
+def popcount(mask):
+    """统计位掩码中1的个数"""
+    return bin(mask).count("1")
+
 
 class SynergyAnalyzer:
-    def __init__(self, data_manager):
+    def __init__(self, data_manager, score_store=None):
         self.data_manager = data_manager
         # 定义协同规则
         self.synergy_rules = {
@@ -15,9 +101,60 @@ class SynergyAnalyzer:
             "heal_buff": 75,        # 治疗+增益协同
             "same_type": 60         # 同类效果协同
         }
-        # 协同评分缓存
-        self._score_cache = {}
-        self._cache_max_size = 10000
+        # 协同评分缓存，键为排序后的武将索引元组
+        self._score_cache = LRUCache(Config.SCORE_CACHE_SIZE)
+        # 可选的持久化评分存储（ScoreStore），进程重启后复用已计算的评分
+        self._score_store = score_store
+        # 编译后的武将记录和协同评分分解表（按需构建）
+        self._compiled_heroes = None
+        self._synergy_tables = None
+    
+    def get_compiled_heroes(self):
+        """获取编译后的武将记录，数据版本变化后自动重新编译"""
+        data_version = getattr(self.data_manager, "data_version", 0)
+        if self._compiled_heroes is None or self._compiled_heroes.data_version != data_version:
+            from core.hero_compiler import CompiledHeroes
+            compiled = self.load_snapshot_artifact("compiled_heroes")
+            if compiled is None:
+                compiled = CompiledHeroes(self.data_manager)
+                self.save_snapshot_artifact("compiled_heroes", compiled)
+            compiled.data_version = data_version
+            self._compiled_heroes = compiled
+            # 数据变化后缓存的评分失效
+            self._score_cache.clear()
+            if self._score_store is not None:
+                self._score_store.activate(getattr(self.data_manager, "data_hash", ""),
+                                           SCORING_RULES_VERSION)
+        return self._compiled_heroes
+    
+    def get_synergy_tables(self):
+        """获取协同评分分解表，数据版本变化后自动重建"""
+        data_version = getattr(self.data_manager, "data_version", 0)
+        if self._synergy_tables is None or self._synergy_tables.data_version != data_version:
+            from core.synergy_tables import SynergyTables
+            tables = self.load_snapshot_artifact("synergy_tables")
+            if tables is None:
+                tables = SynergyTables(self.data_manager, self)
+                self.save_snapshot_artifact("synergy_tables", tables)
+            else:
+                tables.data_manager = self.data_manager
+                tables.synergy_analyzer = self
+            tables.data_version = data_version
+            self._synergy_tables = tables
+        return self._synergy_tables
+    
+    def load_snapshot_artifact(self, name):
+        """从数据快照中读取由当前数据和评分规则构建的派生数据，没有时返回None"""
+        get_artifact = getattr(self.data_manager, "get_snapshot_artifact", None)
+        if get_artifact is None:
+            return None
+        return get_artifact((name, SCORING_RULES_VERSION))
+    
+    def save_snapshot_artifact(self, name, artifact):
+        """把由当前数据和评分规则构建的派生数据保存到数据快照"""
+        save_artifact = getattr(self.data_manager, "save_snapshot_artifact", None)
+        if save_artifact is not None:
+            save_artifact((name, SCORING_RULES_VERSION), artifact)
     
     def analyze_synergy(self, team_heroes):
         """分析队伍中武将的协同效应"""
@@ -86,69 +223,179 @@ class SynergyAnalyzer:
             "综合建议": recommendations
         }
     
-    def calculate_synergy_score(self, hero_team):
-        """计算队伍协同评分 - 带缓存优化"""
-        # 生成缓存键
+    def calculate_synergy_score(self, hero_team, weights=None):
+        """计算队伍协同评分 - 带缓存优化
+        
+        weights为自定义的(标签, 兵种, 阵营, 战法)权重，与默认权重不同时直接计算，不经过缓存
+        """
+        if weights is not None and tuple(weights) != SCORE_WEIGHTS:
+            return self._calculate_synergy_score_internal(hero_team, weights)
+        
+        # 生成缓存键，队伍中有找不到的武将时评分为0，无需缓存
         cache_key = self._generate_cache_key(hero_team)
+        if cache_key is None:
+            return self._calculate_synergy_score_internal(hero_team)
         
         # 检查缓存
-        if cache_key in self._score_cache:
-            return self._score_cache[cache_key]
+        score = self._score_cache.get(cache_key)
+        if score is not MISSING:
+            return score
         
-        # 计算协同评分
-        score = self._calculate_synergy_score_internal(hero_team)
+        # 检查持久化存储，没有时计算协同评分并写入
+        score = self._score_store.get(cache_key) if self._score_store is not None else None
+        if score is None:
+            score = self._calculate_synergy_score_internal(hero_team)
+            if self._score_store is not None:
+                self._score_store.put(cache_key, score)
         
         # 更新缓存
-        self._update_cache(cache_key, score)
+        self._score_cache.put(cache_key, score)
         
         return score
     
+    def get_cache_stats(self):
+        """获取协同评分缓存的统计信息"""
+        stats = {"score": self._score_cache.stats()}
+        if self._score_store is not None:
+            stats["score_store"] = {"size": len(self._score_store)}
+        return stats
+    
+    def calculate_synergy_scores(self, teams, return_components=False, weights=None):
+        """批量计算三人队伍的协同评分
+        
+        全部计算在协同评分分解表上向量化完成，不经过评分缓存，结果与逐队调用
+        calculate_synergy_score完全一致。
+        
+        Args:
+            teams: (N, 3)的武将索引数组，索引为武将在get_all_hero_names()中的位置，
+                每支队伍的三名武将必须互不相同
+            return_components: 是否同时返回四项子评分
+            weights: 自定义的(标签, 兵种, 阵营, 战法)权重，默认SCORE_WEIGHTS
+        
+        Returns:
+            长度为N的评分数组；return_components为True时返回(评分数组, (N, 4)子评分数组)，
+            子评分依次为标签、兵种、阵营、战法
+        """
+        tables = self.get_synergy_tables()
+        teams = np.asarray(teams, dtype=np.intp)
+        if teams.size == 0:
+            teams = teams.reshape(0, 3)
+        if teams.ndim != 2 or teams.shape[1] != 3:
+            raise ValueError(f"队伍数组的形状应为(N, 3)，实际为{teams.shape}")
+        if len(teams) and (teams.min() < 0 or teams.max() >= len(tables)):
+            raise ValueError(f"武将索引超出范围[0, {len(tables)})")
+        if np.any((teams[:, 0] == teams[:, 1]) | (teams[:, 0] == teams[:, 2]) | (teams[:, 1] == teams[:, 2])):
+            raise ValueError("队伍中存在重复的武将")
+        return tables.score_teams(teams, return_components=return_components, weights=weights)
+    
+    def get_hero_indices(self, hero_names):
+        """把武将名称转换为calculate_synergy_scores使用的武将索引，找不到的武将记为-1"""
+        hero_index = self.get_synergy_tables().hero_index
+        return np.array([hero_index.get(name, -1) for name in hero_names], dtype=np.intp)
+    
+    def rank_replacements(self, team_heroes, slot, candidates=None, count=None):
+        """评估替换队伍中某个位置的武将后的协同评分，按评分从高到低排列候选武将
+
+        其余两名武将固定，只有包含替换位置的武将对和单武将项随候选武将变化，
+        在分解表上一次向量化查表即可得到全部候选的评分，队伍顺序保持不变。
+
+        Args:
+            team_heroes: 三名武将名称
+            slot: 被替换的位置（0-2）
+            candidates: 候选武将名称，默认为队伍以外的所有武将
+            count: 返回的候选数量，默认全部
+
+        Returns:
+            {"队伍", "替换位置", "被替换武将", "当前评分", "候选": [{"武将", "评分", "变化"}]}，
+            参数有误时返回{"error": ...}
+        """
+        if len(team_heroes) != 3 or len(set(team_heroes)) != 3:
+            return {"error": "队伍必须包含三名不同的武将"}
+        if isinstance(slot, bool) or not isinstance(slot, int) or not 0 <= slot < 3:
+            return {"error": "替换位置必须为0、1或2"}
+        if candidates is not None and (not isinstance(candidates, (list, tuple)) or
+                                       not all(isinstance(name, str) for name in candidates)):
+            return {"error": "候选武将必须为武将名称列表"}
+        if count is not None and (not isinstance(count, int) or count < 0):
+            return {"error": "候选数量必须为非负整数"}
+        tables = self.get_synergy_tables()
+        team = self.get_hero_indices(team_heroes)
+        unknown = [name for name, index in zip(team_heroes, team) if index < 0]
+        if unknown:
+            return {"error": f"未找到武将 {', '.join(unknown)} 的信息"}
+
+        if candidates is None:
+            candidate_indices = np.arange(len(tables), dtype=np.intp)
+        else:
+            candidate_indices = self.get_hero_indices(candidates)
+            candidate_indices = np.unique(candidate_indices[candidate_indices >= 0])
+        candidate_indices = candidate_indices[~np.isin(candidate_indices, team)]
+
+        teams = np.tile(team, (len(candidate_indices) + 1, 1))
+        teams[1:, slot] = candidate_indices
+        scores = tables.score_teams(teams)
+        current_score = float(scores[0])
+        scores = scores[1:]
+        # 评分相同的候选按武将顺序排列
+        order = np.argsort(-scores, kind="stable")
+        if count is not None:
+            order = order[:count]
+        return {
+            "队伍": list(team_heroes),
+            "替换位置": slot,
+            "被替换武将": team_heroes[slot],
+            "当前评分": current_score,
+            "候选": [
+                {
+                    "武将": tables.hero_names[candidate_indices[i]],
+                    "评分": float(scores[i]),
+                    "变化": round(float(scores[i]) - current_score, 2)
+                }
+                for i in order
+            ]
+        }
+
     def _generate_cache_key(self, hero_team):
-        """生成缓存键"""
-        # 对武将列表排序以确保相同队伍的不同顺序使用同一缓存
-        sorted_team = sorted(hero_team)
-        team_str = json.dumps(sorted_team, ensure_ascii=False)
-        # 使用MD5生成固定长度的键
-        return hashlib.md5(team_str.encode('utf-8')).hexdigest()
-    
-    def _update_cache(self, cache_key, score):
-        """更新缓存"""
-        # 如果缓存已满，删除一部分旧缓存
-        if len(self._score_cache) >= self._cache_max_size:
-            # 删除10%最旧的缓存项
-            keys_to_remove = list(self._score_cache.keys())[:self._cache_max_size // 10]
-            for key in keys_to_remove:
-                del self._score_cache[key]
-        
-        self._score_cache[cache_key] = score
-    
-    def _calculate_synergy_score_internal(self, hero_team):
+        """生成缓存键：排序后的武将索引元组，队伍中有找不到的武将时返回None"""
+        compiled = self.get_compiled_heroes()
+        indices = []
+        for hero_name in hero_team:
+            record = compiled.get(hero_name)
+            if record is None:
+                return None
+            indices.append(record.index)
+        # 对武将索引排序以确保相同队伍的不同顺序使用同一缓存
+        return tuple(sorted(indices))
+    
+    def _calculate_synergy_score_internal(self, hero_team, weights=SCORE_WEIGHTS):
         """内部计算协同评分的方法"""
         if not hero_team or len(hero_team) == 0:
             return 0
         
-        # 获取队伍中每个武将的信息
-        heroes_info = {}
+        # 获取队伍中每个武将的编译记录（重复的武将只计一次）
+        compiled = self.get_compiled_heroes()
+        records = {}
         for hero_name in hero_team:
-            hero_info = self.data_manager.get_hero_by_name(hero_name)
-            if hero_info:
-                heroes_info[hero_name] = hero_info
-            else:
+            record = compiled.get(hero_name)
+            if record is None:
                 return 0  # 如果找不到武将信息，返回0分
+            records.setdefault(hero_name, record)
+        records = list(records.values())
         
         # 计算各项协同得分
-        tag_score = self._calculate_tag_synergy(heroes_info)
-        troop_score = self._calculate_troop_synergy(heroes_info)
-        camp_score = self._calculate_camp_synergy(heroes_info)
-        skill_score = self._calculate_skill_synergy(heroes_info)
+        tag_score = self._calculate_tag_synergy(records, compiled)
+        troop_score = self._calculate_troop_synergy(records)
+        camp_score = self._calculate_camp_synergy(records)
+        skill_score = self._calculate_skill_synergy(records, compiled)
         
         # 根据游戏机制调整权重
         # 战法协同最重要(35%)，其次是标签协同(25%)，兵种协同(25%)，阵营协同(15%)
+        tag_weight, troop_weight, camp_weight, skill_weight = weights
         total_score = (
-            tag_score * 0.25 +
-            troop_score * 0.25 +
-            camp_score * 0.15 +
-            skill_score * 0.35
+            tag_score * tag_weight +
+            troop_score * troop_weight +
+            camp_score * camp_weight +
+            skill_score * skill_weight
         )
         
         return round(total_score, 2)
@@ -317,25 +564,14 @@ class SynergyAnalyzer:
             inherit_skill = hero_info.get("传承战法", "")
             hero_skills[hero_name] = {"自带战法": own_skill, "传承战法": inherit_skill}
             
-            if own_skill:
-                skill_detail = self.data_manager.get_skill_by_name(own_skill)
-                if skill_detail:
-                    skills_info.append({
-                        "武将": hero_name,
-                        "战法": own_skill,
-                        "详情": skill_detail,
-                        "类型": "自带"
-                    })
-            
-            if inherit_skill:
-                skill_detail = self.data_manager.get_skill_by_name(inherit_skill)
-                if skill_detail:
-                    skills_info.append({
-                        "武将": hero_name,
-                        "战法": inherit_skill,
-                        "详情": skill_detail,
-                        "类型": "传承"
-                    })
+            # 使用武将战法关系图中已解析的战法详情
+            for skill_key, skill_name, skill_detail in self.data_manager.get_hero_skills(hero_name, hero_info):
+                skills_info.append({
+                    "武将": hero_name,
+                    "战法": skill_name,
+                    "详情": skill_detail,
+                    "类型": "自带" if skill_key == "自带战法" else "传承"
+                })
         
         # 分析战法类型分布
         skill_types = {}
@@ -510,40 +746,20 @@ class SynergyAnalyzer:
             "涉及战法": skills
         }
     
-    def _calculate_tag_synergy(self, heroes_info):
+    def _calculate_tag_synergy(self, records, compiled):
         """计算标签协同得分 - 改进版"""
-        # 定义标签协同价值矩阵
-        tag_synergy_values = {
-            ("控制", "输出"): 90,
-            ("控制", "谋略"): 85,
-            ("输出", "谋略"): 80,
-            ("治疗", "增益"): 75,
-            ("控制", "辅助"): 70,
-            ("防御", "辅助"): 65
-        }
-        
-        # 获取所有武将的标签
-        hero_tags = {}
-        all_tags = []
-        for hero_name, hero_info in heroes_info.items():
-            tags = hero_info.get("标签", [])
-            hero_tags[hero_name] = tags
-            all_tags.extend(tags)
+        tag_synergy_matrix = compiled.tag_synergy_matrix
         
         # 计算标签协同值
         total_synergy = 0
         tag_combinations = 0
         
         # 遍历武将组合，分析标签协同
-        hero_names = list(hero_tags.keys())
-        for i in range(len(hero_names)):
-            for j in range(i+1, len(hero_names)):
-                hero1_tags = hero_tags[hero_names[i]]
-                hero2_tags = hero_tags[hero_names[j]]
-                
+        for i in range(len(records)):
+            for j in range(i+1, len(records)):
                 # 计算两个武将间的标签协同
                 synergy = self._calculate_two_heroes_tag_synergy(
-                    hero1_tags, hero2_tags, tag_synergy_values)
+                    records[i].tag_ids, records[j].tag_ids, tag_synergy_matrix)
                 total_synergy += synergy
                 if synergy > 0:
                     tag_combinations += 1
@@ -555,163 +771,99 @@ class SynergyAnalyzer:
             count_bonus = min(tag_combinations * 10, 50)  # 最多50分加成
             return min(avg_synergy + count_bonus, 100)
         
-        # 回退到基础实现
-        tag_count = {}
-        for tag in all_tags:
-            tag_count[tag] = tag_count.get(tag, 0) + 1
-        
-        score = 0
-        for count in tag_count.values():
-            if count > 1:
-                score += (count - 1) * 15  # 提高单个重复标签的价值
+        # 回退到基础实现：每个重复标签计15分，重复次数 = 标签总数 - 不同标签数
+        tag_mask = 0
+        tag_count = 0
+        for record in records:
+            tag_mask |= record.tag_mask
+            tag_count += record.tag_count
+        score = (tag_count - popcount(tag_mask)) * 15  # 提高单个重复标签的价值
         
         return min(score, 100)
     
-    def _calculate_two_heroes_tag_synergy(self, tags1, tags2, synergy_values):
+    def _calculate_two_heroes_tag_synergy(self, tag_ids1, tag_ids2, synergy_matrix):
         """计算两个武将间的标签协同值"""
         max_synergy = 0
         
-        for tag1 in tags1:
-            for tag2 in tags2:
-                # 检查正向组合
-                if (tag1, tag2) in synergy_values:
-                    synergy = synergy_values[(tag1, tag2)]
-                    max_synergy = max(max_synergy, synergy)
-                # 检查反向组合
-                elif (tag2, tag1) in synergy_values:
-                    synergy = synergy_values[(tag2, tag1)]
-                    max_synergy = max(max_synergy, synergy)
+        for tag1 in tag_ids1:
+            row = synergy_matrix[tag1]
+            for tag2 in tag_ids2:
+                # 规则矩阵已包含正向和反向组合
+                synergy = row[tag2]
+                if synergy > max_synergy:
+                    max_synergy = synergy
         
         return max_synergy
     
-    def _calculate_troop_synergy(self, heroes_info):
+    def _calculate_troop_synergy(self, records):
         """计算兵种协同得分 - 改进版"""
-        # 兵种相克关系：骑兵→盾兵→弓兵→枪兵→骑兵
-        troop_advantage = {
-            "骑兵": "盾兵",
-            "盾兵": "弓兵", 
-            "弓兵": "枪兵",
-            "枪兵": "骑兵"
-        }
-        
-        # 获取队伍中所有武将的兵种信息
-        hero_troops = {}
-        for hero_name, hero_info in heroes_info.items():
-            troops = hero_info.get("兵种", {})
-            hero_troops[hero_name] = troops
-        
-        # 兵种适性等级值
-        fitness_values = {"S": 5, "A": 4, "B": 3, "C": 2}
-        
         # 计算兵种协同得分
         total_score = 0
         
         # 1. 兵种适性得分
         fitness_score = 0
-        for hero_troops_info in hero_troops.values():
-            hero_fitness_score = 0
-            for fitness in hero_troops_info.values():
-                if fitness in fitness_values:
-                    hero_fitness_score += fitness_values[fitness]
-            fitness_score += hero_fitness_score / len(hero_troops_info) if hero_troops_info else 0
+        for record in records:
+            fitness_score += record.fitness_sum / record.troop_count if record.troop_count else 0
         
         # 平均适性得分（最高25分）
-        avg_fitness_score = (fitness_score / len(hero_troops)) * 5 if hero_troops else 0
+        avg_fitness_score = (fitness_score / len(records)) * 5 if records else 0
         total_score += min(avg_fitness_score, 25)
         
         # 2. 兵种搭配得分
-        # 统计队伍中各兵种的适性分布
-        troop_distribution = {}
-        for hero_troops_info in hero_troops.values():
-            for troop_type, fitness in hero_troops_info.items():
-                if troop_type not in troop_distribution:
-                    troop_distribution[troop_type] = []
-                troop_distribution[troop_type].append(fitness)
-        
         # 计算兵种搭配多样性得分（最多25分）
-        diversity_score = min(len(troop_distribution) * 8, 25)
+        troop_mask = 0
+        for record in records:
+            troop_mask |= record.troop_mask
+        diversity_score = min(popcount(troop_mask) * 8, 25)
         total_score += diversity_score
         
         # 3. 兵种相克得分
         advantage_score = 0
-        hero_names = list(hero_troops.keys())
-        for i in range(len(hero_names)):
-            for j in range(i+1, len(hero_names)):
-                hero1_troops = hero_troops[hero_names[i]]
-                hero2_troops = hero_troops[hero_names[j]]
+        for i in range(len(records)):
+            for j in range(i+1, len(records)):
+                hero2_troop_mask = records[j].troop_mask
                 
                 # 检查是否存在兵种相克关系
-                for troop1, fitness1 in hero1_troops.items():
-                    if troop1 in troop_advantage:
-                        advantage_troop = troop_advantage[troop1]
-                        if advantage_troop in hero2_troops:
-                            # 存在相克关系，加分
-                            advantage_score += 5
+                for advantage_troop in records[i].advantage_targets:
+                    if hero2_troop_mask >> advantage_troop & 1:
+                        # 存在相克关系，加分
+                        advantage_score += 5
         
         total_score += min(advantage_score, 25)
         
         # 4. S级兵种加成
         s_troop_bonus = 0
-        for hero_troops_info in hero_troops.values():
-            for fitness in hero_troops_info.values():
-                if fitness == "S":
-                    s_troop_bonus += 5
+        for record in records:
+            s_troop_bonus += record.s_count * 5
         
         total_score += min(s_troop_bonus, 25)
         
         return min(total_score, 100)
     
-    def _calculate_camp_synergy(self, heroes_info):
+    def _calculate_camp_synergy(self, records):
         """计算阵营协同得分"""
-        # 获取所有武将的阵营
-        camps = []
-        for hero_info in heroes_info.values():
-            camp = hero_info.get("阵营", "")
-            camps.append(camp)
-        
         # 如果所有武将属于同一阵营，获得阵营加成
-        if len(set(camps)) == 1 and camps[0] != "":
+        camp_id = records[0].camp_id
+        if camp_id >= 0 and all(record.camp_id == camp_id for record in records):
             return 100
         return 0
     
-    def _calculate_skill_synergy(self, heroes_info):
+    def _calculate_skill_synergy(self, records, compiled):
         """计算战法协同得分 - 改进版"""
-        # 获取队伍中所有武将的战法信息
-        skills_info = []
-        for hero_name, hero_info in heroes_info.items():
-            own_skill = hero_info.get("自带战法", "")
-            inherit_skill = hero_info.get("传承战法", "")
-            if own_skill:
-                skill_detail = self.data_manager.get_skill_by_name(own_skill)
-                if skill_detail:
-                    skills_info.append({
-                        "hero": hero_name,
-                        "skill": own_skill,
-                        "detail": skill_detail,
-                        "type": "own"
-                    })
-            if inherit_skill:
-                skill_detail = self.data_manager.get_skill_by_name(inherit_skill)
-                if skill_detail:
-                    skills_info.append({
-                        "hero": hero_name,
-                        "skill": inherit_skill,
-                        "detail": skill_detail,
-                        "type": "inherit"
-                    })
+        # 队伍中所有武将的战法类型（已按自带、传承顺序解析）
+        skill_types = [skill_type for record in records for skill_type in record.skill_types]
+        skill_synergy_matrix = compiled.skill_synergy_matrix
         
         # 分析战法间协同关系
         total_synergy = 0
         synergy_pairs = 0
         
         # 遍历战法组合，分析协同效应
-        for i in range(len(skills_info)):
-            for j in range(i+1, len(skills_info)):
-                skill1 = skills_info[i]
-                skill2 = skills_info[j]
-                
+        for i in range(len(skill_types)):
+            for j in range(i+1, len(skill_types)):
                 # 计算两个战法间的协同值
-                synergy = self._calculate_two_skills_synergy(skill1, skill2)
+                synergy = self._calculate_two_skills_synergy(
+                    skill_types[i], skill_types[j], skill_synergy_matrix)
                 total_synergy += synergy
                 synergy_pairs += 1
         
@@ -723,36 +875,12 @@ class SynergyAnalyzer:
             return min(avg_synergy + count_bonus, 100)
         
         # 默认基础分
-        hero_count = len(heroes_info)
+        hero_count = len(records)
         return min(hero_count * 20, 100)
     
-    def _calculate_two_skills_synergy(self, skill1, skill2):
-        """计算两个战法间的协同值"""
-        # 获取战法详情
-        detail1 = skill1["detail"]
-        detail2 = skill2["detail"]
-        
-        # 战法协同规则
-        synergy_rules = {
-            ("主动", "被动"): 90,
-            ("指挥", "主动"): 85,
-            ("追击", "输出"): 80,
-            ("控制", "输出"): 75,
-            ("治疗", "增益"): 70
-        }
-        
-        # 获取战法类型
-        type1 = detail1.get("类型", "未知")
-        type2 = detail2.get("类型", "未知")
-        
-        # 检查协同规则
-        if (type1, type2) in synergy_rules:
-            return synergy_rules[(type1, type2)]
-        elif (type2, type1) in synergy_rules:
-            return synergy_rules[(type2, type1)]
-        
-        # 默认协同值
-        return 30
+    def _calculate_two_skills_synergy(self, skill_type1, skill_type2, synergy_matrix):
+        """计算两个战法间的协同值（规则矩阵已包含正向、反向组合和默认协同值）"""
+        return synergy_matrix[skill_type1][skill_type2]
     
     def _analyze_tags(self, heroes_info):
         """分析队伍标签组合"""
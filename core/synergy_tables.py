@@ -0,0 +1,374 @@
+# 协同评分分解表
+
+import copy
+import itertools
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.synergy_analyzer import SCORE_WEIGHTS
+
+# 每个分块最多评分的队伍数量，避免一次性生成过大的数组
+DEFAULT_CHUNK_SIZE = 200000
+
+# 评分所需的全部数组属性，可据此在进程间共享分解表
+TABLE_ARRAY_NAMES = (
+    "tag_present", "tag_count", "tag_pair",
+    "troop_fitness", "troop_present", "troop_s_bonus", "troop_advantage",
+    "camp_ids",
+    "skill_counts", "skill_intra", "skill_cross",
+)
+
+
+class SynergyTables:
+    """协同评分分解表
+
+    将SynergyAnalyzer中的标签、兵种、阵营、战法四项子评分拆解为单武将表和
+    武将对表，构建一次后即可用NumPy向量化地为任意三人队伍评分。
+    分解后的计算顺序与SynergyAnalyzer逐队计算时完全一致，评分结果相同。
+    """
+
+    def __init__(self, data_manager, synergy_analyzer):
+        self.data_manager = data_manager
+        self.synergy_analyzer = synergy_analyzer
+
+        # 分解表由编译后的武将记录构建，与逐队评分共用同一份规则查找表
+        compiled = synergy_analyzer.get_compiled_heroes()
+        self.data_version = compiled.data_version
+        self.hero_names = list(compiled.hero_names)
+        self.hero_index = {name: i for i, name in enumerate(self.hero_names)}
+
+        records = compiled.records
+        self._build_tag_tables(records, compiled)
+        self._build_troop_tables(records, compiled)
+        self._build_camp_tables(records, compiled)
+        self._build_skill_tables(records, compiled)
+
+    def __len__(self):
+        return len(self.hero_names)
+
+    def __getstate__(self):
+        # 写入数据快照时不保存DataManager和SynergyAnalyzer，读取后由SynergyAnalyzer重新关联
+        state = self.__dict__.copy()
+        state["data_manager"] = None
+        state["synergy_analyzer"] = None
+        return state
+
+    def to_arrays(self):
+        """导出评分所需的全部数组"""
+        return {name: getattr(self, name) for name in TABLE_ARRAY_NAMES}
+
+    @classmethod
+    def from_arrays(cls, hero_names, arrays, data_version=0):
+        """由导出的数组重建分解表（不依赖DataManager，可在工作进程中使用）"""
+        tables = cls.__new__(cls)
+        tables.data_manager = None
+        tables.synergy_analyzer = None
+        tables.data_version = data_version
+        tables.hero_names = list(hero_names)
+        tables.hero_index = {name: i for i, name in enumerate(tables.hero_names)}
+        for name in TABLE_ARRAY_NAMES:
+            setattr(tables, name, arrays[name])
+        return tables
+
+    def _build_tag_tables(self, records, compiled):
+        """构建标签表：标签覆盖矩阵、标签数量和武将对标签协同值"""
+        hero_count = len(records)
+
+        # 标签覆盖矩阵和标签数量，用于回退实现中的重复标签统计
+        self.tag_present = np.zeros((hero_count, max(len(compiled.tag_vocab), 1)), dtype=bool)
+        self.tag_count = np.zeros(hero_count, dtype=np.int32)
+        for i, record in enumerate(records):
+            if record is None:
+                continue
+            self.tag_present[i, list(record.tag_ids)] = True
+            self.tag_count[i] = record.tag_count
+
+        # 武将对标签协同值（按队伍中的先后顺序）
+        two_heroes_synergy = self.synergy_analyzer._calculate_two_heroes_tag_synergy
+        self.tag_pair = np.zeros((hero_count, hero_count), dtype=np.int32)
+        for i, record1 in enumerate(records):
+            for j, record2 in enumerate(records):
+                if i != j and record1 is not None and record2 is not None:
+                    self.tag_pair[i, j] = two_heroes_synergy(
+                        record1.tag_ids, record2.tag_ids, compiled.tag_synergy_matrix)
+
+    def _build_troop_tables(self, records, compiled):
+        """构建兵种表：平均适性、兵种覆盖、S级加成和武将对相克得分"""
+        hero_count = len(records)
+
+        self.troop_fitness = np.zeros(hero_count, dtype=np.float64)
+        self.troop_present = np.zeros((hero_count, max(len(compiled.troop_vocab), 1)), dtype=bool)
+        self.troop_s_bonus = np.zeros(hero_count, dtype=np.int32)
+        for i, record in enumerate(records):
+            if record is None:
+                continue
+            self.troop_present[i] = [record.troop_mask >> t & 1 for t in range(self.troop_present.shape[1])]
+            self.troop_s_bonus[i] = record.s_count * 5
+            self.troop_fitness[i] = record.fitness_sum / record.troop_count if record.troop_count else 0
+
+        # 兵种相克只统计队伍中靠前武将克制靠后武将的情况
+        self.troop_advantage = np.zeros((hero_count, hero_count), dtype=np.int32)
+        for i, record1 in enumerate(records):
+            if record1 is None:
+                continue
+            for troop_id in record1.advantage_targets:
+                self.troop_advantage[i] += self.troop_present[:, troop_id] * 5
+            self.troop_advantage[i, i] = 0
+
+    def _build_camp_tables(self, records, compiled):
+        """构建阵营表：阵营编号，空阵营记为-1"""
+        self.camp_names = list(compiled.camp_vocab)
+        self.camp_ids = np.array(
+            [record.camp_id if record is not None else -1 for record in records], dtype=np.int32)
+
+    def _build_skill_tables(self, records, compiled):
+        """构建战法表：武将战法数量、武将内部协同和武将对之间的协同总值"""
+        self.skill_synergy_matrix = np.array(compiled.skill_synergy_matrix, dtype=np.int32).reshape(
+            len(compiled.skill_type_vocab), len(compiled.skill_type_vocab))
+        self._build_skill_arrays([record.skill_types if record is not None else () for record in records])
+
+    def with_skill_types(self, hero_skill_types: Sequence[Sequence[int]]) -> "SynergyTables":
+        """生成替换了各武将战法类型的分解表副本
+
+        标签、兵种、阵营表与原表共用，只重新构建战法表。可用于只拥有部分
+        战法时重新评分。
+
+        Args:
+            hero_skill_types: 每个武将的战法类型编号（按武将索引排列）
+        """
+        tables = copy.copy(self)
+        tables._build_skill_arrays([tuple(types) for types in hero_skill_types])
+        return tables
+
+    def _build_skill_arrays(self, hero_skill_types):
+        hero_count = len(hero_skill_types)
+        synergy_matrix = self.skill_synergy_matrix
+
+        self.skill_counts = np.array([len(types) for types in hero_skill_types], dtype=np.int32)
+        self.skill_intra = np.zeros(hero_count, dtype=np.int32)
+        for i, types in enumerate(hero_skill_types):
+            for type1, type2 in itertools.combinations(types, 2):
+                self.skill_intra[i] += synergy_matrix[type1, type2]
+
+        # 按战法槽位展开：skill_cross[i, j] = sum(矩阵[i的第p个战法, j的第q个战法])
+        max_skills = int(self.skill_counts.max()) if hero_count else 0
+        self.skill_cross = np.zeros((hero_count, hero_count), dtype=np.int32)
+        for slot1 in range(max_skills):
+            for slot2 in range(max_skills):
+                has1 = self.skill_counts > slot1
+                has2 = self.skill_counts > slot2
+                types1 = np.array([types[slot1] if len(types) > slot1 else 0 for types in hero_skill_types])
+                types2 = np.array([types[slot2] if len(types) > slot2 else 0 for types in hero_skill_types])
+                self.skill_cross += synergy_matrix[np.ix_(types1, types2)] * np.outer(has1, has2)
+        np.fill_diagonal(self.skill_cross, 0)
+
+    def score_components(self, teams: np.ndarray) -> np.ndarray:
+        """为(N, 3)的武将索引数组计算四项子评分，返回(N, 4)数组：标签、兵种、阵营、战法"""
+        teams = np.asarray(teams, dtype=np.intp).reshape(-1, 3)
+        a, b, c = teams[:, 0], teams[:, 1], teams[:, 2]
+        components = np.empty((len(teams), 4), dtype=np.float64)
+        components[:, 0] = self._tag_scores(a, b, c)
+        components[:, 1] = self._troop_scores(a, b, c)
+        components[:, 2] = self._camp_scores(a, b, c)
+        components[:, 3] = self._skill_scores(a, b, c)
+        return components
+
+    def score_teams(self, teams: np.ndarray, return_components: bool = False,
+                    weights: Optional[Sequence[float]] = None):
+        """为(N, 3)的武将索引数组计算综合协同评分（保留两位小数）
+
+        return_components为True时同时返回(N, 4)的子评分数组；weights为自定义权重，默认SCORE_WEIGHTS
+        """
+        components = self.score_components(teams)
+        scores = combine_components(components, weights)
+        if return_components:
+            return scores, components
+        return scores
+
+    def _tag_scores(self, a, b, c):
+        pair_ab = self.tag_pair[a, b]
+        pair_ac = self.tag_pair[a, c]
+        pair_bc = self.tag_pair[b, c]
+        total_synergy = pair_ab + pair_ac + pair_bc
+        combinations = (pair_ab > 0).astype(np.int32) + (pair_ac > 0) + (pair_bc > 0)
+
+        # 存在标签协同时：平均协同值 + 组合数量加成
+        with np.errstate(divide="ignore", invalid="ignore"):
+            avg_synergy = total_synergy / combinations
+        synergy_score = np.minimum(avg_synergy + np.minimum(combinations * 10, 50), 100)
+
+        # 回退实现：重复标签计分，重复次数 = 标签总数 - 不同标签数
+        distinct_tags = (self.tag_present[a] | self.tag_present[b] | self.tag_present[c]).sum(axis=1)
+        repeated = self.tag_count[a] + self.tag_count[b] + self.tag_count[c] - distinct_tags
+        repeat_score = np.minimum(repeated * 15, 100)
+
+        return np.where(combinations > 0, synergy_score, repeat_score)
+
+    def _troop_scores(self, a, b, c):
+        # 1. 平均适性得分（最高25分）
+        avg_fitness_score = (self.troop_fitness[a] + self.troop_fitness[b] + self.troop_fitness[c]) / 3 * 5
+        total_score = np.minimum(avg_fitness_score, 25)
+
+        # 2. 兵种多样性得分（最高25分）
+        troop_types = (self.troop_present[a] | self.troop_present[b] | self.troop_present[c]).sum(axis=1)
+        total_score = total_score + np.minimum(troop_types * 8, 25)
+
+        # 3. 兵种相克得分（最高25分）
+        advantage_score = self.troop_advantage[a, b] + self.troop_advantage[a, c] + self.troop_advantage[b, c]
+        total_score = total_score + np.minimum(advantage_score, 25)
+
+        # 4. S级兵种加成（最高25分）
+        s_troop_bonus = self.troop_s_bonus[a] + self.troop_s_bonus[b] + self.troop_s_bonus[c]
+        total_score = total_score + np.minimum(s_troop_bonus, 25)
+
+        return np.minimum(total_score, 100)
+
+    def _camp_scores(self, a, b, c):
+        camp_a = self.camp_ids[a]
+        same_camp = (camp_a >= 0) & (camp_a == self.camp_ids[b]) & (camp_a == self.camp_ids[c])
+        return np.where(same_camp, 100, 0)
+
+    def _skill_scores(self, a, b, c):
+        total_synergy = (
+            self.skill_intra[a] + self.skill_intra[b] + self.skill_intra[c] +
+            self.skill_cross[a, b] + self.skill_cross[a, c] + self.skill_cross[b, c]
+        )
+        skill_total = self.skill_counts[a] + self.skill_counts[b] + self.skill_counts[c]
+        synergy_pairs = skill_total * (skill_total - 1) // 2
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            avg_synergy = total_synergy / synergy_pairs
+        synergy_score = np.minimum(avg_synergy + np.minimum(synergy_pairs * 5, 50), 100)
+
+        # 没有可配对的战法时使用默认基础分（三名武将）
+        return np.where(synergy_pairs > 0, synergy_score, min(3 * 20, 100))
+
+    def top_k(
+        self,
+        count: int,
+        candidates: Optional[Sequence[int]] = None,
+        required: Optional[int] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        first_range: Optional[Tuple[int, int]] = None,
+        progress: Optional[Callable[[int, int], None]] = None,
+        weights: Optional[Sequence[float]] = None
+    ) -> List[Tuple[Tuple[int, int, int], float]]:
+        """精确搜索评分最高的count支三人队伍
+
+        Args:
+            count: 返回的队伍数量
+            candidates: 候选武将索引（按枚举顺序），默认所有武将
+            required: 必须包含的武将索引，队伍固定以该武将开头
+            chunk_size: 每个分块评分的队伍数量上限
+            first_range: 只搜索首位可变武将在候选中的位置属于[start, stop)的队伍，用于分片
+            progress: 每个分块评分后调用progress(已评分队伍数, 队伍总数)（不考虑first_range）
+            weights: 自定义的(标签, 兵种, 阵营, 战法)权重，默认SCORE_WEIGHTS
+
+        Returns:
+            [(武将索引三元组, 评分)]，评分相同的队伍保持枚举顺序
+        """
+        if candidates is None:
+            candidates = range(len(self.hero_names))
+        candidates = np.asarray(candidates, dtype=np.intp)
+        if required is not None:
+            candidates = candidates[candidates != required]
+
+        best_teams = np.empty((0, 3), dtype=np.intp)
+        best_scores = np.empty(0, dtype=np.float64)
+        if count <= 0:
+            return []
+
+        m = len(candidates)
+        total = m * (m - 1) // 2 if required is not None else m * (m - 1) * (m - 2) // 6
+        scored = 0
+        for teams in iter_team_chunks(candidates, required, chunk_size, first_range):
+            scores = self.score_teams(teams, weights=weights)
+            if progress is not None:
+                scored += len(teams)
+                progress(scored, total)
+            # 先前分块的队伍在前，稳定排序后评分相同的队伍保持枚举顺序
+            best_teams = np.concatenate([best_teams, teams])
+            best_scores = np.concatenate([best_scores, scores])
+            best_teams, best_scores = select_top_k(best_teams, best_scores, count)
+
+        return [(tuple(int(i) for i in team), float(score))
+                for team, score in zip(best_teams, best_scores)]
+
+
+def combine_components(components: np.ndarray, weights: Optional[Sequence[float]] = None) -> np.ndarray:
+    """按权重合并(N, 4)子评分为综合评分（保留两位小数）
+
+    按标签、兵种、阵营、战法的顺序依次累加，与逐队计算的求和顺序一致，
+    不使用矩阵乘法，以免浮点求和顺序不同导致舍入结果不一致。
+    """
+    tag_weight, troop_weight, camp_weight, skill_weight = SCORE_WEIGHTS if weights is None else weights
+    total = (
+        components[:, 0] * tag_weight +
+        components[:, 1] * troop_weight +
+        components[:, 2] * camp_weight +
+        components[:, 3] * skill_weight
+    )
+    return np.round(total, 2)
+
+
+def iter_team_chunks(candidates: np.ndarray, required: Optional[int] = None,
+                     chunk_size: int = DEFAULT_CHUNK_SIZE,
+                     first_range: Optional[Tuple[int, int]] = None):
+    """按itertools.combinations的顺序分块生成三人队伍索引数组
+
+    指定required时生成(required, b, c)，否则生成(a, b, c)，其中b、c等
+    按candidates中的先后顺序排列。first_range限定首位可变武将（a或b）在
+    candidates中的位置范围[start, stop)。
+    """
+    candidates = np.asarray(candidates, dtype=np.intp)
+    n = len(candidates)
+    range_start, range_stop = first_range if first_range is not None else (0, n)
+
+    if required is not None:
+        if n < 2:
+            return
+        first, second = np.triu_indices(n, k=1)
+        lo, hi = np.searchsorted(first, [range_start, range_stop])
+        first, second = first[lo:hi], second[lo:hi]
+        for start in range(0, len(first), chunk_size):
+            stop = start + chunk_size
+            teams = np.empty((len(first[start:stop]), 3), dtype=np.intp)
+            teams[:, 0] = required
+            teams[:, 1] = candidates[first[start:stop]]
+            teams[:, 2] = candidates[second[start:stop]]
+            yield teams
+        return
+
+    if n < 3:
+        return
+
+    # 以第一名武将分组，累积到chunk_size再一起评分
+    first, second = np.triu_indices(n, k=1)
+    pending = []
+    pending_size = 0
+    for a in range(max(range_start, 0), min(range_stop, n - 2)):
+        offset = np.searchsorted(first, a + 1)
+        b_pos, c_pos = first[offset:], second[offset:]
+        teams = np.empty((len(b_pos), 3), dtype=np.intp)
+        teams[:, 0] = candidates[a]
+        teams[:, 1] = candidates[b_pos]
+        teams[:, 2] = candidates[c_pos]
+        pending.append(teams)
+        pending_size += len(teams)
+        if pending_size >= chunk_size:
+            yield np.concatenate(pending)
+            pending = []
+            pending_size = 0
+    if pending:
+        yield np.concatenate(pending)
+
+
+def select_top_k(teams: np.ndarray, scores: np.ndarray, count: int) -> Tuple[np.ndarray, np.ndarray]:
+    """选出评分最高的count项，评分相同时保持原有顺序"""
+    if len(scores) > count:
+        threshold = np.partition(scores, len(scores) - count)[len(scores) - count]
+        keep = np.nonzero(scores >= threshold)[0]
+        teams, scores = teams[keep], scores[keep]
+    order = np.argsort(-scores, kind="stable")[:count]
+    return teams[order], scores[order]
@@ -0,0 +1,261 @@
+# 分支定界队伍搜索
+
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.synergy_analyzer import SCORE_WEIGHTS
+
+# 每批展开的武将对数量，批量评分以减少逐对调用的开销
+DEFAULT_PAIR_BATCH = 32
+
+
+def branch_and_bound_top_k(
+    tables,
+    count: int,
+    candidates: Optional[Sequence[int]] = None,
+    required: Optional[int] = None,
+    pair_batch: int = DEFAULT_PAIR_BATCH,
+    weights: Optional[Sequence[float]] = None
+) -> List[Tuple[Tuple[int, int, int], float]]:
+    """分支定界搜索评分最高的count支三人队伍
+
+    队伍按(p, q, z)的形式枚举：不指定required时p、q、z依次取自candidates中
+    递增的位置；指定required时p固定为required，q、z取自其余候选武将。
+    先为每个武将对(p, q)计算所有可能的第三名武将z下四项子评分的乐观上界，
+    再按上界从高到低展开武将对，上界低于当前第count名评分时即可停止。
+    结果与SynergyTables.top_k完全一致（评分相同的队伍按枚举顺序排列）。
+
+    Args:
+        tables: SynergyTables实例
+        count: 返回的队伍数量
+        candidates: 候选武将索引（按枚举顺序），默认所有武将
+        required: 必须包含的武将索引
+        pair_batch: 每批展开的武将对数量
+        weights: 自定义的(标签, 兵种, 阵营, 战法)权重（非负），默认SCORE_WEIGHTS
+
+    Returns:
+        [(武将索引三元组, 评分)]
+    """
+    top_teams, _ = branch_and_bound_search(tables, count, candidates, required, pair_batch, weights=weights)
+    return top_teams
+
+
+def branch_and_bound_search(
+    tables,
+    count: int,
+    candidates: Optional[Sequence[int]] = None,
+    required: Optional[int] = None,
+    pair_batch: int = DEFAULT_PAIR_BATCH,
+    deadline: Optional[float] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+    weights: Optional[Sequence[float]] = None
+) -> Tuple[List[Tuple[Tuple[int, int, int], float]], Dict[str, Any]]:
+    """可限时的分支定界搜索，参数与branch_and_bound_top_k相同
+
+    deadline为time.perf_counter()的截止时刻，到达后返回已找到的最好队伍。
+    由于武将对按上界从高到低展开，未展开部分中任意队伍的评分都不超过下一个
+    武将对的上界，据此给出结果与精确结果之间的评分差距上界。
+    progress在每批武将对评分后调用progress(已评分队伍数, 候选空间队伍总数)。
+
+    Returns:
+        ([(武将索引三元组, 评分)], {"exact": 是否为精确结果, "upper_bound": 未展开队伍的评分上界,
+        "gap": 第count名评分与精确结果相比的最大差距})
+    """
+    exact_status = {"exact": True, "upper_bound": None, "gap": 0.0}
+    if count <= 0:
+        return [], exact_status
+    if candidates is None:
+        candidates = range(len(tables))
+    candidates = np.asarray(candidates, dtype=np.intp)
+    if required is not None:
+        candidates = candidates[candidates != required]
+
+    pair_first, pair_second, bounds = _pair_upper_bounds(tables, candidates, required, weights)
+    if len(bounds) == 0:
+        return [], exact_status
+
+    # 按上界从高到低展开，上界相同时按枚举顺序
+    order = np.argsort(-bounds, kind="stable")
+    n = len(candidates)
+
+    best_teams = np.empty((0, 3), dtype=np.intp)
+    best_scores = np.empty(0, dtype=np.float64)
+    best_keys = np.empty(0, dtype=np.int64)
+
+    status = exact_status
+    total = n * (n - 1) // 2 if required is not None else n * (n - 1) * (n - 2) // 6
+    scored = 0
+    for start in range(0, len(order), pair_batch):
+        batch = order[start:start + pair_batch]
+        # 已有count支队伍且剩余武将对的上界都低于第count名时，搜索结束
+        if len(best_scores) >= count and bounds[batch[0]] < best_scores[-1]:
+            break
+        # 到达截止时刻：未展开的队伍评分不超过当前武将对的上界
+        if deadline is not None and time.perf_counter() >= deadline:
+            upper_bound = float(bounds[batch[0]])
+            worst = float(best_scores[-1]) if len(best_scores) >= count else 0.0
+            status = {"exact": False, "upper_bound": upper_bound,
+                      "gap": round(max(upper_bound - worst, 0.0), 2)}
+            break
+        if len(best_scores) >= count:
+            batch = batch[bounds[batch] >= best_scores[-1]]
+
+        teams, keys = _expand_pairs(candidates, required, pair_first[batch], pair_second[batch], n)
+        if len(teams) == 0:
+            continue
+        scores = tables.score_teams(teams, weights=weights)
+        if progress is not None:
+            scored += len(teams)
+            progress(scored, total)
+
+        best_teams = np.concatenate([best_teams, teams])
+        best_scores = np.concatenate([best_scores, scores])
+        best_keys = np.concatenate([best_keys, keys])
+        keep = np.lexsort((best_keys, -best_scores))[:count]
+        best_teams, best_scores, best_keys = best_teams[keep], best_scores[keep], best_keys[keep]
+
+    top_teams = [(tuple(int(i) for i in team), float(score))
+                 for team, score in zip(best_teams, best_scores)]
+    return top_teams, status
+
+
+def _expand_pairs(candidates, required, first_pos, second_pos, n):
+    """展开一批武将对，生成所有(p, q, z)队伍及其枚举顺序键"""
+    team_chunks = []
+    key_chunks = []
+    for x, y in zip(first_pos.tolist(), second_pos.tolist()):
+        z = np.arange(y + 1, n, dtype=np.intp)
+        if len(z) == 0:
+            continue
+        teams = np.empty((len(z), 3), dtype=np.intp)
+        teams[:, 0] = required if required is not None else candidates[x]
+        teams[:, 1] = candidates[y]
+        teams[:, 2] = candidates[z]
+        team_chunks.append(teams)
+        key_chunks.append((x * n + y) * n + z)
+    if not team_chunks:
+        return np.empty((0, 3), dtype=np.intp), np.empty(0, dtype=np.int64)
+    return np.concatenate(team_chunks), np.concatenate(key_chunks).astype(np.int64)
+
+
+def _suffix_max(values, axis=-1):
+    """沿指定轴计算严格后缀最大值：结果第i项为位置i之后所有元素的最大值（无元素时为0）"""
+    values = np.asarray(values)
+    flipped = np.flip(values, axis=axis)
+    suffix = np.flip(np.maximum.accumulate(flipped, axis=axis), axis=axis)
+    shifted = np.zeros_like(suffix)
+    if axis in (-1, values.ndim - 1):
+        shifted[..., :-1] = suffix[..., 1:]
+    else:
+        shifted[:-1] = suffix[1:]
+    return shifted
+
+
+def _pair_upper_bounds(tables, candidates, required, weights=None):
+    """计算每个武将对(p, q)在所有后续第三名武将下综合评分的乐观上界
+
+    Returns:
+        (p在候选中的位置, q在候选中的位置, 上界)，不指定required时p、q均为
+        候选位置；指定required时p位置恒为0（对应required）
+    """
+    n = len(candidates)
+    if n < 2 or (required is None and n < 3):
+        empty = np.empty(0, dtype=np.intp)
+        return empty, empty, np.empty(0, dtype=np.float64)
+
+    if required is None:
+        x, y = np.triu_indices(n - 1, k=1)
+        p = candidates[x]
+    else:
+        y = np.arange(n - 1, dtype=np.intp)
+        x = np.zeros_like(y)
+        p = np.full(len(y), required, dtype=np.intp)
+    q = candidates[y]
+
+    # 第三名武将z取自q之后的候选位置，先计算每个位置之后的后缀最值
+    suffix_tag_len = _suffix_max(tables.tag_count[candidates])[y]
+    suffix_fitness = _suffix_max(tables.troop_fitness[candidates])[y]
+    suffix_s_bonus = _suffix_max(tables.troop_s_bonus[candidates])[y]
+    suffix_skill_intra = _suffix_max(tables.skill_intra[candidates])[y]
+    suffix_skill_max = _suffix_max(tables.skill_counts[candidates])[y]
+    suffix_skill_min = -_suffix_max(-tables.skill_counts[candidates])[y]
+
+    present = tables.troop_present[candidates]
+    suffix_present = np.flip(np.logical_or.accumulate(np.flip(present, axis=0), axis=0), axis=0)
+    suffix_present = np.vstack([suffix_present[1:], np.zeros_like(present[:1])])[y]
+
+    # 与候选武将的两两关系取后缀最大值：rows[i, j]为武将i与位置j之后候选武将的最大值
+    def pair_suffix(matrix, heroes):
+        return _suffix_max(matrix[np.ix_(heroes, candidates)], axis=1)
+
+    if required is None:
+        row_heroes = candidates
+        p_rows = x
+    else:
+        row_heroes = np.array([required], dtype=np.intp)
+        p_rows = np.zeros_like(y)
+
+    # 标签上界：存在协同组合时平均值不超过最大协同值，组合数不超过可能的非零项数
+    tag_pq = tables.tag_pair[p, q]
+    tag_pz = pair_suffix(tables.tag_pair, row_heroes)[p_rows, y]
+    tag_qz = pair_suffix(tables.tag_pair, candidates)[y, y]
+    tag_max = np.maximum(tag_pq, np.maximum(tag_pz, tag_qz))
+    nonzero = (tag_pq > 0).astype(np.int32) + (tag_pz > 0) + (tag_qz > 0)
+    synergy_bound = np.where(nonzero > 0, np.minimum(tag_max + np.minimum(nonzero * 10, 50), 100), 0)
+    # 回退实现：第三名武将的每个标签最多增加一个重复标签
+    pair_distinct = (tables.tag_present[p] | tables.tag_present[q]).sum(axis=1)
+    pair_repeat = tables.tag_count[p] + tables.tag_count[q] - pair_distinct
+    repeat_bound = np.minimum((pair_repeat + suffix_tag_len) * 15, 100)
+    tag_bound = np.maximum(synergy_bound, repeat_bound)
+
+    # 兵种上界：四个分项分别取上界
+    fitness_bound = np.minimum((tables.troop_fitness[p] + tables.troop_fitness[q] + suffix_fitness) / 3 * 5, 25)
+    troop_types = (tables.troop_present[p] | tables.troop_present[q] | suffix_present).sum(axis=1)
+    advantage = (
+        tables.troop_advantage[p, q] +
+        pair_suffix(tables.troop_advantage, row_heroes)[p_rows, y] +
+        pair_suffix(tables.troop_advantage, candidates)[y, y]
+    )
+    s_troop_bonus = tables.troop_s_bonus[p] + tables.troop_s_bonus[q] + suffix_s_bonus
+    troop_bound = np.minimum(
+        fitness_bound + np.minimum(troop_types * 8, 25) + np.minimum(advantage, 25) +
+        np.minimum(s_troop_bonus, 25), 100)
+
+    # 阵营上界：p、q同阵营且之后还有同阵营的候选武将
+    camp_p = tables.camp_ids[p]
+    candidate_camps = tables.camp_ids[candidates]
+    camp_bound = np.zeros(len(y), dtype=np.float64)
+    for camp_id in np.unique(candidate_camps[candidate_camps >= 0]):
+        has_camp = _suffix_max((candidate_camps == camp_id).astype(np.int8))[y] > 0
+        same = (camp_p == camp_id) & (tables.camp_ids[q] == camp_id) & has_camp
+        camp_bound[same] = 100
+
+    # 战法上界：协同总值取上界，战法对数量取下界
+    skill_synergy = (
+        tables.skill_intra[p] + tables.skill_intra[q] + suffix_skill_intra +
+        tables.skill_cross[p, q] +
+        pair_suffix(tables.skill_cross, row_heroes)[p_rows, y] +
+        pair_suffix(tables.skill_cross, candidates)[y, y]
+    )
+    base_skills = tables.skill_counts[p] + tables.skill_counts[q]
+    min_pairs = (base_skills + suffix_skill_min) * (base_skills + suffix_skill_min - 1) // 2
+    max_pairs = (base_skills + suffix_skill_max) * (base_skills + suffix_skill_max - 1) // 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        skill_bound = np.minimum(skill_synergy / min_pairs + np.minimum(max_pairs * 5, 50), 100)
+    skill_bound = np.where(min_pairs > 0, skill_bound, 100)
+
+    # 权重非负，各子评分取上界后加权求和仍是上界
+    tag_weight, troop_weight, camp_weight, skill_weight = SCORE_WEIGHTS if weights is None else weights
+    bounds = (
+        tag_bound * tag_weight +
+        troop_bound * troop_weight +
+        camp_bound * camp_weight +
+        skill_bound * skill_weight
+    )
+    bounds = np.round(bounds, 2)
+
+    # 第三名武将不存在的武将对没有可展开的队伍
+    valid = y < n - 1
+    return x[valid], y[valid], bounds[valid]
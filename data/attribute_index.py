@@ -0,0 +1,134 @@
+# 武将、战法的属性二级索引
+import threading
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+
+def _hero_troop_grades(info: Dict[str, Any]) -> List[Tuple[str, str]]:
+    return list(info.get("兵种", {}).items())
+
+
+def _field_values(field: str, info: Dict[str, Any]) -> List[Any]:
+    value = info.get(field)
+    if value is None or value == "":
+        return []
+    return list(value) if isinstance(value, (list, tuple)) else [value]
+
+
+# 武将索引的属性 -> 从武将信息中取出属性值（可有多个），使用模块级函数以便索引写入快照
+HERO_INDEX_KEYS: Dict[str, Callable[[Dict[str, Any]], List[Any]]] = {
+    "阵营": partial(_field_values, "阵营"),
+    "标签": partial(_field_values, "标签"),
+    # (兵种, 适性等级)
+    "兵种": _hero_troop_grades,
+}
+
+# 战法索引的属性
+SKILL_INDEX_KEYS: Dict[str, Callable[[Dict[str, Any]], List[Any]]] = {
+    "类型": partial(_field_values, "类型"),
+    "品质": partial(_field_values, "品质"),
+    "适用兵种": partial(_field_values, "适用兵种"),
+}
+
+
+class AttributeIndex:
+    """属性值 -> 记录名称集合的二级索引
+
+    多条件筛选为各条件名称集合的交集，结果按数据中的顺序排列；
+    记录更新时先按旧值移除再按新值加入，索引与数据保持一致。
+    """
+
+    def __init__(self, keys: Dict[str, Callable[[Dict[str, Any]], List[Any]]]):
+        self.keys = dict(keys)
+        # 属性 -> 属性值 -> 记录名称集合
+        self._index: Dict[str, Dict[Any, Set[str]]] = {attribute: {} for attribute in self.keys}
+        # 记录名称 -> 各属性的值（用于更新时移除旧值）
+        self._values: Dict[str, Dict[str, List[Any]]] = {}
+        # 记录名称 -> 在数据中的顺序
+        self._order: Dict[str, int] = {}
+        self._next_order = 0
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def build(self, records: Dict[str, Dict[str, Any]]) -> None:
+        """按数据重新构建索引"""
+        with self._lock:
+            self._index = {attribute: {} for attribute in self.keys}
+            self._values = {}
+            self._order = {}
+            self._next_order = 0
+            for name, info in records.items():
+                self._add(name, info)
+
+    def update(self, name: str, info: Optional[Dict[str, Any]]) -> None:
+        """增量更新一条记录，info为None时删除该记录；已有记录保持原有顺序"""
+        with self._lock:
+            self._remove(name)
+            if info is not None:
+                self._add(name, info)
+
+    def get(self, attribute: str, value: Any) -> Set[str]:
+        """属性等于value（列表属性包含value）的记录名称"""
+        with self._lock:
+            return set(self._index[attribute].get(value, ()))
+
+    def values(self, attribute: str) -> List[Any]:
+        """属性的所有取值"""
+        with self._lock:
+            return list(self._index[attribute])
+
+    def filter(self, criteria: Iterable[Tuple[str, Iterable[Any]]]) -> List[str]:
+        """按多个条件筛选，返回按数据顺序排列的记录名称
+
+        Args:
+            criteria: [(属性, 可接受的取值)]，记录须满足每个条件（取值之一即可）
+        """
+        with self._lock:
+            names = None
+            # 每个条件内取并集，条件之间求交集，从最小的集合开始
+            matches = []
+            for attribute, accepted in criteria:
+                index = self._index[attribute]
+                matched = set()
+                for value in accepted:
+                    matched |= index.get(value, set())
+                matches.append(matched)
+            for matched in sorted(matches, key=len):
+                names = matched if names is None else names & matched
+                if not names:
+                    return []
+            if names is None:
+                names = self._values.keys()
+            return sorted(names, key=self._order.__getitem__)
+
+    def _add(self, name: str, info: Dict[str, Any]) -> None:
+        values = {attribute: list(dict.fromkeys(key(info))) for attribute, key in self.keys.items()}
+        self._values[name] = values
+        if name not in self._order:
+            self._order[name] = self._next_order
+            self._next_order += 1
+        for attribute, attribute_values in values.items():
+            index = self._index[attribute]
+            for value in attribute_values:
+                index.setdefault(value, set()).add(name)
+
+    def _remove(self, name: str) -> None:
+        values = self._values.pop(name, None)
+        if values is None:
+            return
+        for attribute, attribute_values in values.items():
+            index = self._index[attribute]
+            for value in attribute_values:
+                names = index.get(value)
+                if names is not None:
+                    names.discard(name)
+                    if not names:
+                        del index[value]
@@ -1,71 +1,334 @@
 # 数据管理器
+import hashlib
 import json
 import os
+import pickle
 import requests
 import re
+import threading
 from datetime import datetime
 from typing import Dict, List, Any, Optional
 
+from config import Config
+from core.lru_cache import LRUCache, MISSING
+from data.journal import UpdateJournal, journal_path_for, write_file_atomic
+from data.attribute_index import HERO_INDEX_KEYS, SKILL_INDEX_KEYS, AttributeIndex
+from data.skill_graph import HERO_SKILL_KEYS, SkillGraph
+from data.search_index import HERO_SEARCH_FIELDS, SKILL_SEARCH_FIELDS, SearchIndex
+from data.snapshot import read_snapshot, snapshot_path_for, source_key, write_snapshot
+
+# 兵种适性等级，从高到低
+FITNESS_GRADES = ("S", "A", "B", "C")
+
 class DataManager:
-    def __init__(self, data_file_path: str):
+    def __init__(self, data_file_path: str, use_snapshot: Optional[bool] = None):
         self.data_file_path = data_file_path
-        self.data = self._load_data()
+        # 当前数据的哈希，用于持久化的派生数据判断是否失效：数据文件内容哈希，
+        # 日志中有尚未合并的更新时再依次叠加每条更新（重启重放日志后得到相同的哈希）
+        self.data_hash = ""
+        # 数据版本号，数据变更时递增，用于使派生的预计算结构失效
+        self.data_version = 0
         self.announcement_api_url = "https://galaxias-api.lingxigames.com/ds/ajax/endpoint.json"
         # 数据缓存
-        self._hero_cache = {}
-        self._skill_cache = {}
-        self._cache_max_size = 1000
+        self._hero_cache = LRUCache(Config.HERO_CACHE_SIZE)
+        self._skill_cache = LRUCache(Config.SKILL_CACHE_SIZE)
+        # 索引名称 -> 索引对象，从快照读取时先保存序列化的字节，首次使用时才反序列化
+        self._indexes: Dict[str, Any] = {}
+        self._indexes_lock = threading.Lock()
+        # 二进制快照：数据文件未变化时直接读取解析后的数据、索引和派生数据
+        self.use_snapshot = Config.DATA_SNAPSHOT if use_snapshot is None else use_snapshot
+        # 数据文件的修改时间和大小（与内存中的数据对应），None表示两者不一致
+        self._source_key = None
+        # 快照中保存的派生数据（序列化后的字节，读取时才反序列化），只在数据版本等于_snapshot_data_version时有效
+        self._snapshot_artifacts: Dict[Any, bytes] = {}
+        self._snapshot_data_version = None
+        # 战法更新先追加到日志，累计到一定条数后在后台合并到数据文件
+        self.journal_compact_threshold = Config.JOURNAL_COMPACT_THRESHOLD
+        self._journal = UpdateJournal(journal_path_for(data_file_path))
+        # 日志中尚未合并到数据文件的记录数
+        self._journal_records = 0
+        # 更新数据、写日志和合并日志时持有，保证日志顺序与内存中的数据一致
+        self._write_lock = threading.RLock()
+        self._compact_lock = threading.Lock()
+        self._compact_thread = None
+        self._data: Dict[str, Any] = {}
+        self._load()
+    
+    @property
+    def data(self) -> Dict[str, Any]:
+        return self._data
+    
+    @data.setter
+    def data(self, data: Dict[str, Any]) -> None:
+        # 直接替换数据后内存中的数据与数据文件、快照不再对应
+        self._data = data
+        self._detach_snapshot()
+    
+    def _detach_snapshot(self) -> None:
+        """内存中的数据与数据文件不再一致：不再写入快照，快照中的派生数据失效"""
+        self._source_key = None
+        self._snapshot_artifacts = {}
+        self._snapshot_data_version = None
+    
+    def _build_indexes(self) -> None:
+        """按当前数据重新构建搜索索引、二级索引和武将战法关系图"""
+        indexes = {
+            # 武将、战法的关键字搜索索引
+            "hero_search": SearchIndex(HERO_SEARCH_FIELDS),
+            "skill_search": SearchIndex(SKILL_SEARCH_FIELDS),
+            # 阵营、标签、兵种适性和战法类型、品质、适用兵种的二级索引
+            "hero_index": AttributeIndex(HERO_INDEX_KEYS),
+            "skill_index": AttributeIndex(SKILL_INDEX_KEYS),
+            # 武将与战法的关系图（自带、传承战法和关联武将）
+            "skill_graph": SkillGraph()
+        }
+        indexes["hero_search"].build(self.get_heroes())
+        indexes["skill_search"].build(self.get_skills())
+        indexes["hero_index"].build(self.get_heroes())
+        indexes["skill_index"].build(self.get_skills())
+        indexes["skill_graph"].build(self.get_heroes(), self.get_skills())
+        with self._indexes_lock:
+            self._indexes = indexes
+    
+    def _get_index(self, name: str) -> Any:
+        """获取索引，从快照读取的索引在首次使用时反序列化"""
+        with self._indexes_lock:
+            index = self._indexes[name]
+            if isinstance(index, bytes):
+                index = pickle.loads(index)
+                self._indexes[name] = index
+            return index
+    
+    def _load(self) -> None:
+        """加载游戏数据并构建索引，数据文件与快照一致时直接读取快照，最后重放更新日志"""
+        self._snapshot_artifacts = {}
+        self._snapshot_data_version = None
+        if not (self.use_snapshot and self._load_snapshot()):
+            self._data = self._load_data()
+            self._build_indexes()
+            if self._source_key is not None:
+                self._snapshot_data_version = self.data_version
+                self._write_snapshot()
+        self._replay_journal()
+    
+    def _replay_journal(self) -> None:
+        """把日志中尚未合并到数据文件的更新应用到内存中的数据和索引"""
+        self._journal = UpdateJournal(journal_path_for(self.data_file_path))
+        records = self._journal.read()
+        for record in records:
+            if (not isinstance(record, dict) or record.get("op") != "update_skill" or
+                    not isinstance(record.get("name"), str) or not isinstance(record.get("info"), dict)):
+                print(f"跳过无效的数据更新日志记录: {str(record)[:100]}")
+                continue
+            self._apply_skill_update(record["name"], record["info"])
+            self._chain_data_hash(record)
+        self._journal_records = len(records)
+        if records:
+            print(f"已重放 {len(records)} 条数据更新日志")
+            self.data_version += 1
+            self._detach_snapshot()
+            if self._journal_records >= self.journal_compact_threshold:
+                self.compact_journal_async()
+    
+    def _load_snapshot(self) -> bool:
+        """从快照恢复数据和索引，快照不存在或与数据文件不一致时返回False"""
+        try:
+            data_file_path = self._resolve_data_file_path()
+            key = source_key(data_file_path)
+        except Exception:
+            return False
+        snapshot = read_snapshot(snapshot_path_for(data_file_path))
+        if snapshot is None:
+            return False
+        
+        outdated = snapshot.get("source") != key
+        if outdated:
+            # 修改时间或大小变化（如重新检出文件）时按内容哈希确认是否真的变化
+            with open(data_file_path, 'rb') as f:
+                if hashlib.sha256(f.read()).hexdigest() != snapshot.get("data_hash"):
+                    return False
+        
+        self.data_file_path = data_file_path
+        self._data = snapshot["data"]
+        self.data_hash = snapshot["data_hash"]
+        with self._indexes_lock:
+            self._indexes = dict(snapshot["indexes"])
+        self._source_key = key
+        self._snapshot_artifacts = dict(snapshot.get("artifacts", {}))
+        self._snapshot_data_version = self.data_version
+        if outdated:
+            self._write_snapshot()
+        return True
+    
+    def _write_snapshot(self) -> None:
+        """把当前数据、索引和派生数据写入快照（内存中的数据与数据文件一致时）"""
+        if not self.use_snapshot or self._source_key is None:
+            return
+        # 各索引单独序列化，读取快照时可以按需反序列化
+        with self._indexes_lock:
+            indexes = {
+                name: index if isinstance(index, bytes) else pickle.dumps(index, protocol=pickle.HIGHEST_PROTOCOL)
+                for name, index in self._indexes.items()
+            }
+        write_snapshot(snapshot_path_for(self.data_file_path), {
+            "source": self._source_key,
+            "data_hash": self.data_hash,
+            "data": self.data,
+            "indexes": indexes,
+            "artifacts": self._snapshot_artifacts
+        })
+    
+    def get_snapshot_artifact(self, key: Any) -> Optional[Any]:
+        """读取快照中由当前数据构建的派生数据（如编译后的评分表），没有时返回None
+        
+        每次读取都反序列化出新的对象，调用方可以自由修改
+        """
+        if self._snapshot_data_version != self.data_version:
+            return None
+        artifact = self._snapshot_artifacts.get(key)
+        if artifact is None:
+            return None
+        try:
+            return pickle.loads(artifact)
+        except Exception as e:
+            print(f"读取快照中的派生数据时出错: {e}")
+            return None
+    
+    def save_snapshot_artifact(self, key: Any, artifact: Any) -> None:
+        """把由当前数据构建的派生数据保存到快照，下次加载时可直接读取"""
+        if not self.use_snapshot or self._snapshot_data_version != self.data_version:
+            return
+        try:
+            self._snapshot_artifacts[key] = pickle.dumps(artifact, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            print(f"保存派生数据到快照时出错: {e}")
+            return
+        self._write_snapshot()
+    
+    def _resolve_data_file_path(self) -> str:
+        """确定数据文件路径，文件不存在时尝试在项目根目录查找"""
+        if os.path.exists(self.data_file_path):
+            return self.data_file_path
+        root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        data_file_path = os.path.join(root_dir, "data", "consolidated_ocr_data.json")
+        if not os.path.exists(data_file_path):
+            raise FileNotFoundError(f"数据文件未找到: {self.data_file_path} 或 {data_file_path}")
+        return data_file_path
     
     def _load_data(self) -> Dict[str, Any]:
         """加载游戏数据"""
+        self._source_key = None
         try:
             # 检查文件是否存在
-            if not os.path.exists(self.data_file_path):
-                # 如果文件不存在，尝试在项目根目录查找
-                root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-                data_file_path = os.path.join(root_dir, "data", "consolidated_ocr_data.json")
-                if not os.path.exists(data_file_path):
-                    raise FileNotFoundError(f"数据文件未找到: {self.data_file_path} 或 {data_file_path}")
-                self.data_file_path = data_file_path
+            self.data_file_path = self._resolve_data_file_path()
             
-            # 读取JSON数据
-            with open(self.data_file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            # 读取JSON数据（先记录修改时间，读取期间文件变化时快照会在下次加载时按哈希重新确认）
+            key = source_key(self.data_file_path)
+            with open(self.data_file_path, 'rb') as f:
+                content = f.read()
+            data = json.loads(content.decode('utf-8'))
+            self.data_hash = hashlib.sha256(content).hexdigest()
+            self._source_key = key
             return data
         except Exception as e:
             print(f"加载数据文件时出错: {e}")
             return {}
     
-    def _save_data(self) -> None:
-        """保存游戏数据到文件"""
-        try:
-            with open(self.data_file_path, 'w', encoding='utf-8') as f:
-                json.dump(self.data, f, ensure_ascii=False, indent=2)
-            print("数据已成功保存到文件")
-        except Exception as e:
-            print(f"保存数据文件时出错: {e}")
+    def compact_journal(self) -> bool:
+        """把日志中的更新合并到数据文件（原子替换），并清除已合并的日志
+        
+        序列化数据时持有写锁，写入文件期间的新更新继续追加到日志，合并后保留在日志中
+        """
+        with self._compact_lock:
+            with self._write_lock:
+                if self._journal_records == 0:
+                    return True
+                content = json.dumps(self.data, ensure_ascii=False, indent=2).encode('utf-8')
+                journal_size = self._journal.size()
+                records = self._journal_records
+                data_version = self.data_version
+            try:
+                write_file_atomic(self.data_file_path, content)
+            except Exception as e:
+                print(f"合并数据更新日志时出错: {e}")
+                return False
+            with self._write_lock:
+                self._journal.discard(journal_size)
+                self._journal_records -= records
+                if self.data_version == data_version:
+                    # 合并期间没有新的更新时数据文件与内存一致，重新写入快照
+                    self.data_hash = hashlib.sha256(content).hexdigest()
+                    self._source_key = source_key(self.data_file_path)
+                    self._snapshot_data_version = self.data_version
+                    self._write_snapshot()
+            print(f"已将 {records} 条数据更新合并到数据文件")
+            return True
+    
+    def compact_journal_async(self) -> threading.Thread:
+        """在后台线程中合并日志（已有合并任务时不重复启动）"""
+        with self._write_lock:
+            if self._compact_thread is None or not self._compact_thread.is_alive():
+                self._compact_thread = threading.Thread(target=self.compact_journal, daemon=True)
+                self._compact_thread.start()
+            return self._compact_thread
+    
+    def reload_data(self) -> None:
+        """从文件重新加载游戏数据"""
+        with self._write_lock:
+            self.data_version += 1
+            self._load()
+            self._hero_cache.clear()
+            self._skill_cache.clear()
     
     def update_skill(self, skill_name: str, skill_info: Dict[str, Any]) -> bool:
-        """更新战法信息"""
+        """更新战法信息
+        
+        更新先追加到日志并写入磁盘后才应用到内存，不重写整个数据文件；
+        日志累计到journal_compact_threshold条后在后台合并到数据文件
+        """
+        if not isinstance(skill_name, str) or not isinstance(skill_info, dict):
+            print(f"战法信息应为对象: {skill_name}")
+            return False
         try:
-            # 确保数据结构存在
-            if '战法' not in self.data:
-                self.data['战法'] = {}
-            
-            # 更新战法信息
-            self.data['战法'][skill_name] = skill_info
-            
-            # 保存数据
-            self._save_data()
-            
-            # 更新缓存
-            self._skill_cache[skill_name] = skill_info
-            
+            with self._write_lock:
+                record = {"op": "update_skill", "name": skill_name, "info": skill_info}
+                self._journal.append(record)
+                self._apply_skill_update(skill_name, skill_info)
+                self._chain_data_hash(record)
+                self.data_version += 1
+                # 数据文件不再与内存一致，快照在日志合并后重新写入
+                self._detach_snapshot()
+                self._journal_records += 1
+                if self._journal_records >= self.journal_compact_threshold:
+                    self.compact_journal_async()
             return True
         except Exception as e:
             print(f"更新战法信息时出错: {e}")
             return False
     
+    def _chain_data_hash(self, record: Dict[str, Any]) -> None:
+        """在数据哈希上叠加一条日志记录，使依赖数据哈希的持久化评分失效"""
+        content = json.dumps(record, ensure_ascii=False, sort_keys=True)
+        self.data_hash = hashlib.sha256((self.data_hash + content).encode('utf-8')).hexdigest()
+    
+    def _apply_skill_update(self, skill_name: str, skill_info: Dict[str, Any]) -> None:
+        """把战法更新应用到内存中的数据、缓存和索引"""
+        # 确保数据结构存在
+        if '战法' not in self.data:
+            self.data['战法'] = {}
+        self.data['战法'][skill_name] = skill_info
+        self._skill_cache.put(skill_name, skill_info)
+        self._get_index("skill_search").update(skill_name, skill_info)
+        self._get_index("skill_index").update(skill_name, skill_info)
+        self._get_index("skill_graph").update_skill(skill_name, skill_info)
+    
+    def get_cache_stats(self) -> Dict[str, Dict[str, Any]]:
+        """获取武将、战法缓存的统计信息"""
+        return {
+            "hero": self._hero_cache.stats(),
+            "skill": self._skill_cache.stats()
+        }
+    
     def get_heroes(self) -> Dict[str, Any]:
         """获取所有武将"""
         return self.data.get('武将', {})
@@ -76,36 +339,26 @@ class DataManager:
     
     def get_hero_by_name(self, name: str) -> Optional[Dict[str, Any]]:
         """根据名称获取武将信息 - 带缓存"""
-        if name in self._hero_cache:
-            return self._hero_cache[name]
+        hero_info = self._hero_cache.get(name)
+        if hero_info is not MISSING:
+            return hero_info
         
         hero_info = self.data.get('武将', {}).get(name)
         
         # 更新缓存
-        if len(self._hero_cache) >= self._cache_max_size:
-            # 清空缓存的一部分
-            keys_to_remove = list(self._hero_cache.keys())[:self._cache_max_size // 10]
-            for key in keys_to_remove:
-                del self._hero_cache[key]
-        
-        self._hero_cache[name] = hero_info
+        self._hero_cache.put(name, hero_info)
         return hero_info
     
     def get_skill_by_name(self, name: str) -> Optional[Dict[str, Any]]:
         """根据名称获取战法信息 - 带缓存"""
-        if name in self._skill_cache:
-            return self._skill_cache[name]
+        skill_info = self._skill_cache.get(name)
+        if skill_info is not MISSING:
+            return skill_info
         
         skill_info = self.data.get('战法', {}).get(name)
         
         # 更新缓存
-        if len(self._skill_cache) >= self._cache_max_size:
-            # 清空缓存的一部分
-            keys_to_remove = list(self._skill_cache.keys())[:self._cache_max_size // 10]
-            for key in keys_to_remove:
-                del self._skill_cache[key]
-        
-        self._skill_cache[name] = skill_info
+        self._skill_cache.put(name, skill_info)
         return skill_info
     
     def get_all_hero_names(self) -> List[str]:
@@ -130,23 +383,102 @@ class DataManager:
             return hero['兵种'].get(troop_type, '')
         return ''
     
+    def filter_hero_names(self, camp: Optional[str] = None, tags: Optional[List[str]] = None,
+                          troop_grades: Optional[Dict[str, str]] = None) -> List[str]:
+        """通过二级索引筛选武将，返回按数据顺序排列的武将名称
+        
+        Args:
+            camp: 阵营
+            tags: 必须全部包含的标签
+            troop_grades: {兵种: 最低适性等级}，如{"骑兵": "A"}表示骑兵适性为S或A
+        """
+        criteria = []
+        if camp:
+            criteria.append(("阵营", [camp]))
+        for tag in dict.fromkeys(tags or []):
+            criteria.append(("标签", [tag]))
+        for troop, grade in (troop_grades or {}).items():
+            grades = FITNESS_GRADES[:FITNESS_GRADES.index(grade) + 1] if grade in FITNESS_GRADES else [grade]
+            criteria.append(("兵种", [(troop, g) for g in grades]))
+        return self._get_index("hero_index").filter(criteria)
+    
+    def filter_skill_names(self, skill_type: Optional[str] = None, quality: Optional[str] = None,
+                           troop: Optional[str] = None) -> List[str]:
+        """通过二级索引按类型、品质和适用兵种筛选战法，返回按数据顺序排列的战法名称"""
+        criteria = []
+        if skill_type:
+            criteria.append(("类型", [skill_type]))
+        if quality:
+            criteria.append(("品质", [quality]))
+        if troop:
+            criteria.append(("适用兵种", [troop]))
+        return self._get_index("skill_index").filter(criteria)
+    
+    def get_hero_skills(self, hero_name: str, hero_info: Optional[Dict[str, Any]] = None) -> List[tuple]:
+        """武将已解析的战法[(字段, 战法名称, 战法详情)]，按自带、传承的顺序，不包含找不到详情的战法
+        
+        传入hero_info时检查其中的战法名称与关系图是否一致（武将数据被直接修改而未重新加载时
+        不一致），不一致时按名称查询战法详情
+        """
+        if hero_info is not None:
+            skill_names = {key: hero_info.get(key, "") for key in HERO_SKILL_KEYS if hero_info.get(key, "")}
+            if skill_names != self._get_index("skill_graph").get_hero_skill_names(hero_name):
+                skills = []
+                for skill_key, skill_name in skill_names.items():
+                    skill_detail = self.get_skill_by_name(skill_name)
+                    if skill_detail:
+                        skills.append((skill_key, skill_name, skill_detail))
+                return skills
+        return self._get_index("skill_graph").get_hero_skills(hero_name) or []
+    
+    def get_hero_skill_names(self, hero_name: str) -> Optional[Dict[str, str]]:
+        """武将的战法名称{"自带战法": ..., "传承战法": ...}，武将不存在时返回None"""
+        return self._get_index("skill_graph").get_hero_skill_names(hero_name)
+    
+    def get_skill_heroes(self, skill_name: str) -> Dict[str, List[str]]:
+        """以战法为自带战法、传承战法的武将和战法的关联武将{"自带": [...], "传承": [...], "关联": [...]}"""
+        return self._get_index("skill_graph").get_skill_heroes(skill_name)
+    
+    def get_linked_skills(self, hero_name: str) -> List[str]:
+        """关联武将为指定武将的战法"""
+        return self._get_index("skill_graph").get_linked_skills(hero_name)
+    
+    def get_compatible_skill_names(self, hero_name: str, min_grade: str = "A") -> List[str]:
+        """适用兵种包含武将适性不低于min_grade的兵种的战法，按数据顺序排列"""
+        hero_info = self.get_hero_by_name(hero_name)
+        if not hero_info:
+            return []
+        grades = FITNESS_GRADES[:FITNESS_GRADES.index(min_grade) + 1] if min_grade in FITNESS_GRADES else [min_grade]
+        troops = [troop for troop, grade in hero_info.get("兵种", {}).items() if grade in grades]
+        if not troops:
+            return []
+        return self._get_index("skill_index").filter([("适用兵种", troops)])
+    
+    def get_hero_index_values(self, attribute: str) -> List[Any]:
+        """武将二级索引中属性（阵营、标签、兵种）的所有取值"""
+        return self._get_index("hero_index").values(attribute)
+    
+    def get_skill_index_values(self, attribute: str) -> List[Any]:
+        """战法二级索引中属性（类型、品质、适用兵种）的所有取值"""
+        return self._get_index("skill_index").values(attribute)
+    
     def search_heroes(self, keyword: str) -> Dict[str, Any]:
-        """根据关键字搜索武将"""
+        """根据关键字搜索武将
+        
+        在名称、阵营、标签和战法名称中查找，多个关键字用空格分隔且须全部匹配，
+        结果按相关度排序；关键字为空时返回全部武将
+        """
         heroes = self.get_heroes()
-        result = {}
-        for name, info in heroes.items():
-            if keyword.lower() in name.lower() or keyword.lower() in str(info).lower():
-                result[name] = info
-        return result
+        return {name: heroes[name] for name in self._get_index("hero_search").search(keyword)}
     
     def search_skills(self, keyword: str) -> Dict[str, Any]:
-        """根据关键字搜索战法"""
+        """根据关键字搜索战法
+        
+        在名称、类型、品质、来源、关联武将、适用兵种和描述中查找，多个关键字用空格分隔
+        且须全部匹配，结果按相关度排序；关键字为空时返回全部战法
+        """
         skills = self.get_skills()
-        result = {}
-        for name, info in skills.items():
-            if keyword.lower() in name.lower() or keyword.lower() in str(info).lower():
-                result[name] = info
-        return result
+        return {name: skills[name] for name in self._get_index("skill_search").search(keyword)}
     
     def get_announcement_list(self, page: int = 0, size: int = 20) -> Optional[Dict[str, Any]]:
         """
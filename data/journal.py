@@ -0,0 +1,114 @@
+# 数据更新的追加写日志
+import json
+import os
+import tempfile
+import threading
+from typing import Any, Dict, List
+
+# 日志文件保存在数据文件旁，文件名为数据文件名加该后缀
+JOURNAL_SUFFIX = ".journal"
+
+
+def journal_path_for(data_file_path: str) -> str:
+    """数据文件对应的日志文件路径"""
+    return data_file_path + JOURNAL_SUFFIX
+
+
+class UpdateJournal:
+    """数据文件的预写日志
+
+    每条更新写为一行紧凑的JSON并fsync后才应用到内存，写入量只与该条记录的大小有关。
+    记录是完整的新值（如整条战法信息），重复应用结果相同，因此合并到数据文件后
+    即使来不及清除日志，下次启动重放也不会出错。
+    进程在写入中途崩溃时最后一行不完整，读取时丢弃该行并截断文件。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def read(self) -> List[Dict[str, Any]]:
+        """读取所有完整的记录，并截断末尾不完整或损坏的部分"""
+        with self._lock:
+            try:
+                with open(self.path, "rb") as f:
+                    content = f.read()
+            except FileNotFoundError:
+                return []
+            records = []
+            valid_size = 0
+            for line in content.splitlines(keepends=True):
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    record = json.loads(line.decode("utf-8"))
+                except ValueError:
+                    break
+                records.append(record)
+                valid_size += len(line)
+            if valid_size < len(content):
+                print(f"日志末尾有不完整的记录，已丢弃 {len(content) - valid_size} 字节: {self.path}")
+                with open(self.path, "r+b") as f:
+                    f.truncate(valid_size)
+                    f.flush()
+                    os.fsync(f.fileno())
+            return records
+
+    def append(self, record: Dict[str, Any]) -> int:
+        """追加一条记录并写入磁盘，返回写入后的日志大小（字节）"""
+        line = (json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+        with self._lock:
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                written = 0
+                while written < len(line):
+                    written += os.write(fd, line[written:])
+                os.fsync(fd)
+                return os.fstat(fd).st_size
+            finally:
+                os.close(fd)
+
+    def size(self) -> int:
+        """日志大小（字节），文件不存在时为0"""
+        try:
+            return os.path.getsize(self.path)
+        except FileNotFoundError:
+            return 0
+
+    def discard(self, size: int) -> None:
+        """丢弃日志的前size字节（已合并到数据文件的记录），保留之后追加的记录"""
+        with self._lock:
+            try:
+                with open(self.path, "rb") as f:
+                    f.seek(size)
+                    rest = f.read()
+            except FileNotFoundError:
+                return
+            if not rest:
+                os.remove(self.path)
+                return
+            write_file_atomic(self.path, rest)
+
+
+def write_file_atomic(path: str, content: bytes) -> None:
+    """写入同目录下的临时文件并fsync后原子替换，崩溃时目标文件保持旧内容或新内容之一"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    # 目录项的更新也写入磁盘
+    if hasattr(os, "O_DIRECTORY"):
+        dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
@@ -0,0 +1,184 @@
+# 武将、战法的关键字搜索索引
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# 武将参与搜索的字段及权重（名称为字典的键）
+HERO_SEARCH_FIELDS = (("名称", 10), ("阵营", 3), ("标签", 3), ("自带战法", 2), ("传承战法", 2))
+
+# 战法参与搜索的字段及权重
+SKILL_SEARCH_FIELDS = (
+    ("名称", 10), ("类型", 3), ("品质", 2), ("来源", 2), ("关联武将", 2), ("适用兵种", 1), ("描述", 1)
+)
+
+# 列表字段各项之间的分隔符，不会出现在查询词中，避免跨项匹配
+_ITEM_SEPARATOR = "\x00"
+
+
+class SearchIndex:
+    """基于字符n-gram倒排表的子串搜索索引
+
+    索引每个字段的单字和相邻两字（中文无需分词），倒排表记录每条记录中包含该片段
+    的字段（位掩码）。查询词按空格拆分为多个词：一两个字的词直接查倒排表，更长的词
+    用其所有两字片段的倒排表求交，只在共同包含这些片段的字段上确认子串匹配。
+    所有词都匹配的记录按命中字段的权重之和排序，同分时保持数据中的顺序。
+    """
+
+    def __init__(self, fields: Sequence[Tuple[str, int]]):
+        self.fields = tuple(fields)
+        # 字段位掩码 -> 其中字段的最高权重
+        self._mask_weights = [
+            max((weight for i, (_, weight) in enumerate(self.fields) if mask >> i & 1), default=0)
+            for mask in range(1 << len(self.fields))
+        ]
+        # n-gram -> {记录名称: 包含该片段的字段位掩码}
+        self._postings: Dict[str, Dict[str, int]] = {}
+        # 字段全文（列表字段的每一项） -> {记录名称: 字段位掩码}，完全相同的匹配权重加倍
+        self._exact: Dict[str, Dict[str, int]] = {}
+        # 记录名称 -> 各字段的小写文本（按字段顺序）
+        self._texts: Dict[str, Tuple[str, ...]] = {}
+        # 记录名称 -> 在数据中的顺序
+        self._order: Dict[str, int] = {}
+        self._next_order = 0
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def build(self, records: Dict[str, Dict[str, Any]]) -> None:
+        """按数据重新构建索引"""
+        with self._lock:
+            self._postings = {}
+            self._exact = {}
+            self._texts = {}
+            self._order = {}
+            self._next_order = 0
+            for name, info in records.items():
+                self._add(name, info)
+
+    def update(self, name: str, info: Optional[Dict[str, Any]]) -> None:
+        """增量更新一条记录，info为None时删除该记录；已有记录保持原有顺序"""
+        with self._lock:
+            self._remove(name)
+            if info is not None:
+                self._add(name, info)
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[str]:
+        """搜索所有查询词都匹配的记录，按相关度从高到低返回名称
+
+        查询为空时按数据中的顺序返回全部记录。
+        """
+        terms = query.lower().split()
+        with self._lock:
+            if not terms:
+                names = sorted(self._texts, key=self._order.__getitem__)
+                return names[:limit] if limit is not None else names
+
+            scores = None
+            for term in dict.fromkeys(terms):
+                term_scores = self._match_term(term)
+                if scores is None:
+                    scores = term_scores
+                else:
+                    scores = {name: scores[name] + score for name, score in term_scores.items() if name in scores}
+                if not scores:
+                    return []
+            names = sorted(scores, key=lambda name: (-scores[name], self._order[name]))
+        return names[:limit] if limit is not None else names
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def _match_term(self, term: str) -> Dict[str, int]:
+        """返回包含term的记录及其命中字段的最高权重"""
+        postings = []
+        for gram in set(_grams(term, 2)) if len(term) > 2 else (term,):
+            posting = self._postings.get(gram)
+            if not posting:
+                return {}
+            postings.append(posting)
+
+        if len(postings) == 1 and len(term) <= 2:
+            masks = postings[0]
+        else:
+            # 从最短的倒排表开始求交，只在共同包含所有片段的字段上确认子串匹配
+            postings.sort(key=len)
+            masks = {}
+            for name, mask in postings[0].items():
+                for posting in postings[1:]:
+                    mask &= posting.get(name, 0)
+                    if not mask:
+                        break
+                if not mask:
+                    continue
+                texts = self._texts[name]
+                matched = 0
+                for i, text in enumerate(texts):
+                    if mask >> i & 1 and term in text:
+                        matched |= 1 << i
+                if matched:
+                    masks[name] = matched
+
+        mask_weights = self._mask_weights
+        matches = {name: mask_weights[mask] for name, mask in masks.items()}
+        for name, mask in self._exact.get(term, {}).items():
+            matches[name] = max(matches[name], mask_weights[mask] * 2)
+        return matches
+
+    def _add(self, name: str, info: Dict[str, Any]) -> None:
+        texts = tuple(_field_text(name if field == "名称" else info.get(field)) for field, _ in self.fields)
+        self._texts[name] = texts
+        if name not in self._order:
+            self._order[name] = self._next_order
+            self._next_order += 1
+        grams, items = _record_grams(texts)
+        for gram, mask in grams.items():
+            self._postings.setdefault(gram, {})[name] = mask
+        for item, mask in items.items():
+            self._exact.setdefault(item, {})[name] = mask
+
+    def _remove(self, name: str) -> None:
+        texts = self._texts.pop(name, None)
+        if texts is None:
+            return
+        grams, items = _record_grams(texts)
+        for index, keys in ((self._postings, grams), (self._exact, items)):
+            for key in keys:
+                entries = index.get(key)
+                if entries is not None:
+                    entries.pop(name, None)
+                    if not entries:
+                        del index[key]
+
+
+def _field_text(value: Any) -> str:
+    """字段值转为小写文本，列表各项之间用分隔符连接"""
+    if value is None:
+        return ""
+    if isinstance(value, (list, tuple)):
+        return _ITEM_SEPARATOR.join(str(item).lower() for item in value)
+    return str(value).lower()
+
+
+def _grams(text: str, n: int) -> List[str]:
+    return [text[i:i + n] for i in range(len(text) - n + 1)]
+
+
+def _record_grams(texts: Sequence[str]) -> Tuple[Dict[str, int], Dict[str, int]]:
+    """记录所有字段中的单字、两字片段和字段全文，及包含它们的字段位掩码（不跨列表项）"""
+    grams: Dict[str, int] = {}
+    items: Dict[str, int] = {}
+    for i, text in enumerate(texts):
+        bit = 1 << i
+        for item in text.split(_ITEM_SEPARATOR):
+            if not item:
+                continue
+            items[item] = items.get(item, 0) | bit
+            for gram in set(item).union(_grams(item, 2)):
+                grams[gram] = grams.get(gram, 0) | bit
+    return grams, items
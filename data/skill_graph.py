@@ -0,0 +1,111 @@
+# 武将与战法的关系图
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+# 武将信息中引用战法的字段，按解析顺序排列
+HERO_SKILL_KEYS = ("自带战法", "传承战法")
+
+
+class SkillGraph:
+    """武将与战法的双向关系
+
+    正向：武将 -> 自带战法、传承战法（预先解析为战法详情）；
+    反向：战法 -> 以其为自带战法、传承战法的武将，以及战法的关联武将。
+    所有查询都是字典查找；战法更新时只刷新与该战法相连的边。
+    """
+
+    def __init__(self):
+        # 武将名称 -> {字段: 战法名称}
+        self._hero_skill_names: Dict[str, Dict[str, str]] = {}
+        # 武将名称 -> [(字段, 战法名称, 战法详情)]，只包含能找到详情的战法
+        self._hero_skills: Dict[str, List[Tuple[str, str, Dict[str, Any]]]] = {}
+        # 战法名称 -> 字段 -> 引用该战法的武将（按数据顺序）
+        self._skill_heroes: Dict[str, Dict[str, List[str]]] = {}
+        # 战法名称 -> 关联武将
+        self._linked_hero: Dict[str, str] = {}
+        # 武将名称 -> 关联该武将的战法
+        self._hero_linked_skills: Dict[str, List[str]] = {}
+        self._skills: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def build(self, heroes: Dict[str, Dict[str, Any]], skills: Dict[str, Dict[str, Any]]) -> None:
+        """按数据重新构建关系图"""
+        with self._lock:
+            self._skills = dict(skills)
+            self._hero_skill_names = {}
+            self._skill_heroes = {}
+            for hero_name, hero_info in heroes.items():
+                names = {key: hero_info.get(key, "") for key in HERO_SKILL_KEYS if hero_info.get(key, "")}
+                self._hero_skill_names[hero_name] = names
+                for key, skill_name in names.items():
+                    self._skill_heroes.setdefault(skill_name, {}).setdefault(key, []).append(hero_name)
+            self._hero_skills = {hero_name: self._resolve(hero_name) for hero_name in self._hero_skill_names}
+
+            self._linked_hero = {}
+            self._hero_linked_skills = {}
+            for skill_name, skill_info in skills.items():
+                self._link(skill_name, skill_info)
+
+    def update_skill(self, skill_name: str, skill_info: Dict[str, Any]) -> None:
+        """战法详情更新后刷新关联武将和引用该战法的武将的解析结果"""
+        with self._lock:
+            self._skills[skill_name] = skill_info
+            old_hero = self._linked_hero.pop(skill_name, None)
+            if old_hero is not None:
+                self._hero_linked_skills[old_hero].remove(skill_name)
+                if not self._hero_linked_skills[old_hero]:
+                    del self._hero_linked_skills[old_hero]
+            self._link(skill_name, skill_info)
+            for hero_names in self._skill_heroes.get(skill_name, {}).values():
+                for hero_name in hero_names:
+                    self._hero_skills[hero_name] = self._resolve(hero_name)
+
+    def get_hero_skills(self, hero_name: str) -> Optional[List[Tuple[str, str, Dict[str, Any]]]]:
+        """武将的战法[(字段, 战法名称, 战法详情)]，按自带、传承的顺序；武将不存在时返回None"""
+        with self._lock:
+            skills = self._hero_skills.get(hero_name)
+            return list(skills) if skills is not None else None
+
+    def get_hero_skill_names(self, hero_name: str) -> Optional[Dict[str, str]]:
+        """武将引用的战法名称{字段: 战法名称}（包括找不到详情的战法）"""
+        with self._lock:
+            names = self._hero_skill_names.get(hero_name)
+            return dict(names) if names is not None else None
+
+    def get_skill_heroes(self, skill_name: str) -> Dict[str, List[str]]:
+        """以战法为自带战法、传承战法的武将，以及关联该战法的武将"""
+        with self._lock:
+            heroes = self._skill_heroes.get(skill_name, {})
+            linked_hero = self._linked_hero.get(skill_name)
+            return {
+                "自带": list(heroes.get("自带战法", [])),
+                "传承": list(heroes.get("传承战法", [])),
+                "关联": [linked_hero] if linked_hero else []
+            }
+
+    def get_linked_skills(self, hero_name: str) -> List[str]:
+        """关联武将为hero_name的战法"""
+        with self._lock:
+            return list(self._hero_linked_skills.get(hero_name, []))
+
+    def _resolve(self, hero_name: str) -> List[Tuple[str, str, Dict[str, Any]]]:
+        return [
+            (key, skill_name, self._skills[skill_name])
+            for key, skill_name in self._hero_skill_names[hero_name].items()
+            if self._skills.get(skill_name)
+        ]
+
+    def _link(self, skill_name: str, skill_info: Dict[str, Any]) -> None:
+        linked_hero = skill_info.get("关联武将") if skill_info else None
+        if linked_hero:
+            self._linked_hero[skill_name] = linked_hero
+            self._hero_linked_skills.setdefault(linked_hero, []).append(skill_name)
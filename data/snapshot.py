@@ -0,0 +1,64 @@
+# 数据文件的二进制快照
+import os
+import pickle
+import tempfile
+from typing import Any, Dict, Optional
+
+# 快照格式版本，修改快照内容或其中对象的结构时需要递增，使旧快照失效
+SNAPSHOT_FORMAT_VERSION = 1
+
+# 快照文件保存在数据文件旁，文件名为数据文件名加该后缀
+SNAPSHOT_SUFFIX = ".snapshot"
+
+
+def snapshot_path_for(data_file_path: str) -> str:
+    """数据文件对应的快照文件路径"""
+    return data_file_path + SNAPSHOT_SUFFIX
+
+
+def source_key(data_file_path: str) -> Dict[str, int]:
+    """数据文件的修改时间和大小，两者不变时认为文件内容未变化"""
+    stat = os.stat(data_file_path)
+    return {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+
+def read_snapshot(snapshot_path: str) -> Optional[Dict[str, Any]]:
+    """读取快照，文件不存在、损坏或格式版本不同时返回None
+
+    快照内容为:
+        {"format": 格式版本, "source": 数据文件的source_key, "data_hash": 数据文件内容哈希,
+         "data": 解析后的数据, "indexes": {索引名称: pickle序列化的索引}, "artifacts": {键: pickle序列化的派生数据}}
+    快照由本程序在数据文件旁写入，按pickle格式直接反序列化。
+    """
+    try:
+        with open(snapshot_path, "rb") as f:
+            snapshot = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"读取数据快照时出错: {e}")
+        return None
+    if not isinstance(snapshot, dict) or snapshot.get("format") != SNAPSHOT_FORMAT_VERSION:
+        return None
+    return snapshot
+
+
+def write_snapshot(snapshot_path: str, snapshot: Dict[str, Any]) -> bool:
+    """写入快照：先写入同目录下的临时文件再原子替换，多个进程同时写入时读到的总是完整快照"""
+    snapshot = dict(snapshot, format=SNAPSHOT_FORMAT_VERSION)
+    directory = os.path.dirname(os.path.abspath(snapshot_path))
+    temp_path = None
+    try:
+        fd, temp_path = tempfile.mkstemp(prefix=os.path.basename(snapshot_path) + ".", suffix=".tmp",
+                                         dir=directory)
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+        # mkstemp创建的文件只有所有者可读写，改为与普通数据文件相同的权限
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, snapshot_path)
+        return True
+    except Exception as e:
+        print(f"写入数据快照时出错: {e}")
+        if temp_path is not None and os.path.exists(temp_path):
+            os.remove(temp_path)
+        return False
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# 测试武将、战法属性二级索引
+
+import sys
+import os
+import shutil
+import tempfile
+import time
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.data_manager import FITNESS_GRADES, DataManager
+
+def test_attribute_index():
+    """测试索引筛选与逐条扫描一致，以及更新战法后索引保持一致"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        data_file = os.path.join(temp_dir, "data.json")
+        shutil.copy("data/consolidated_ocr_data.json", data_file)
+        data_manager = DataManager(data_file)
+        heroes = data_manager.get_heroes()
+        skills = data_manager.get_skills()
+
+        # 武将：阵营、标签、兵种适性的组合筛选与逐条扫描一致（按数据顺序）
+        for camp, tags, troop_grades in (("魏", None, None), (None, ["辅"], None), ("蜀", ["辅", "盾"], None),
+                                         (None, None, {"骑兵": "S"}), ("吴", None, {"弓兵": "A", "盾兵": "B"}),
+                                         ("不存在的阵营", None, None)):
+            expected = [
+                name for name, info in heroes.items()
+                if (not camp or info.get("阵营") == camp)
+                and all(tag in info.get("标签", []) for tag in tags or [])
+                and all(info.get("兵种", {}).get(troop) in FITNESS_GRADES[:FITNESS_GRADES.index(grade) + 1]
+                        for troop, grade in (troop_grades or {}).items())
+            ]
+            result = data_manager.filter_hero_names(camp=camp, tags=tags, troop_grades=troop_grades)
+            print(f"阵营{camp}、标签{tags}、兵种{troop_grades}: {len(result)}个武将")
+            assert result == expected
+        assert data_manager.filter_hero_names() == data_manager.get_all_hero_names()
+
+        # 战法：类型、品质、适用兵种的组合筛选
+        for skill_type, quality, troop in (("主动", None, None), ("指挥", "S", None), (None, "A", "器械")):
+            expected = [
+                name for name, info in skills.items()
+                if (not skill_type or info.get("类型") == skill_type)
+                and (not quality or info.get("品质") == quality)
+                and (not troop or troop in info.get("适用兵种", []))
+            ]
+            assert data_manager.filter_skill_names(skill_type, quality, troop) == expected
+
+        start = time.perf_counter()
+        for _ in range(1000):
+            data_manager.filter_hero_names(camp="魏", tags=["辅"], troop_grades={"骑兵": "A"})
+        print(f"多条件筛选武将平均耗时: {(time.perf_counter() - start) * 1000:.1f}微秒")
+
+        # 更新战法后索引与数据一致
+        skill_name = "乱世奸雄"
+        skill_info = dict(skills[skill_name])
+        old_type = skill_info["类型"]
+        skill_info.update({"类型": "测试类型", "适用兵种": ["器械"]})
+        data_manager.update_skill(skill_name, skill_info)
+        assert skill_name not in data_manager.filter_skill_names(skill_type=old_type)
+        assert data_manager.filter_skill_names(skill_type="测试类型", troop="器械") == [skill_name]
+        assert "测试类型" in data_manager.get_skill_index_values("类型")
+        skill_info["类型"] = old_type
+        data_manager.update_skill(skill_name, skill_info)
+        assert "测试类型" not in data_manager.get_skill_index_values("类型")
+
+if __name__ == "__main__":
+    test_attribute_index()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# 测试多样化队伍推荐
+
+import sys
+import os
+import itertools
+import time
+
+import numpy as np
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.data_manager import DataManager
+from core.synergy_analyzer import SynergyAnalyzer
+from core.recommender import Recommender
+from core.diversity import select_diverse_teams
+
+def naive_diverse(teams, scores, count, max_hero_reuse, max_shared_heroes, required=None):
+    """逐一与已选队伍比较的参考实现"""
+    order = sorted(range(len(scores)), key=lambda i: -scores[i])
+    chosen = []
+    uses = {}
+    for i in order:
+        team = set(teams[i].tolist()) - {required}
+        if any(uses.get(hero, 0) >= max_hero_reuse for hero in team):
+            continue
+        if any(len(team & set(teams[j].tolist())) > max_shared_heroes for j in chosen):
+            continue
+        chosen.append(i)
+        for hero in team:
+            uses[hero] = uses.get(hero, 0) + 1
+        if len(chosen) == count:
+            break
+    return chosen
+
+def test_diversity():
+    """测试多样化选择与参考实现一致，以及diverse策略的推荐"""
+    # 随机评分（带大量同分）上与逐一比较的参考实现一致
+    rng = np.random.default_rng(0)
+    teams = np.array(list(itertools.combinations(range(12), 3)))
+    for max_hero_reuse, max_shared_heroes in ((1, 0), (2, 1), (3, 1), (2, 2)):
+        scores = rng.integers(0, 20, len(teams)).astype(np.float64)
+        fast = select_diverse_teams(teams, scores, 8, 12, max_hero_reuse, max_shared_heroes)
+        assert fast == naive_diverse(teams, scores, 8, max_hero_reuse, max_shared_heroes)
+        # 必选武将既不计入使用次数，也不计入共有的武将
+        required_teams = teams[(teams == 5).any(axis=1)]
+        required_scores = scores[(teams == 5).any(axis=1)]
+        fast = select_diverse_teams(required_teams, required_scores, 8, 12, max_hero_reuse, max_shared_heroes,
+                                    required=5)
+        assert fast == naive_diverse(required_teams, required_scores, 8, max_hero_reuse, max_shared_heroes,
+                                     required=5)
+
+    data_manager = DataManager("data/consolidated_ocr_data.json")
+    synergy_analyzer = SynergyAnalyzer(data_manager)
+    recommender = Recommender(data_manager, synergy_analyzer)
+
+    start = time.time()
+    diverse_teams = recommender.recommend_teams(count=10, strategy="diverse")
+    print(f"多样化推荐耗时: {time.time() - start:.3f}秒")
+    for i, team in enumerate(diverse_teams[:5], 1):
+        print(f"  {i}. 队伍: {team['队伍']}, 评分: {team['评分']}")
+    assert len(diverse_teams) == 10
+    # 每名武将最多出现两次，任意两支队伍最多共有一名武将
+    hero_uses = {}
+    for team in diverse_teams:
+        for hero in team["队伍"]:
+            hero_uses[hero] = hero_uses.get(hero, 0) + 1
+        assert team["评分"] == synergy_analyzer.calculate_synergy_score(team["队伍"])
+    assert max(hero_uses.values()) <= 2
+    for team1, team2 in itertools.combinations(diverse_teams, 2):
+        assert len(set(team1["队伍"]) & set(team2["队伍"])) <= 1
+    # 第一支队伍就是评分最高的队伍
+    assert diverse_teams[0] == recommender.recommend_teams(count=1, strategy="exact")[0]
+
+    # 必选武将不受重复次数限制
+    required_teams = recommender.recommend_teams(count=5, strategy="diverse", required_hero="曹操",
+                                                 max_hero_reuse=1)
+    print(f"必选曹操的多样化推荐: {[team['队伍'] for team in required_teams]}")
+    assert all(team["队伍"][0] == "曹操" and len(set(team["队伍"])) == 3 for team in required_teams)
+    others = [hero for team in required_teams for hero in team["队伍"][1:]]
+    assert len(others) == len(set(others))
+
+    # 默认限制下必选武将的队友可以出现两次，队友之间的武将对不重复
+    required_teams = recommender.recommend_teams(count=10, strategy="diverse", required_hero="曹操")
+    print(f"必选曹操的多样化推荐（默认限制）: {[team['队伍'] for team in required_teams]}")
+    exact_teams = recommender.recommend_teams(count=1000, strategy="exact", required_hero="曹操")
+    expected = naive_diverse(np.array([[hero for hero in team["队伍"]] for team in exact_teams], dtype=object),
+                             [team["评分"] for team in exact_teams], 10, 2, 1, required="曹操")
+    assert required_teams == [exact_teams[i] for i in expected]
+    others = [hero for team in required_teams for hero in team["队伍"][1:]]
+    assert max(others.count(hero) for hero in others) == 2
+
+if __name__ == "__main__":
+    test_diversity()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+# 测试武将数据编译器
+
+import sys
+import os
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.data_manager import DataManager
+from core.synergy_analyzer import SynergyAnalyzer
+
+def test_hero_compiler():
+    """测试武将数据编译器"""
+    data_manager = DataManager("data/consolidated_ocr_data.json")
+    synergy_analyzer = SynergyAnalyzer(data_manager)
+    compiled = synergy_analyzer.get_compiled_heroes()
+    print(f"编译武将数量: {len(compiled)}")
+    print(f"标签词表: {compiled.tag_vocab}")
+    print(f"兵种词表: {compiled.troop_vocab}")
+    print(f"阵营词表: {compiled.camp_vocab}")
+    print(f"战法类型词表: {compiled.skill_type_vocab}")
+    
+    # 测试编译记录与原始数据对应
+    hero = data_manager.get_hero_by_name("曹操")
+    record = compiled.get("曹操")
+    print(f"曹操的编译记录: {record}")
+    assert compiled.camp_vocab[record.camp_id] == hero["阵营"]
+    assert sorted(compiled.tag_vocab[t] for t in record.tag_ids) == sorted(set(hero["标签"]))
+    assert record.troop_count == len(hero["兵种"])
+    skill_types = [data_manager.get_skill_by_name(hero[key])["类型"] for key in ("自带战法", "传承战法")]
+    assert [compiled.skill_type_vocab[t] for t in record.skill_types] == skill_types
+    
+    # 测试规则矩阵
+    active = compiled.skill_type_ids["主动"]
+    passive = compiled.skill_type_ids["被动"]
+    print(f"主动+被动协同值: {compiled.skill_synergy_matrix[active][passive]}, "
+          f"被动+主动协同值: {compiled.skill_synergy_matrix[passive][active]}")
+    
+    # 测试不存在的武将
+    print(f"不存在武将的编译记录: {compiled.get('不存在的武将')}")
+    
+    # 测试更新战法后重新编译
+    skill_name = hero["传承战法"]
+    skill_info = dict(data_manager.get_skill_by_name(skill_name))
+    data_manager.data_version += 1
+    recompiled = synergy_analyzer.get_compiled_heroes()
+    print(f"数据版本变化后重新编译: {recompiled is not compiled}")
+    assert recompiled is not compiled
+    assert recompiled.get("曹操") == record
+    print(f"{skill_name} 类型: {skill_info['类型']}")
+
+if __name__ == "__main__":
+    test_hero_compiler()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# 测试异步任务管理
+
+import sys
+import os
+import threading
+import time
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.data_manager import DataManager
+from core.synergy_analyzer import SynergyAnalyzer
+from core.recommender import Recommender
+from core.job_manager import JobManager, JOB_CANCELLED, JOB_DONE, JOB_FAILED
+
+def wait_for(job, timeout=30):
+    deadline = time.time() + timeout
+    while not job.finished and time.time() < deadline:
+        time.sleep(0.01)
+    return job.state
+
+def test_job_manager():
+    """测试异步推荐任务的进度、结果和取消"""
+    data_manager = DataManager("data/consolidated_ocr_data.json")
+    synergy_analyzer = SynergyAnalyzer(data_manager)
+    recommender = Recommender(data_manager, synergy_analyzer)
+    job_manager = JobManager(max_workers=1, history_size=2)
+
+    # 测试精确推荐任务：报告进度，结果与同步调用一致
+    progress_log = []
+    def run_recommend(job):
+        def progress(done_count, total_count):
+            progress_log.append((done_count, total_count))
+            job.report_progress(done_count, total_count)
+        return recommender.recommend_teams(count=5, strategy="exact", progress=progress)
+
+    job = job_manager.submit("recommend", run_recommend)
+    print(f"推荐任务最终状态: {wait_for(job)}, 进度: {job.to_dict()['scored']}/{job.to_dict()['total']}")
+    assert job.state == JOB_DONE
+    assert job.result == recommender.recommend_teams(count=5, strategy="exact")
+    assert len(progress_log) > 1 and progress_log[-1][0] == progress_log[-1][1]
+
+    # 测试取消运行中的任务和排队中的任务
+    started = threading.Event()
+    def run_until_cancelled(job):
+        started.set()
+        for i in range(1000):
+            job.report_progress(i, 1000)
+            time.sleep(0.01)
+        return "未被取消"
+
+    running = job_manager.submit("recommend", run_until_cancelled)
+    queued = job_manager.submit("recommend", lambda job: "不应执行")
+    started.wait(5)
+    job_manager.cancel(queued.job_id)
+    job_manager.cancel(running.job_id)
+    print(f"运行中任务取消后状态: {wait_for(running)}, 排队任务取消后状态: {queued.state}")
+    assert running.state == JOB_CANCELLED and queued.state == JOB_CANCELLED
+    assert running.result is None and queued.result is None
+
+    # 测试任务出错
+    def run_failing(job):
+        raise ValueError("测试错误")
+    failing = job_manager.submit("recommend", run_failing)
+    print(f"出错任务状态: {wait_for(failing)}, 错误: {failing.error}")
+    assert failing.state == JOB_FAILED
+
+    # 只保留最近的history_size个已结束任务
+    print(f"任务统计: {job_manager.stats()}")
+    assert job_manager.get(job.job_id) is None
+    assert job_manager.get(failing.job_id) is failing
+    job_manager.shutdown()
+
+if __name__ == "__main__":
+    test_job_manager()
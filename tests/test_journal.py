@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# 测试战法更新日志
+
+import sys
+import os
+import json
+import shutil
+import tempfile
+import threading
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.data_manager import DataManager
+from data.journal import journal_path_for
+from data.snapshot import read_snapshot, snapshot_path_for, source_key
+from core.synergy_analyzer import SynergyAnalyzer
+from core.score_store import ScoreStore
+from core.score_columns import ScoreColumns
+
+def test_journal():
+    """测试更新日志的追加、重放、合并和并发写入"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        data_file = os.path.join(temp_dir, "data.json")
+        shutil.copy("data/consolidated_ocr_data.json", data_file)
+        journal_file = journal_path_for(data_file)
+        with open(data_file, "rb") as f:
+            original = f.read()
+
+        data_manager = DataManager(data_file)
+        data_manager.journal_compact_threshold = 1000
+        skill_names = data_manager.get_all_skill_names()
+
+        # 更新只追加到日志，不重写数据文件
+        updates = {}
+        for skill_name in skill_names[:3]:
+            skill_info = dict(data_manager.get_skill_by_name(skill_name), 描述=f"{skill_name}的新描述")
+            assert data_manager.update_skill(skill_name, skill_info)
+            updates[skill_name] = skill_info
+        with open(data_file, "rb") as f:
+            assert f.read() == original
+        with open(journal_file, "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        assert len(lines) == 3 and json.loads(lines[0])["name"] == skill_names[0]
+        print(f"日志记录: {lines[0][:80]}...")
+
+        # 启动时重放日志，数据和索引都包含更新
+        replayed = DataManager(data_file)
+        for skill_name, skill_info in updates.items():
+            assert replayed.get_skill_by_name(skill_name) == skill_info
+            assert skill_name in replayed.search_skills(f"{skill_name}的新描述")
+
+        # 写入中途崩溃留下的不完整记录被丢弃，之后的记录正常追加
+        with open(journal_file, "ab") as f:
+            f.write(b'{"op":"update_skill","name":')
+        replayed = DataManager(data_file)
+        replayed.journal_compact_threshold = 1000
+        skill_info = dict(updates[skill_names[0]], 品质="A")
+        assert replayed.update_skill(skill_names[0], skill_info)
+        updates[skill_names[0]] = skill_info
+        with open(journal_file, "r", encoding="utf-8") as f:
+            assert len(f.read().splitlines()) == 4
+        assert DataManager(data_file).get_skill_by_name(skill_names[0]) == skill_info
+
+        # 合并日志：更新写入数据文件，日志清空，快照与新的数据文件一致
+        assert replayed.compact_journal()
+        assert not os.path.exists(journal_file)
+        with open(data_file, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        for skill_name, skill_info in updates.items():
+            assert data["战法"][skill_name] == skill_info
+        assert read_snapshot(snapshot_path_for(data_file))["source"] == source_key(data_file)
+        assert DataManager(data_file).get_skill_by_name(skill_names[0]) == updates[skill_names[0]]
+
+        # 达到阈值时在后台合并
+        data_manager = DataManager(data_file)
+        data_manager.journal_compact_threshold = 2
+        for skill_name in skill_names[3:5]:
+            assert data_manager.update_skill(skill_name, dict(data_manager.get_skill_by_name(skill_name), 品质="B"))
+        data_manager._compact_thread.join()
+        assert not os.path.exists(journal_file)
+        with open(data_file, "r", encoding="utf-8") as f:
+            assert json.load(f)["战法"][skill_names[4]]["品质"] == "B"
+
+        # 并发更新：所有记录都完整写入日志，重放结果与内存中的数据一致
+        data_manager.journal_compact_threshold = 1000
+        def worker(names):
+            for name in names:
+                data_manager.update_skill(name, dict(data_manager.get_skill_by_name(name), 类型="被动"))
+        threads = [threading.Thread(target=worker, args=(skill_names[i::8][:10],)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        with open(journal_file, "r", encoding="utf-8") as f:
+            assert len(f.read().splitlines()) == 80
+        assert DataManager(data_file).get_skills() == data_manager.get_skills()
+        print("日志测试通过")
+
+def test_journal_invalid_records():
+    """测试无效的更新不写入日志，日志中的无效记录在重放时被跳过"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        data_file = os.path.join(temp_dir, "data.json")
+        shutil.copy("data/consolidated_ocr_data.json", data_file)
+        journal_file = journal_path_for(data_file)
+        data_manager = DataManager(data_file)
+        skill_name = data_manager.get_all_skill_names()[0]
+        skill_info = data_manager.get_skill_by_name(skill_name)
+        data_version = data_manager.data_version
+
+        for invalid in ("abc", [1, 2], None):
+            assert not data_manager.update_skill(skill_name, invalid)
+        assert not os.path.exists(journal_file)
+        assert data_manager.get_skill_by_name(skill_name) == skill_info
+        assert data_manager.data_version == data_version
+
+        # 旧版本写入的无效记录不影响启动
+        with open(journal_file, "w", encoding="utf-8") as f:
+            f.write('{"op":"update_skill","name":"%s","info":"abc"}\n' % skill_name)
+            f.write('[1,2]\n')
+            f.write('{"op":"update_skill","name":"%s","info":{"描述":"新描述"}}\n' % skill_name)
+        replayed = DataManager(data_file)
+        assert replayed.get_skill_by_name(skill_name) == {"描述": "新描述"}
+        assert replayed.search_skills("新描述") == {skill_name: {"描述": "新描述"}}
+
+def test_journal_invalidates_scores():
+    """测试更新战法后数据哈希变化，持久化评分和列式文件随之失效"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        data_file = os.path.join(temp_dir, "data.json")
+        shutil.copy("data/consolidated_ocr_data.json", data_file)
+        data_manager = DataManager(data_file)
+        store = ScoreStore(os.path.join(temp_dir, "score_cache.sqlite3"))
+        synergy_analyzer = SynergyAnalyzer(data_manager, score_store=store)
+        columns = ScoreColumns.build(synergy_analyzer)
+        team = ["曹操", "荀彧", "郭嘉"]
+        score = synergy_analyzer.calculate_synergy_score(team)
+        data_hash = data_manager.data_hash
+        assert columns.is_current(data_manager)
+
+        skill_name = data_manager.get_heroes()["曹操"]["自带战法"]
+        assert data_manager.update_skill(skill_name, dict(data_manager.get_skill_by_name(skill_name), 类型="内政"))
+        assert data_manager.data_hash != data_hash
+        assert not columns.is_current(data_manager)
+        reference = SynergyAnalyzer(DataManager(data_file))
+        new_score = reference.calculate_synergy_score(team)
+        assert new_score != score
+        assert synergy_analyzer.calculate_synergy_score(team) == new_score
+        assert store.data_hash == data_manager.data_hash
+        print(f"更新战法后评分: {score} -> {new_score}")
+        store.close()
+
+        # 重启后重放日志得到相同的数据哈希，存储中的评分与实时评分一致
+        restarted = DataManager(data_file)
+        assert restarted.data_hash == data_manager.data_hash
+        store = ScoreStore(os.path.join(temp_dir, "score_cache.sqlite3"))
+        assert SynergyAnalyzer(restarted, score_store=store).calculate_synergy_score(team) == new_score
+        store.close()
+
+if __name__ == "__main__":
+    test_journal()
+    test_journal_invalid_records()
+    test_journal_invalidates_scores()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# 测试预计算排行榜
+
+import sys
+import os
+import shutil
+import tempfile
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.data_manager import DataManager
+from core.synergy_analyzer import SynergyAnalyzer
+from core.recommender import Recommender
+from core.leaderboards import Leaderboards
+
+def test_leaderboards():
+    """测试预计算排行榜"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # 使用数据文件副本，避免更新战法时修改原文件
+        data_file = os.path.join(temp_dir, "consolidated_ocr_data.json")
+        shutil.copy("data/consolidated_ocr_data.json", data_file)
+        data_manager = DataManager(data_file)
+        synergy_analyzer = SynergyAnalyzer(data_manager)
+        
+        leaderboards = Leaderboards(data_manager, synergy_analyzer, size=10)
+        leaderboards.build()
+        print(f"武将排行榜: {len(leaderboards.hero_boards)}, 阵营排行榜: {len(leaderboards.camp_boards)}, "
+              f"标签排行榜: {len(leaderboards.tag_boards)}")
+        
+        # 测试排行榜结果与实时计算一致
+        live = Recommender(data_manager, synergy_analyzer)
+        cached = Recommender(data_manager, synergy_analyzer, leaderboards=leaderboards)
+        assert cached.recommend_single_hero_team("曹操", 5) == live.recommend_single_hero_team("曹操", 5)
+        assert cached.recommend_teams_by_camp("魏", 10) == live.recommend_teams_by_camp("魏", 10)
+        assert cached.recommend_teams_by_tag("谋", 10) == live.recommend_teams_by_tag("谋", 10)
+        print(f"魏阵营排行榜前3名: {leaderboards.top_for_camp('魏', 3)}")
+        
+        # 测试超出排行榜容量的查询回退到实时计算
+        assert leaderboards.top_for_camp("魏", 1000) is None
+        assert len(cached.recommend_teams_by_camp("魏", 30)) == 30
+        
+        # 测试更新战法后增量更新与完整重建结果一致
+        skill_name = data_manager.get_hero_by_name("曹操")["传承战法"]
+        skill_info = dict(data_manager.get_skill_by_name(skill_name))
+        skill_info["类型"] = "被动" if skill_info["类型"] != "被动" else "主动"
+        data_manager.update_skill(skill_name, skill_info)
+        leaderboards.apply_skill_update(skill_name)
+        
+        rebuilt = Leaderboards(data_manager, synergy_analyzer, size=10)
+        rebuilt.build()
+        for boards, expected_boards in ((leaderboards.hero_boards, rebuilt.hero_boards),
+                                        (leaderboards.camp_boards, rebuilt.camp_boards),
+                                        (leaderboards.tag_boards, rebuilt.tag_boards)):
+            for key, board in boards.items():
+                assert board.top(10) == expected_boards[key].top(10)
+        print(f"更新战法 {skill_name} 后魏阵营排行榜前3名: {leaderboards.top_for_camp('魏', 3)}")
+
+if __name__ == "__main__":
+    test_leaderboards()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# 测试多队伍阵容分配
+
+import sys
+import os
+import itertools
+import random
+import time
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.data_manager import DataManager
+from core.synergy_analyzer import SynergyAnalyzer
+from core.recommender import Recommender
+from core.roster import Roster
+from core.lineup_allocator import allocate_disjoint_teams
+
+def test_lineup_allocator():
+    """测试多队伍阵容分配"""
+    data_manager = DataManager("data/consolidated_ocr_data.json")
+    synergy_analyzer = SynergyAnalyzer(data_manager)
+    tables = synergy_analyzer.get_synergy_tables()
+    
+    # 测试与穷举结果一致
+    random.seed(0)
+    for _ in range(5):
+        candidates = sorted(random.sample(range(len(tables)), 9))
+        teams = list(itertools.combinations(candidates, 3))
+        scores = dict(zip(teams, synergy_analyzer.calculate_synergy_scores(teams)))
+        best = max(
+            sum(scores[team] for team in selection)
+            for selection in itertools.combinations(teams, 3)
+            if len({hero for team in selection for hero in team}) == 9
+        )
+        result = allocate_disjoint_teams(tables, candidates, 3)
+        assert result["optimal"]
+        assert result["total"] == round(best, 2)
+    print(f"穷举验证通过，最后一组: {result}")
+    
+    # 测试60个武将的阵容分配5支队伍
+    recommender = Recommender(data_manager, synergy_analyzer)
+    roster = Roster.from_names(synergy_analyzer.get_compiled_heroes(),
+                               heroes=random.sample(data_manager.get_all_hero_names(), 60))
+    start_time = time.time()
+    lineup = recommender.recommend_disjoint_teams(team_count=5, roster=roster)
+    print(f"60个武将分配5支队伍耗时 {time.time() - start_time:.3f} 秒: {lineup}")
+    heroes = [hero for team in lineup["队伍"] for hero in team["队伍"]]
+    assert len(lineup["队伍"]) == 5
+    assert len(set(heroes)) == 15
+    
+    # 测试武将不足时减少队伍数量
+    small_roster = Roster.from_names(synergy_analyzer.get_compiled_heroes(),
+                                     heroes=data_manager.get_all_hero_names()[:7])
+    small_lineup = recommender.recommend_disjoint_teams(team_count=5, roster=small_roster)
+    print(f"7个武将的阵容分配结果: {small_lineup}")
+    assert len(small_lineup["队伍"]) == 2
+
+if __name__ == "__main__":
+    test_lineup_allocator()
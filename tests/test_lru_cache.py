@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# 测试LRU缓存
+
+import sys
+import os
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.lru_cache import LRUCache, MISSING
+from data.data_manager import DataManager
+from core.synergy_analyzer import SynergyAnalyzer
+
+def test_lru_cache():
+    """测试LRU缓存"""
+    cache = LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", None)
+    
+    # 测试命中（缓存值可以是None）
+    print(f"a: {cache.get('a')}, b: {cache.get('b')}")
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    
+    # 测试淘汰最久未使用的键：最近访问了b，写入c时淘汰a
+    cache.put("c", 3)
+    assert cache.get("a") is MISSING
+    assert "b" in cache and "c" in cache
+    print(f"缓存统计: {cache.stats()}")
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["misses"] == 1
+    
+    # 测试容量为0时不缓存
+    disabled = LRUCache(0)
+    disabled.put("a", 1)
+    assert len(disabled) == 0
+
+def test_score_cache():
+    """测试协同评分缓存"""
+    data_manager = DataManager("data/consolidated_ocr_data.json")
+    synergy_analyzer = SynergyAnalyzer(data_manager)
+    
+    team = ["曹操", "夏侯惇", "荀彧"]
+    score = synergy_analyzer.calculate_synergy_score(team)
+    # 相同队伍的不同顺序使用同一缓存
+    assert synergy_analyzer.calculate_synergy_score(list(reversed(team))) == score
+    stats = synergy_analyzer.get_cache_stats()["score"]
+    print(f"协同评分缓存统计: {stats}")
+    assert stats["hits"] == 1 and stats["misses"] == 1
+    
+    # 测试数据版本变化后缓存失效
+    data_manager.data_version += 1
+    synergy_analyzer.calculate_synergy_score(team)
+    assert synergy_analyzer.get_cache_stats()["score"]["size"] == 1
+    
+    print(f"数据缓存统计: {data_manager.get_cache_stats()}")
+
+if __name__ == "__main__":
+    test_lru_cache()
+    test_score_cache()
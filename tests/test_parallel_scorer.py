@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+# 测试多进程并行队伍评分
+
+import sys
+import os
+import time
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.data_manager import DataManager
+from core.synergy_analyzer import SynergyAnalyzer
+from core.recommender import Recommender
+
+def test_parallel_scorer():
+    """测试多进程并行队伍评分"""
+    data_manager = DataManager("data/consolidated_ocr_data.json")
+    synergy_analyzer = SynergyAnalyzer(data_manager)
+    recommender = Recommender(data_manager, synergy_analyzer)
+    parallel_recommender = Recommender(data_manager, synergy_analyzer, parallel_workers=2)
+    
+    try:
+        # 测试并行评分与单进程评分结果一致
+        for query in [{}, {"required_hero": "曹操"}, {"required_camp": "吴"}]:
+            start = time.time()
+            parallel_teams = parallel_recommender.recommend_teams(count=10, strategy="exact", **query)
+            elapsed = time.time() - start
+            serial_teams = recommender.recommend_teams(count=10, strategy="exact", **query)
+            print(f"条件 {query} 并行评分耗时: {elapsed:.3f}秒, 与单进程结果一致: {parallel_teams == serial_teams}")
+            assert parallel_teams == serial_teams
+        
+        # 测试数据版本变化后重新共享分解表
+        data_manager.data_version += 1
+        parallel_teams = parallel_recommender.recommend_teams(count=5, strategy="exact")
+        serial_teams = recommender.recommend_teams(count=5, strategy="exact")
+        print(f"数据版本变化后并行评分结果一致: {parallel_teams == serial_teams}")
+        assert parallel_teams == serial_teams
+    finally:
+        parallel_recommender.parallel_scorer.close()
+
+if __name__ == "__main__":
+    test_parallel_scorer()
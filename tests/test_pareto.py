@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# 测试帕累托前沿推荐
+
+import sys
+import os
+import time
+
+import numpy as np
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.data_manager import DataManager
+from core.synergy_analyzer import SynergyAnalyzer
+from core.recommender import Recommender
+from core.pareto import estimate_hero_damage, pareto_front
+
+def naive_front(objectives):
+    """逐点检查是否被支配的参考实现"""
+    return np.array([
+        i for i in range(len(objectives))
+        if not ((objectives >= objectives[i]).all(axis=1) & (objectives > objectives[i]).any(axis=1)).any()
+    ], dtype=np.intp)
+
+def test_pareto():
+    """测试前沿计算与参考实现一致，以及前沿推荐的结果"""
+    # 随机数据（带大量相同取值和重复点）上与参考实现一致
+    rng = np.random.default_rng(0)
+    for _ in range(20):
+        count, dims = rng.integers(1, 500), rng.integers(1, 6)
+        objectives = rng.integers(0, 5, (count, dims)).astype(np.float64)
+        if rng.random() < 0.5:
+            objectives[:, -1] = rng.random(count)
+        assert np.array_equal(pareto_front(objectives), naive_front(objectives))
+
+    data_manager = DataManager("data/consolidated_ocr_data.json")
+    synergy_analyzer = SynergyAnalyzer(data_manager)
+    recommender = Recommender(data_manager, synergy_analyzer)
+
+    start = time.time()
+    front = recommender.recommend_pareto_teams()
+    print(f"全部武将的帕累托前沿: {len(front)}支队伍，耗时: {time.time() - start:.3f}秒")
+    for team in front[:3]:
+        print(f"  队伍: {team['队伍']}, 评分: {team['评分']}, 目标: {team['目标']}")
+    # 综合评分最高的队伍在前沿上
+    assert front[0]["评分"] == recommender.recommend_teams(count=1, strategy="exact")[0]["评分"]
+
+    # 小范围候选上与逐队计算目标后的参考实现一致
+    tables = synergy_analyzer.get_synergy_tables()
+    camp_front = recommender.recommend_pareto_teams(required_camp="吴")
+    camp_teams = [team["队伍"] for team in recommender.recommend_teams(count=10 ** 6, strategy="exact",
+                                                                      required_camp="吴")]
+    objectives = []
+    for team in camp_teams:
+        indices = np.array([[tables.hero_index[hero] for hero in team]])
+        fitness = sum(tables.troop_fitness[i] for i in indices[0]) / 3
+        damage = sum(estimate_hero_damage(data_manager.get_hero_by_name(hero)) for hero in team)
+        objectives.append(list(tables.score_components(indices)[0]) + [fitness, damage])
+    expected = sorted(tuple(camp_teams[i]) for i in naive_front(np.array(objectives)))
+    print(f"吴国武将的帕累托前沿: {len(camp_front)}支队伍（共{len(camp_teams)}支队伍）")
+    assert sorted(tuple(team["队伍"]) for team in camp_front) == expected
+
+    # 必选武将和数量限制
+    required_front = recommender.recommend_pareto_teams(required_hero="曹操", count=5)
+    assert len(required_front) == 5 and all(team["队伍"][0] == "曹操" for team in required_front)
+    assert "error" in recommender.recommend_pareto_teams(required_hero="不存在的武将")
+
+if __name__ == "__main__":
+    test_pareto()
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+# 测试队伍流式排序
+
+import sys
+import os
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.ranking import top_k_teams
+
+def test_top_k_teams():
+    """测试队伍流式排序"""
+    scores = {"甲": 50, "乙": 80, "丙": 80, "丁": 30, "戊": 90}
+    candidates = ([name] for name in scores)
+    
+    # 测试与全部排序后截取的结果一致（同分保持先出现的顺序）
+    ranked = top_k_teams(candidates, lambda team: scores[team[0]], 3)
+    expected = sorted(({"队伍": [name], "评分": score} for name, score in scores.items()),
+                      key=lambda x: x["评分"], reverse=True)[:3]
+    print(f"流式排序结果: {ranked}")
+    print(f"与全部排序结果一致: {ranked == expected}")
+    assert ranked == expected
+    
+    # 测试达到评分上限后提前结束
+    consumed = []
+    def score_fn(team):
+        consumed.append(team)
+        return 100
+    ranked = top_k_teams(([i] for i in range(1000)), score_fn, 5)
+    print(f"达到评分上限后提前结束，共评分 {len(consumed)} 支队伍, 结果: {[t['队伍'] for t in ranked]}")
+    assert len(consumed) == 5
+    
+    # 测试空候选和count为0
+    print(f"空候选结果: {top_k_teams(iter([]), score_fn, 5)}")
+    print(f"count为0结果: {top_k_teams(([i] for i in range(10)), score_fn, 0)}")
+
+if __name__ == "__main__":
+    test_top_k_teams()
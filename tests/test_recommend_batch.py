@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# 测试批量推荐
+
+import sys
+import os
+import time
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.data_manager import DataManager
+from core.synergy_analyzer import SynergyAnalyzer
+from core.recommender import Recommender
+from core.roster import Roster
+
+def test_recommend_batch():
+    """测试批量推荐与逐个推荐的结果一致"""
+    data_manager = DataManager("data/consolidated_ocr_data.json")
+    synergy_analyzer = SynergyAnalyzer(data_manager)
+    recommender = Recommender(data_manager, synergy_analyzer)
+    hero_names = data_manager.get_all_hero_names()
+
+    # 测试共享评分按候选武将读取的结果与实时评分一致
+    tables = synergy_analyzer.get_synergy_tables()
+    shared = recommender.get_shared_scores()
+    for candidates in (None, list(range(0, len(hero_names), 3))):
+        assert shared.top_k(8, candidates=candidates) == tables.top_k(8, candidates=candidates)
+
+    roster = Roster.from_names(synergy_analyzer.get_compiled_heroes(), heroes=hero_names[:40], skills=[])
+    queries = [{"count": 5, "required_hero": hero} for hero in hero_names[:20]]
+    queries += [
+        {"count": 5, "strategy": "exact", "required_camp": "蜀"},
+        {"count": 5, "strategy": "branch_and_bound", "required_tags": ["辅"], "excluded_heroes": ["诸葛亮"]},
+        {"count": 5, "strategy": "exact", "required_hero": hero_names[3], "roster": roster},
+        {"count": 5, "strategy": "exact", "time_budget_ms": 1000},
+        {"count": 5, "required_hero": "不存在的武将"},
+    ]
+
+    start = time.time()
+    batch_results = recommender.recommend_teams_batch(queries, workers=4)
+    print(f"批量推荐{len(queries)}个查询耗时: {time.time() - start:.3f}秒")
+    start = time.time()
+    single_results = [recommender.recommend_teams(**query) for query in queries]
+    print(f"逐个推荐耗时: {time.time() - start:.3f}秒")
+
+    for query, batch_result, single_result in zip(queries, batch_results, single_results):
+        if "time_budget_ms" in query:
+            assert batch_result["精确"] and batch_result["队伍"] == single_result["队伍"]
+        else:
+            assert batch_result == single_result
+    print(f"批量推荐结果与逐个推荐一致，第一个查询: {batch_results[0][0]}")
+    print(f"出错查询的结果: {batch_results[-1]}")
+    assert "error" in batch_results[-1]
+
+if __name__ == "__main__":
+    test_recommend_batch()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# 测试玩家阵容
+
+import sys
+import os
+import copy
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.data_manager import DataManager
+from core.synergy_analyzer import SynergyAnalyzer
+from core.recommender import Recommender
+from core.roster import Roster
+
+def test_roster():
+    """测试玩家阵容"""
+    data_manager = DataManager("data/consolidated_ocr_data.json")
+    synergy_analyzer = SynergyAnalyzer(data_manager)
+    recommender = Recommender(data_manager, synergy_analyzer)
+    compiled = synergy_analyzer.get_compiled_heroes()
+    
+    owned_heroes = data_manager.get_all_hero_names()[::2]
+    inherited_skills = sorted({hero["传承战法"] for hero in data_manager.get_heroes().values()})
+    owned_skills = inherited_skills[::3]
+    roster = Roster.from_names(compiled, heroes=owned_heroes, skills=owned_skills)
+    print(f"拥有武将: {int(roster.hero_mask.sum())}, 拥有战法: {int(roster.skill_mask.sum())}")
+    print(f"传承战法未拥有的武将: {int(roster.missing_inherited_skills(compiled).sum())}")
+    
+    # 测试只推荐拥有的武将，评分与去掉未拥有传承战法后的数据一致
+    teams = recommender.recommend_teams(count=5, roster=roster)
+    print(f"阵容推荐结果: {teams}")
+    
+    reference_manager = DataManager("data/consolidated_ocr_data.json")
+    reference_manager.data = copy.deepcopy(data_manager.data)
+    for hero in reference_manager.data["武将"].values():
+        if hero["传承战法"] not in owned_skills:
+            hero["传承战法"] = ""
+    reference_analyzer = SynergyAnalyzer(reference_manager)
+    for team in teams:
+        assert set(team["队伍"]) <= set(owned_heroes)
+        assert team["评分"] == reference_analyzer.calculate_synergy_score(team["队伍"])
+    
+    # 测试分支定界策略结果一致
+    assert recommender.recommend_teams(count=5, strategy="branch_and_bound", roster=roster) == teams
+    
+    # 测试排除传承战法未拥有的武将
+    drop_roster = Roster.from_names(compiled, heroes=owned_heroes, skills=owned_skills, drop_missing_skills=True)
+    missing = drop_roster.missing_inherited_skills(compiled)
+    for team in recommender.recommend_teams(count=5, roster=drop_roster):
+        assert not any(missing[compiled.hero_names.index(hero)] for hero in team["队伍"])
+    
+    # 测试必须包含的武将不在阵容中
+    not_owned = data_manager.get_all_hero_names()[1]
+    print(f"必须包含未拥有武将: {recommender.recommend_teams(count=5, required_hero=not_owned, roster=roster)}")
+    
+    # 测试未知名称
+    unknown_roster = Roster.from_names(compiled, heroes=["不存在的武将"], skills=["不存在的战法"])
+    print(f"未知武将: {unknown_roster.unknown_heroes}, 未知战法: {unknown_roster.unknown_skills}")
+    assert unknown_roster.unknown_heroes == ["不存在的武将"]
+
+if __name__ == "__main__":
+    test_roster()
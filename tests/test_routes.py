@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# 测试API路由的参数校验（在进程内分发请求，不需要启动服务）
+
+import sys
+import os
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from api import routes
+from api.routes import api_bp
+
+app = Flask(__name__)
+app.register_blueprint(api_bp, url_prefix='/api')
+
+def call(method, path, json=None):
+    """按请求方法和路径分发请求，返回(状态码, 响应JSON)"""
+    with app.test_request_context(path, method=method, json=json):
+        response = app.make_response(app.full_dispatch_request())
+        return response.status_code, response.get_json()
+
+def test_roster_validation():
+    """测试阵容参数格式错误时返回400"""
+    for roster in (["曹操", "荀彧"], "曹操", {"heroes": "曹操"}, {"skills": [1, 2]}):
+        for path in ('/api/recommend', '/api/recommend/lineup'):
+            status, body = call('POST', path, {"roster": roster, "strategy": "exact"})
+            print(f"{path} roster={roster}: {status} {body}")
+            assert status == 400 and "roster" in body["error"]
+    status, body = call('POST', '/api/recommend', {"roster": {"heroes": ["不存在的武将"]}})
+    assert status == 400 and body["unknown_heroes"] == ["不存在的武将"]
+
+def test_lineup_validation():
+    """测试多队伍推荐的队伍数量校验"""
+    for team_count in ("5", 0, -1, 2.5, None):
+        status, body = call('POST', '/api/recommend/lineup', {"team_count": team_count})
+        print(f"team_count={team_count!r}: {status} {body}")
+        assert status == 400 and "team_count" in body["error"]
+    status, body = call('POST', '/api/recommend/lineup', {"team_count": 2})
+    assert status == 200 and body["count"] == 2
+
+def test_skill_loadout_validation():
+    """测试战法配置优化的参数校验"""
+    path = '/api/skills/loadout'
+    assert call('POST', path, {"heroes": []})[0] == 400
+    for count in ("2", 0, 1.5, None):
+        status, body = call('POST', path, {"heroes": ["曹操", "荀彧", "郭嘉"], "count": count})
+        print(f"count={count!r}: {status} {body}")
+        assert status == 400 and "count" in body["error"]
+    status, body = call('POST', path, {"heroes": ["曹操", "荀彧", "郭嘉"], "count": 2})
+    assert status == 200, body
+
+def test_recommend_validation():
+    """测试推荐相关接口（/recommend、批量、帕累托、协同分析）的400错误"""
+    for body in ({"count": "3"}, {"count": 0}, {"weights": [1, 1]}, {"weights": {"skill": float("nan")}},
+                 {"weights": [-1, 1, 1, 1]}, {"time_budget_ms": -1}, {"time_budget_ms": True},
+                 {"time_budget_ms": float("nan")}, {"time_budget_ms": float("inf")},
+                 {"strategy": "diverse", "max_hero_reuse": 0}, {"strategy": "diverse", "max_shared_heroes": 3}):
+        status, response = call('POST', '/api/recommend', body)
+        print(f"/recommend {body}: {status} {response}")
+        assert status == 400
+    assert call('POST', '/api/recommend/pareto', {"count": "3"})[0] == 400
+    assert call('POST', '/api/recommend/pareto', {"weights": [1, 1]})[0] == 400
+    assert call('POST', '/api/recommend/batch', {"queries": "x"})[0] == 400
+    assert call('POST', '/api/recommend/batch', {"queries": []})[0] == 400
+    # 批量推荐中参数有误的查询单独返回错误
+    status, response = call('POST', '/api/recommend/batch', {"queries": [1, {"count": "3"}, {"count": 2}]})
+    assert status == 200
+    assert [("error" in result) for result in response["results"]] == [True, True, False]
+    assert call('POST', '/api/synergy', {"heroes": ["曹操", "荀彧", "郭嘉"], "weights": [1, 1]})[0] == 400
+    assert call('POST', '/api/synergy/replacements', {"heroes": ["曹操", "荀彧", "郭嘉"], "slot": 5})[0] == 400
+    assert call('POST', '/api/synergy/replacements', {"heroes": ["张角", "SP董卓", "孟获"], "slot": True})[0] == 400
+    assert call('POST', '/api/synergy/replacements', {"heroes": ["曹操", "荀彧", "郭嘉"], "replace": "刘备"})[0] == 400
+    for body in ({"count": "3"}, {"count": -1}, {"candidates": "刘备"}, {"candidates": [1, 2]}):
+        status, response = call('POST', '/api/synergy/replacements',
+                                dict(body, heroes=["曹操", "荀彧", "郭嘉"], slot=1))
+        print(f"/synergy/replacements {body}: {status} {response}")
+        assert status == 400
+
+def test_lookup_routes():
+    """测试武将战法关系查询和战法更新接口的错误响应"""
+    assert call('GET', '/api/heroes/不存在的武将/skills')[0] == 404
+    assert call('GET', '/api/heroes/不存在的武将/compatible-skills')[0] == 404
+    assert call('GET', '/api/skills/不存在的战法/heroes')[0] == 404
+    status, response = call('GET', '/api/heroes/曹操/skills')
+    assert status == 200 and response["skills"]["自带战法"]["name"]
+    # 战法信息不是对象时返回400，不写入更新日志
+    skill_name = routes.data_manager.get_heroes()["曹操"]["自带战法"]
+    journal_size = routes.data_manager._journal.size()
+    for body in ([1, 2], "abc", None):
+        assert call('PUT', f'/api/skills/{skill_name}', body)[0] == 400
+    assert routes.data_manager._journal.size() == journal_size
+
+def test_job_routes():
+    """测试异步推荐任务：默认使用精确搜索并报告进度，不支持的策略返回400"""
+    status, response = call('POST', '/api/jobs/recommend', {"strategy": "balanced"})
+    assert status == 400 and "exact" in response["error"]
+    assert call('POST', '/api/jobs/recommend', {"count": "3"})[0] == 400
+    for method, path in (('GET', '/api/jobs/unknown'), ('GET', '/api/jobs/unknown/result'),
+                         ('DELETE', '/api/jobs/unknown')):
+        assert call(method, path)[0] == 404
+
+    status, response = call('POST', '/api/jobs/recommend', {"count": 3, "required_camp": "魏"})
+    assert status == 202
+    routes.job_manager.get(response["job_id"]).future.result()
+    status, job = call('GET', f'/api/jobs/{response["job_id"]}')
+    print(f"任务状态: {job}")
+    assert job["state"] == "done" and job["total"] > 0
+    status, result = call('GET', f'/api/jobs/{response["job_id"]}/result')
+    assert status == 200
+    assert result["teams"] == routes.recommender.recommend_teams(count=3, required_camp="魏", strategy="exact")
+
+if __name__ == "__main__":
+    test_roster_validation()
+    test_lineup_validation()
+    test_skill_loadout_validation()
+    test_recommend_validation()
+    test_lookup_routes()
+    test_job_routes()
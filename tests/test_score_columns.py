@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# 测试全量队伍评分列式文件
+
+import sys
+import os
+import tempfile
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.data_manager import DataManager
+from core.synergy_analyzer import SynergyAnalyzer
+from core.recommender import Recommender
+from core.score_columns import ScoreColumns, ScoreColumnsProvider, write_score_columns
+
+def test_score_columns():
+    """测试全量队伍评分列式文件"""
+    data_manager = DataManager("data/consolidated_ocr_data.json")
+    synergy_analyzer = SynergyAnalyzer(data_manager)
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        directory = os.path.join(temp_dir, "score_columns")
+        
+        # 测试文件不存在时回退到实时评分，并在后台生成文件
+        provider = ScoreColumnsProvider(synergy_analyzer, directory)
+        assert provider.get() is None
+        provider.rebuild_async().join()
+        columns = provider.get()
+        print(f"列式文件中的队伍数量: {len(columns)}")
+        assert columns is not None
+        
+        # 测试行号与组合排名一致
+        team = tuple(int(i) for i in columns.teams[12345])
+        print(f"第12345行队伍: {team}, 行号: {columns.row_index([team])[0]}")
+        assert columns.row_index([team])[0] == 12345
+        
+        # 测试列式文件的推荐结果与实时评分一致
+        live = Recommender(data_manager, synergy_analyzer)
+        cached = Recommender(data_manager, synergy_analyzer, score_columns=provider)
+        assert cached.recommend_teams(10, strategy="exact") == live.recommend_teams(10, strategy="exact")
+        assert cached.recommend_teams_by_camp("魏", 10) == live.recommend_teams_by_camp("魏", 10)
+        assert cached.recommend_teams_by_tag("谋", 10) == live.recommend_teams_by_tag("谋", 10)
+        print(f"列式文件推荐结果: {cached.recommend_teams_by_camp('魏', 3)}")
+        
+        # 测试数据变化后文件过期
+        data_manager.data_hash = "changed-hash"
+        assert not ScoreColumns.load(directory).is_current(data_manager)
+        provider.auto_rebuild = False
+        assert provider.get() is None
+        meta = write_score_columns(directory, synergy_analyzer)
+        assert meta["data_hash"] == "changed-hash"
+        assert provider.get() is not None
+
+if __name__ == "__main__":
+    test_score_columns()
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+# 测试持久化协同评分存储
+
+import sys
+import os
+import tempfile
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.data_manager import DataManager
+from core.synergy_analyzer import SynergyAnalyzer, SCORING_RULES_VERSION
+from core.score_store import ScoreStore
+
+def test_score_store():
+    """测试持久化协同评分存储"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_path = os.path.join(temp_dir, "score_cache.sqlite3")
+        data_manager = DataManager("data/consolidated_ocr_data.json")
+        print(f"数据文件哈希: {data_manager.data_hash}")
+        
+        # 测试计算的评分写入存储
+        store = ScoreStore(db_path)
+        synergy_analyzer = SynergyAnalyzer(data_manager, score_store=store)
+        team = ["曹操", "夏侯惇", "荀彧"]
+        score = synergy_analyzer.calculate_synergy_score(team)
+        store.close()
+        
+        # 测试模拟进程重启后从存储中读取评分
+        store = ScoreStore(db_path)
+        synergy_analyzer = SynergyAnalyzer(data_manager, score_store=store)
+        synergy_analyzer.get_compiled_heroes()
+        print(f"重启后存储中的评分数量: {len(store)}")
+        assert len(store) == 1
+        assert synergy_analyzer.calculate_synergy_score(team) == score
+        print(f"协同评分缓存统计: {synergy_analyzer.get_cache_stats()}")
+        
+        # 测试数据文件哈希变化后旧评分失效
+        store.activate("changed-hash", SCORING_RULES_VERSION)
+        print(f"数据变化后存储中的评分数量: {len(store)}")
+        assert len(store) == 0
+        store.close()
+
+if __name__ == "__main__":
+    test_score_store()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# 测试自定义评分权重
+
+import sys
+import os
+import time
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.data_manager import DataManager
+from core.synergy_analyzer import SCORE_WEIGHTS, SynergyAnalyzer, parse_score_weights
+from core.recommender import Recommender
+from core.team_search import branch_and_bound_top_k
+
+def test_score_weights():
+    """测试自定义权重的解析、评分和推荐"""
+    data_manager = DataManager("data/consolidated_ocr_data.json")
+    synergy_analyzer = SynergyAnalyzer(data_manager)
+    recommender = Recommender(data_manager, synergy_analyzer)
+    tables = synergy_analyzer.get_synergy_tables()
+
+    # 测试权重解析
+    assert parse_score_weights(None) == SCORE_WEIGHTS
+    assert parse_score_weights({"skill": 1}) == (0.25 / 1.65, 0.25 / 1.65, 0.15 / 1.65, 1.0 / 1.65)
+    assert parse_score_weights([1, 0, 0, 0]) == (1.0, 0.0, 0.0, 0.0)
+    assert parse_score_weights([2, 2, 2, 2]) == (0.25, 0.25, 0.25, 0.25)
+    assert parse_score_weights(list(SCORE_WEIGHTS)) == SCORE_WEIGHTS
+    # 权重归一化后评分不超过100
+    assert synergy_analyzer.calculate_synergy_score(
+        ["曹操", "荀彧", "郭嘉"], weights=parse_score_weights({"skill": 1})) <= 100
+    for invalid in ([1, 2, 3], {"unknown": 1}, [0, 0, 0, 0], [-1, 1, 1, 1], ["a", 1, 1, 1],
+                    [float("nan"), 1, 1, 1], {"skill": float("inf")}):
+        try:
+            parse_score_weights(invalid)
+            assert False, "非法权重应抛出ValueError"
+        except ValueError as e:
+            print(f"非法权重 {invalid}: {e}")
+
+    # 默认权重与不指定权重的结果相同
+    default_teams = recommender.recommend_teams(count=5, strategy="exact")
+    assert recommender.recommend_teams(count=5, strategy="exact", weights=SCORE_WEIGHTS) == default_teams
+
+    # 自定义权重的推荐与实时评分、逐队评分一致
+    weights = (0.1, 0.1, 0.5, 0.3)
+    start = time.time()
+    weighted_teams = recommender.recommend_teams(count=10, weights=weights)
+    print(f"自定义权重推荐耗时: {time.time() - start:.3f}秒")
+    start = time.time()
+    reweighted = recommender.recommend_teams(count=10, weights=(0.4, 0.1, 0.1, 0.4))
+    print(f"再次调整权重的推荐耗时: {time.time() - start:.3f}秒")
+    live_teams = tables.top_k(10, weights=weights)
+    assert [team["评分"] for team in weighted_teams] == [score for _, score in live_teams]
+    assert [team["队伍"] for team in weighted_teams] == [[tables.hero_names[i] for i in team] for team, _ in live_teams]
+    for team in weighted_teams + reweighted:
+        assert team["评分"] == synergy_analyzer.calculate_synergy_score(
+            team["队伍"], weights=weights if team in weighted_teams else (0.4, 0.1, 0.1, 0.4))
+    print(f"自定义权重{weights}的最佳队伍: {weighted_teams[0]}")
+    print(f"默认权重的最佳队伍: {default_teams[0]}")
+
+    # 分支定界搜索在自定义权重下与精确搜索一致
+    assert branch_and_bound_top_k(tables, 10, weights=weights) == live_teams
+    required = tables.hero_index["曹操"]
+    assert branch_and_bound_top_k(tables, 5, required=required, weights=weights) == \
+        tables.top_k(5, required=required, weights=weights)
+    camp_teams = recommender.recommend_teams(count=5, required_camp="吴", weights=weights)
+    assert camp_teams == recommender.recommend_teams(count=5, required_camp="吴", strategy="branch_and_bound",
+                                                     weights=weights)
+
+if __name__ == "__main__":
+    test_score_weights()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# 测试武将、战法搜索索引
+
+import sys
+import os
+import shutil
+import tempfile
+import time
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.data_manager import DataManager
+from data.search_index import HERO_SEARCH_FIELDS, SKILL_SEARCH_FIELDS
+
+def naive_search(records, fields, query):
+    """逐条拼接字段文本做子串匹配的参考实现（不排序）"""
+    terms = query.lower().split()
+    result = set()
+    for name, info in records.items():
+        texts = []
+        for field, _ in fields:
+            value = name if field == "名称" else info.get(field)
+            values = value if isinstance(value, list) else [value]
+            texts.extend(str(item).lower() for item in values if item is not None)
+        if all(any(term in text for text in texts) for term in terms):
+            result.add(name)
+    return result
+
+def test_search_index():
+    """测试搜索结果与逐条匹配一致、按相关度排序，以及更新战法后增量维护索引"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        data_file = os.path.join(temp_dir, "data.json")
+        shutil.copy("data/consolidated_ocr_data.json", data_file)
+        data_manager = DataManager(data_file)
+        heroes = data_manager.get_heroes()
+        skills = data_manager.get_skills()
+
+        queries = ["魏", "曹", "主动", "伤害", "谋略 伤害", "S 指挥", "骑兵", "曹操", "SP", "sp 蜀", "不存在的词", "  "]
+        for query in queries:
+            hero_result = data_manager.search_heroes(query)
+            skill_result = data_manager.search_skills(query)
+            if query.strip():
+                assert set(hero_result) == naive_search(heroes, HERO_SEARCH_FIELDS, query)
+                assert set(skill_result) == naive_search(skills, SKILL_SEARCH_FIELDS, query)
+            else:
+                assert list(hero_result) == list(heroes) and list(skill_result) == list(skills)
+            print(f"搜索'{query}': {len(hero_result)}个武将, {len(skill_result)}个战法")
+
+        # 名称完全相同的记录排在最前，名称匹配优先于描述匹配
+        assert list(data_manager.search_heroes("曹操"))[0] == "曹操"
+        skill_name = "乱世奸雄"
+        assert list(data_manager.search_skills(skill_name))[0] == skill_name
+
+        start = time.perf_counter()
+        for _ in range(100):
+            data_manager.search_skills("谋略 伤害")
+        print(f"多词搜索战法平均耗时: {(time.perf_counter() - start) * 10000:.1f}微秒")
+
+        # 更新战法后索引增量更新：旧描述不再命中，新描述可以搜到，顺序不变
+        skill_info = dict(skills[skill_name])
+        skill_info["描述"] = "测试用的独特描述文字"
+        assert skill_name not in data_manager.search_skills("独特描述")
+        data_manager.update_skill(skill_name, skill_info)
+        assert list(data_manager.search_skills("独特描述")) == [skill_name]
+        assert list(data_manager.search_skills("")) == list(data_manager.get_skills())
+        data_manager.update_skill("新增测试战法", {"类型": "被动", "描述": "另一段独特描述"})
+        assert list(data_manager.search_skills("独特描述")) == [skill_name, "新增测试战法"]
+        assert list(data_manager.search_skills("新增测试"))[0] == "新增测试战法"
+
+if __name__ == "__main__":
+    test_search_index()
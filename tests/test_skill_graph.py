@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# 测试武将战法关系图
+
+import sys
+import os
+import shutil
+import tempfile
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.data_manager import DataManager
+from core.synergy_analyzer import SynergyAnalyzer
+
+def test_skill_graph():
+    """测试正向、反向查询与逐条扫描一致，以及更新战法后关系图保持一致"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        data_file = os.path.join(temp_dir, "data.json")
+        shutil.copy("data/consolidated_ocr_data.json", data_file)
+        data_manager = DataManager(data_file)
+        heroes = data_manager.get_heroes()
+        skills = data_manager.get_skills()
+
+        # 反向查询：战法 -> 自带、传承武将和关联武将
+        for skill_name, skill_info in skills.items():
+            skill_heroes = data_manager.get_skill_heroes(skill_name)
+            assert skill_heroes["自带"] == [name for name, info in heroes.items() if info["自带战法"] == skill_name]
+            assert skill_heroes["传承"] == [name for name, info in heroes.items() if info["传承战法"] == skill_name]
+            assert skill_heroes["关联"] == ([skill_info["关联武将"]] if skill_info["关联武将"] else [])
+        print(f"曹操的自带战法 {heroes['曹操']['自带战法']}: {data_manager.get_skill_heroes(heroes['曹操']['自带战法'])}")
+
+        # 正向查询：武将 -> 已解析的战法详情
+        for hero_name, hero_info in heroes.items():
+            expected = [(key, hero_info[key], skills[hero_info[key]]) for key in ("自带战法", "传承战法")
+                        if skills.get(hero_info[key])]
+            assert data_manager.get_hero_skills(hero_name) == expected
+        assert data_manager.get_hero_skills("不存在的武将") == []
+        assert set(data_manager.get_linked_skills("曹操")) == {
+            name for name, info in skills.items() if info["关联武将"] == "曹操"}
+
+        # 兵种兼容：适用兵种包含武将S级兵种的战法
+        s_troops = [troop for troop, grade in heroes["曹操"]["兵种"].items() if grade == "S"]
+        compatible = data_manager.get_compatible_skill_names("曹操", min_grade="S")
+        assert compatible == [name for name, info in skills.items()
+                              if set(info["适用兵种"]) & set(s_troops)]
+        print(f"适用于曹操S级兵种{s_troops}的战法: {len(compatible)}个")
+
+        # 更新战法：关联武将变化，引用该战法的武将读取到新的详情，协同评分随之变化
+        synergy_analyzer = SynergyAnalyzer(data_manager)
+        skill_name = heroes["曹操"]["自带战法"]
+        skill_info = dict(skills[skill_name])
+        skill_info.update({"关联武将": "刘备", "类型": "被动"})
+        data_manager.update_skill(skill_name, skill_info)
+        assert data_manager.get_skill_heroes(skill_name)["关联"] == ["刘备"]
+        assert skill_name in data_manager.get_linked_skills("刘备")
+        assert skill_name not in data_manager.get_linked_skills("曹操")
+        assert data_manager.get_hero_skills("曹操")[0] == ("自带战法", skill_name, skill_info)
+        reference = SynergyAnalyzer(DataManager(data_file))
+        team = ["曹操", "刘备", "关羽"]
+        assert synergy_analyzer.calculate_synergy_score(team) == reference.calculate_synergy_score(team)
+
+if __name__ == "__main__":
+    test_skill_graph()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# 测试战法配置优化
+
+import sys
+import os
+import itertools
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.data_manager import DataManager
+from core.synergy_analyzer import SynergyAnalyzer
+from core.skill_loadout import SkillLoadoutOptimizer
+
+def test_skill_loadout():
+    """测试战法配置优化"""
+    data_manager = DataManager("data/consolidated_ocr_data.json")
+    synergy_analyzer = SynergyAnalyzer(data_manager)
+    optimizer = SkillLoadoutOptimizer(synergy_analyzer)
+    
+    team = ["曹操", "夏侯惇", "荀彧"]
+    result = optimizer.optimize(team, count=3)
+    print(f"战法配置优化结果: {result}")
+    assert len(result["配置"]) == 3
+    for loadout in result["配置"]:
+        learned = [skill for skills in loadout["战法配置"].values() for skill in skills[1:]]
+        # 同一战法只能使用一次，且只能学习传承、事件战法
+        assert len(set(learned)) == len(learned) == 6
+        assert all(data_manager.get_skill_by_name(skill)["来源"] != "自带" for skill in learned)
+    
+    # 测试限定可学习战法时与穷举的平均协同值一致
+    compiled = synergy_analyzer.get_compiled_heroes()
+    available = [name for name, skill in data_manager.get_skills().items() if skill["来源"] == "传承"][:9]
+    result = optimizer.optimize(team, count=1, available_skills=available)
+    own_types = [compiled.skill_type_ids[data_manager.get_skill_by_name(data_manager.get_hero_by_name(hero)["自带战法"])["类型"]]
+                 for hero in team]
+    best_average = 0
+    for selection in itertools.combinations(available, 6):
+        types = own_types + [compiled.skill_type_ids[data_manager.get_skill_by_name(skill)["类型"]] for skill in selection]
+        pairs = list(itertools.combinations(types, 2))
+        best_average = max(best_average, sum(compiled.skill_synergy_matrix[a][b] for a, b in pairs) / len(pairs))
+    print(f"限定战法的最佳配置: {result['配置'][0]}, 穷举最佳平均协同值: {best_average:.2f}")
+    assert result["配置"][0]["平均协同值"] == round(best_average, 2)
+    
+    # 测试可学习战法不足
+    print(f"可学习战法不足: {optimizer.optimize(team, available_skills=available[:3])}")
+    
+    # 测试不存在的武将和重复武将
+    print(f"不存在的武将: {optimizer.optimize(['曹操', '不存在的武将', '荀彧'])}")
+    print(f"重复武将: {optimizer.optimize(['曹操', '曹操', '荀彧'])}")
+
+if __name__ == "__main__":
+    test_skill_loadout()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# 测试数据文件的二进制快照
+
+import sys
+import os
+import shutil
+import tempfile
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.data_manager import DataManager
+from data.snapshot import snapshot_path_for, read_snapshot
+from core.synergy_analyzer import SynergyAnalyzer
+from core.leaderboards import Leaderboards
+
+def query_results(data_manager):
+    """汇总搜索、筛选、关系图查询结果，用于比较快照恢复前后是否一致"""
+    return (
+        data_manager.get_heroes(),
+        list(data_manager.search_heroes("曹")),
+        list(data_manager.search_skills("主动 谋略")),
+        data_manager.filter_hero_names(camp="魏", tags=["谋"]),
+        data_manager.filter_skill_names(skill_type="指挥"),
+        data_manager.get_hero_skills("曹操"),
+        data_manager.get_skill_heroes(data_manager.get_heroes()["曹操"]["自带战法"])
+    )
+
+def test_snapshot():
+    """测试快照的写入、恢复与失效"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        data_file = os.path.join(temp_dir, "data.json")
+        shutil.copy("data/consolidated_ocr_data.json", data_file)
+        snapshot_file = snapshot_path_for(data_file)
+
+        # 首次加载解析数据文件并写入快照
+        data_manager = DataManager(data_file)
+        assert os.path.exists(snapshot_file)
+        expected = query_results(data_manager)
+        team = ["曹操", "荀彧", "郭嘉"]
+        expected_score = SynergyAnalyzer(data_manager).calculate_synergy_score(team)
+
+        # 再次加载直接读取快照，查询和评分结果不变
+        restored = DataManager(data_file)
+        assert restored.get_snapshot_artifact(("compiled_heroes", "missing")) is None
+        assert query_results(restored) == expected
+        assert SynergyAnalyzer(restored).calculate_synergy_score(team) == expected_score
+
+        # 评分表和排行榜保存到快照后，重新加载时直接恢复
+        synergy_analyzer = SynergyAnalyzer(restored)
+        synergy_analyzer.get_synergy_tables()
+        leaderboards = Leaderboards(restored, synergy_analyzer, size=10)
+        leaderboards.build()
+        artifacts = read_snapshot(snapshot_file)["artifacts"]
+        assert len(artifacts) == 3, list(artifacts)
+        reloaded = DataManager(data_file)
+        reloaded_analyzer = SynergyAnalyzer(reloaded)
+        assert reloaded_analyzer.load_snapshot_artifact("synergy_tables") is not None
+        reloaded_boards = Leaderboards(reloaded, reloaded_analyzer, size=10)
+        reloaded_boards.build()
+        assert reloaded_boards.top_for_camp("魏", 10) == leaderboards.top_for_camp("魏", 10)
+        print(f"快照中的派生数据: {list(artifacts)}")
+
+        # 修改时间变化但内容不变时按内容哈希确认快照仍然有效
+        os.utime(data_file, ns=(0, 0))
+        assert query_results(DataManager(data_file)) == expected
+        assert read_snapshot(snapshot_file)["source"]["mtime_ns"] == 0
+
+        # 数据文件内容变化时快照失效
+        with open(data_file, "r", encoding="utf-8") as f:
+            content = f.read()
+        with open(data_file, "w", encoding="utf-8") as f:
+            f.write(content.replace("曹操", "曹孟德"))
+        changed = DataManager(data_file)
+        assert "曹孟德" in changed.get_heroes() and "曹操" not in changed.get_heroes()
+        assert changed.get_snapshot_artifact(("synergy_tables", "any")) is None
+        shutil.copy("data/consolidated_ocr_data.json", data_file)
+
+        # 更新战法后快照随之更新，重新加载时读取到新的战法详情
+        data_manager = DataManager(data_file)
+        skill_name = data_manager.get_heroes()["曹操"]["自带战法"]
+        skill_info = dict(data_manager.get_skill_by_name(skill_name), 关联武将="刘备")
+        assert data_manager.update_skill(skill_name, skill_info)
+        updated = DataManager(data_file)
+        assert updated.get_skill_by_name(skill_name) == skill_info
+        assert updated.get_skill_heroes(skill_name)["关联"] == ["刘备"]
+        assert updated.get_hero_skills("曹操")[0] == ("自带战法", skill_name, skill_info)
+
+        # 快照损坏时回退到解析数据文件
+        with open(snapshot_file, "wb") as f:
+            f.write(b"not a snapshot")
+        assert DataManager(data_file).get_skill_by_name(skill_name) == skill_info
+        assert read_snapshot(snapshot_file) is not None
+
+        # 关闭快照时不读写快照
+        os.remove(snapshot_file)
+        DataManager(data_file, use_snapshot=False)
+        assert not os.path.exists(snapshot_file)
+        print("快照测试通过")
+
+if __name__ == "__main__":
+    test_snapshot()
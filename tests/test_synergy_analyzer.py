@@ -52,6 +52,39 @@ def test_synergy_analyzer():
     four_heroes_team = ["曹操", "夏侯惇", "荀彧", "郭嘉"]
     four_heroes_score = synergy_analyzer.calculate_synergy_score(four_heroes_team)
     print(f"四个武将队伍评分: {four_heroes_score}")
+    
+    # 测试批量计算协同评分
+    teams = [team_heroes, ["夏侯惇", "郭嘉", "曹操"], ["荀彧", "曹操", "郭嘉"]]
+    team_indices = [synergy_analyzer.get_hero_indices(team) for team in teams]
+    batch_scores, components = synergy_analyzer.calculate_synergy_scores(team_indices, return_components=True)
+    print(f"批量协同评分: {batch_scores}")
+    print(f"批量子评分: {components}")
+    assert components.shape == (3, 4)
+    for team, score in zip(teams, batch_scores):
+        assert score == synergy_analyzer.calculate_synergy_score(team)
+    
+    # 测试批量评分的非法输入
+    for invalid_indices in ([[0, 0, 1]], [[0, 1, 100000]], [[0, 1]]):
+        try:
+            synergy_analyzer.calculate_synergy_scores(invalid_indices)
+            assert False, "非法输入应抛出ValueError"
+        except ValueError as e:
+            print(f"非法输入 {invalid_indices}: {e}")
+    
+    # 测试替换武将评估：与替换后逐队评分一致
+    replacements = synergy_analyzer.rank_replacements(team_heroes, 1, count=5)
+    print(f"替换 {replacements['被替换武将']} 的最佳候选: {replacements['候选'][:3]}")
+    assert replacements["当前评分"] == synergy_analyzer.calculate_synergy_score(team_heroes)
+    for candidate in replacements["候选"]:
+        new_team = list(team_heroes)
+        new_team[1] = candidate["武将"]
+        assert candidate["评分"] == synergy_analyzer.calculate_synergy_score(new_team)
+    scores = [candidate["评分"] for candidate in replacements["候选"]]
+    assert scores == sorted(scores, reverse=True) and len(scores) == 5
+    limited = synergy_analyzer.rank_replacements(team_heroes, 0, candidates=["郭嘉", "夏侯惇", "不存在的武将"])
+    # 队伍中已有的武将和不存在的武将不作为候选
+    assert [candidate["武将"] for candidate in limited["候选"]] == ["郭嘉"]
+    assert "error" in synergy_analyzer.rank_replacements(team_heroes, 3)
 
 if __name__ == "__main__":
     test_synergy_analyzer()
\ No newline at end of file
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# 测试协同评分分解表
+
+import sys
+import os
+import itertools
+import time
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from data.data_manager import DataManager
+from core.synergy_analyzer import SynergyAnalyzer
+from core.recommender import Recommender
+
+def test_synergy_tables():
+    """测试协同评分分解表"""
+    data_manager = DataManager("data/consolidated_ocr_data.json")
+    synergy_analyzer = SynergyAnalyzer(data_manager)
+    
+    # 测试分解表构建
+    start = time.time()
+    tables = synergy_analyzer.get_synergy_tables()
+    print(f"分解表构建耗时: {time.time() - start:.3f}秒, 武将数量: {len(tables)}")
+    
+    # 测试向量化评分与逐队评分一致（包括队伍中的武将顺序）
+    hero_names = tables.hero_names
+    teams = np.array(list(itertools.permutations(range(12), 3)))
+    scores = tables.score_teams(teams)
+    mismatches = 0
+    for team, score in zip(teams.tolist(), scores):
+        expected = synergy_analyzer.calculate_synergy_score([hero_names[i] for i in team])
+        if expected != score:
+            mismatches += 1
+    print(f"向量化评分 {len(teams)} 支队伍, 与逐队评分不一致的数量: {mismatches}")
+    assert mismatches == 0
+    
+    # 测试子评分
+    components = tables.score_components(teams[:3])
+    print(f"前3支队伍的子评分(标签, 兵种, 阵营, 战法): {components.tolist()}")
+    
+    # 测试精确搜索与穷举结果一致
+    wei_heroes = [name for name in hero_names if data_manager.get_hero_by_name(name).get("阵营") == "魏"]
+    expected = [
+        {"队伍": list(combo), "评分": synergy_analyzer.calculate_synergy_score(list(combo))}
+        for combo in itertools.combinations(wei_heroes, 3)
+    ]
+    expected.sort(key=lambda x: x["评分"], reverse=True)
+    recommender = Recommender(data_manager, synergy_analyzer)
+    exact_teams = recommender.recommend_teams(count=10, required_camp="魏", strategy="exact")
+    print(f"魏国阵营精确搜索结果与穷举一致: {exact_teams == expected[:10]}")
+    assert exact_teams == expected[:10]
+    
+    # 测试全组合精确搜索耗时
+    start = time.time()
+    best_teams = recommender.recommend_teams(count=5, strategy="exact")
+    print(f"全组合精确搜索耗时: {time.time() - start:.3f}秒")
+    for i, team in enumerate(best_teams, 1):
+        print(f"{i}. 队伍: {team['队伍']}, 评分: {team['评分']}")
+
+if __name__ == "__main__":
+    test_synergy_tables()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# 测试分支定界队伍搜索
+
+import sys
+import os
+import time
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.data_manager import DataManager
+from core.synergy_analyzer import SynergyAnalyzer
+from core.recommender import Recommender
+from core.team_search import branch_and_bound_search, branch_and_bound_top_k
+
+def test_team_search():
+    """测试分支定界队伍搜索"""
+    data_manager = DataManager("data/consolidated_ocr_data.json")
+    synergy_analyzer = SynergyAnalyzer(data_manager)
+    recommender = Recommender(data_manager, synergy_analyzer)
+    tables = synergy_analyzer.get_synergy_tables()
+    
+    # 测试无约束搜索与精确搜索结果一致
+    start = time.time()
+    pruned_teams = branch_and_bound_top_k(tables, 10)
+    print(f"分支定界搜索耗时: {time.time() - start:.3f}秒")
+    exact_teams = tables.top_k(10)
+    print(f"分支定界结果与精确搜索一致: {pruned_teams == exact_teams}")
+    assert pruned_teams == exact_teams
+    
+    # 测试带约束的推荐
+    queries = [
+        {"required_hero": "曹操"},
+        {"required_camp": "蜀"},
+        {"required_tags": ["辅"]},
+        {"excluded_heroes": ["曹操", "荀彧"], "required_camp": "魏"},
+    ]
+    for query in queries:
+        pruned = recommender.recommend_teams(count=5, strategy="branch_and_bound", **query)
+        exact = recommender.recommend_teams(count=5, strategy="exact", **query)
+        print(f"条件 {query} 的分支定界结果与精确搜索一致: {pruned == exact}")
+        assert pruned == exact
+        for i, team in enumerate(pruned[:3], 1):
+            print(f"  {i}. 队伍: {team['队伍']}, 评分: {team['评分']}")
+    
+    # 测试限时搜索：时间充足时结果精确，时间不足时评分差距不超过上界
+    timed = recommender.recommend_teams(count=10, strategy="exact", time_budget_ms=60000)
+    print(f"时间充足时结果精确: {timed['精确']}, 评分差距上界: {timed['评分差距上界']}")
+    assert timed["精确"] and timed["队伍"] == recommender.recommend_teams(count=10, strategy="exact")
+    for budget in (0.0, 0.005, 0.02):
+        partial, status = branch_and_bound_search(tables, 10, deadline=time.perf_counter() + budget)
+        print(f"时间上限{budget * 1000:.0f}毫秒: 找到{len(partial)}支队伍, 状态: {status}")
+        if not status["exact"]:
+            found_worst = partial[-1][1] if len(partial) == 10 else 0.0
+            assert exact_teams[-1][1] - found_worst <= status["gap"] + 0.01
+            assert exact_teams[0][1] <= max(status["upper_bound"], partial[0][1] if partial else 0.0)
+        else:
+            assert partial == exact_teams
+    expired = recommender.recommend_teams(count=5, required_camp="群", strategy="exact", time_budget_ms=0)
+    print(f"时间上限为0时: 精确={expired['精确']}, 队伍数量={len(expired['队伍'])}")
+    assert not expired["精确"] and expired["评分差距上界"] > 0
+    
+    # 测试自定义权重的限时搜索不现场构建全量队伍评分，构建之后直接使用
+    weights = (0.25, 0.25, 0.25, 0.25)
+    cold = Recommender(data_manager, synergy_analyzer)
+    start = time.time()
+    weighted = cold.recommend_teams(count=5, strategy="exact", time_budget_ms=1, weights=weights)
+    print(f"自定义权重限时搜索耗时: {time.time() - start:.3f}秒, 精确={weighted['精确']}")
+    assert cold._shared_scores is None
+    cold.get_shared_scores()
+    weighted = cold.recommend_teams(count=5, strategy="exact", time_budget_ms=1, weights=weights)
+    assert weighted["精确"] and weighted["队伍"] == cold.recommend_teams(count=5, strategy="exact", weights=weights)
+    
+    # 测试候选武将不足三人
+    few_heroes = branch_and_bound_top_k(tables, 5, candidates=[0, 1])
+    print(f"候选武将不足时的结果数量: {len(few_heroes)}")
+
+if __name__ == "__main__":
+    test_team_search()
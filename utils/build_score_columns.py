@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+# 全量队伍评分文件生成工具
+
+import sys
+import os
+import argparse
+import time
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from data.data_manager import DataManager
+from core.synergy_analyzer import SynergyAnalyzer
+from core.score_columns import write_score_columns
+
+def build_score_columns(output_dir):
+    """为所有三人队伍评分并写入列式文件"""
+    # 创建数据管理器和协同分析器实例
+    data_manager = DataManager(Config.DATA_FILE_PATH)
+    synergy_analyzer = SynergyAnalyzer(data_manager)
+    
+    start_time = time.time()
+    meta = write_score_columns(output_dir, synergy_analyzer)
+    elapsed = time.time() - start_time
+    
+    print(f"已为 {len(meta['hero_names'])} 个武将的 {meta['team_count']} 支队伍评分，耗时 {elapsed:.2f} 秒")
+    print(f"评分文件已写入: {output_dir}")
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="为所有三人队伍评分并写入列式文件")
+    parser.add_argument("--output", default=Config.SCORE_COLUMNS_DIR, help="输出目录")
+    args = parser.parse_args()
+    sys.exit(build_score_columns(args.output))